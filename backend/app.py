@@ -1,45 +1,226 @@
 """
 Flask API server for Cancer Prediction ML application
 """
+import io
 import os
-from flask import Flask, request, jsonify, send_file
+import json
+import time
+import threading
+from functools import wraps
+from flask import Flask, Request, Response, request, jsonify, send_file, current_app, g
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
-import pandas as pd
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 
-from ml_engine.train import train_model
-from ml_engine.predict import predict_single, predict_batch
+# Only modules that load without pandas or sklearn are imported here, so the
+# server answers /api/health right away; the ML stack is loaded by warm_up()
+# in the background, or on first use
 from ml_engine.model_manager import (
     get_model_paths, 
     save_model_metadata, 
     get_model_status,
-    check_model_exists
+    get_all_model_statuses,
+    get_cached_metadata,
+    refresh_model_status,
+    refresh_model_statuses,
+    is_model_trained
 )
+from ml_engine.model_cache import get_cache_stats, get_cached_artifacts
+from ml_engine.result_cache import get_result_cache_stats
+from ml_engine.jobs import (
+    submit_training_job,
+    get_job_status,
+    get_active_job,
+    inline_training,
+    TrainingInProgressError,
+    is_training_worker
+)
+from ml_engine.instrumentation import observe_request, observe_stage, render_prometheus
+from ml_engine.upload_storage import UploadStorage
+
+# Endpoints that read their upload incrementally and get a larger size cap
+STREAMING_ENDPOINTS = {'predict_batch_stream_endpoint', 'upload_dataset'}
+
+
+class APIRequest(Request):
+    """Request class with a separate upload size limit for streaming endpoints"""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in STREAMING_ENDPOINTS:
+            return current_app.config['STREAM_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        """Spool uploaded files in memory, spilling large ones to the uploads folder"""
+        return current_app.extensions['upload_storage'].spooled_buffer()
+
 
 app = Flask(__name__)
+app.request_class = APIRequest
 CORS(app)  # Enable CORS for all routes
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['STREAM_MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1GB for streamed batches
+app.config['BATCH_CHUNK_SIZE'] = 10000  # Rows scored per chunk when streaming
+app.config['BULK_MAX_RECORDS'] = 100000  # Records per JSON bulk prediction request
+# Micro-batching of concurrent single predictions (0 disables it)
+app.config['PREDICT_COALESCE_WINDOW_MS'] = float(os.environ.get('PREDICT_COALESCE_WINDOW_MS', 0))
+app.config['PREDICT_COALESCE_MAX_BATCH'] = int(os.environ.get('PREDICT_COALESCE_MAX_BATCH', 64))
 app.config['UPLOAD_FOLDER'] = './uploads'
+# Limits for the uploads folder, enforced by a background cleanup thread
+app.config['UPLOAD_QUOTA_BYTES'] = int(os.environ.get('UPLOAD_QUOTA_BYTES', 2 * 1024 * 1024 * 1024))
+app.config['UPLOAD_MAX_AGE_SECONDS'] = float(os.environ.get('UPLOAD_MAX_AGE_SECONDS', 24 * 3600))
+app.config['UPLOAD_CLEANUP_INTERVAL'] = float(os.environ.get('UPLOAD_CLEANUP_INTERVAL', 300))
+app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 1024 * 1024))
 app.config['DATA_FOLDER'] = './data'
 app.config['MODEL_FOLDER'] = './models'
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'csv'}
 
+# Request body types read as one JSON record per line
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
+
+# Supported cancer types
+CANCER_TYPES = ['breast', 'lung', 'prostate']
+
 # Ensure directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
 os.makedirs(app.config['MODEL_FOLDER'], exist_ok=True)
 
+def forget_upload(path):
+    """Drop the content hash remembered for an evicted upload"""
+    from ml_engine.dataset_cache import forget_file_hash
+    forget_file_hash(path)
+
+
+upload_storage = UploadStorage(
+    app.config['UPLOAD_FOLDER'],
+    quota_bytes=app.config['UPLOAD_QUOTA_BYTES'],
+    max_age_seconds=app.config['UPLOAD_MAX_AGE_SECONDS'],
+    spool_max_bytes=app.config['UPLOAD_SPOOL_MAX_BYTES'],
+    cleanup_interval=app.config['UPLOAD_CLEANUP_INTERVAL'],
+    on_remove=forget_upload
+)
+app.extensions['upload_storage'] = upload_storage
+
+# Optional request coalescer in front of predict_single, created by warm_up()
+coalescer = None
+
+# Set once warm_up() has finished, whether or not it succeeded
+warmup_done = threading.Event()
+warmup_state = {
+    'error': None,
+    'seconds': None
+}
+
+# Read model status and metadata once; training refreshes them
+try:
+    refresh_model_statuses(CANCER_TYPES, app.config['MODEL_FOLDER'])
+except Exception as e:
+    app.logger.warning(f'Model status load failed: {str(e)}')
+
+
+def warm_up():
+    """Load the ML stack and trained models, then mark the server ready"""
+    global coalescer
+    start = time.perf_counter()
+    try:
+        from ml_engine import train, predict, result_formats, upload_validation  # noqa: F401
+        from ml_engine.coalescer import PredictionCoalescer
+        from ml_engine.inference import configure_inference_engines
+        from ml_engine.model_cache import preload_models
+        
+        if app.config['PREDICT_COALESCE_WINDOW_MS'] > 0:
+            coalescer = PredictionCoalescer(
+                window_ms=app.config['PREDICT_COALESCE_WINDOW_MS'],
+                max_batch=app.config['PREDICT_COALESCE_MAX_BATCH']
+            )
+        
+        # Per cancer type inference engines, e.g. 'lung:flat_forest,prostate:flat_forest'
+        configure_inference_engines(os.environ.get('INFERENCE_ENGINES', ''))
+        
+        # Load already trained models into memory so the first predictions are fast
+        try:
+            preload_models(CANCER_TYPES, app.config['MODEL_FOLDER'])
+        except Exception as e:
+            app.logger.warning(f'Model preload failed: {str(e)}')
+    except Exception as e:
+        warmup_state['error'] = str(e)
+        app.logger.error(f'Warm-up failed: {str(e)}')
+    finally:
+        warmup_state['seconds'] = round(time.perf_counter() - start, 3)
+        warmup_done.set()
+
+
+def after_warmup(view):
+    """Hold requests that need the ML stack until warm-up has finished"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        warmup_done.wait()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.before_request
+def start_request_timer():
+    """Remember when request handling started"""
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its handling time"""
+    start = g.get('request_start')
+    if start is not None:
+        observe_request(request.endpoint, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
+
+@app.teardown_request
+def release_upload_pins(exc):
+    """Let the cleanup thread evict files this request was reading"""
+    for path in g.pop('pinned_uploads', []):
+        upload_storage.unpin(path)
+
+
+def pin_upload(path):
+    """Keep a saved upload from being evicted until the request ends"""
+    upload_storage.pin(path)
+    g.setdefault('pinned_uploads', []).append(path)
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def read_bulk_records():
+    """Read prediction records from a JSON array or NDJSON request body"""
+    if request.mimetype in NDJSON_MIMETYPES:
+        records = []
+        for number, line in enumerate(request.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f'Invalid JSON on line {number}')
+        return records
+    
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict) and 'records' in payload:
+        payload = payload['records']
+    if not isinstance(payload, list):
+        raise ValueError('Expected a JSON array of records, {"records": [...]} or NDJSON')
+    return payload
+
+
 def get_default_data_path(cancer_type):
     """Get path to default dataset for cancer type"""
     mapping = {
@@ -76,13 +257,20 @@ def root():
         'status': 'running',
         'endpoints': {
             'health': '/api/health',
+            'ready': '/api/ready',
             'train': '/api/train/{cancer_type}',
+            'train_job_status': '/api/train-jobs/{job_id}',
             'predict': '/api/predict/{cancer_type}',
+            'predict_bulk': '/api/predict-bulk/{cancer_type}',
             'predict_batch': '/api/predict-batch/{cancer_type}',
+            'predict_batch_stream': '/api/predict-batch/{cancer_type}/stream',
             'upload_dataset': '/api/upload-dataset',
-            'model_status': '/api/model-status/{cancer_type}'
+            'model_status': '/api/model-status/{cancer_type}',
+            'model_status_all': '/api/model-status',
+            'cache_stats': '/api/cache-stats',
+            'metrics': '/api/metrics'
         },
-        'cancer_types': ['breast', 'lung', 'prostate']
+        'cancer_types': CANCER_TYPES
     })
 
 
@@ -95,13 +283,64 @@ def health_check():
     })
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint - 200 once models are loaded, 503 while warming up"""
+    if not warmup_done.is_set():
+        return jsonify({
+            'status': 'starting'
+        }), 503
+    
+    if warmup_state['error']:
+        return jsonify({
+            'status': 'failed',
+            'error': warmup_state['error']
+        }), 503
+    
+    return jsonify({
+        'status': 'ready',
+        'warmup_seconds': warmup_state['seconds']
+    })
+
+
 @app.route('/api/train/<cancer_type>', methods=['POST'])
+@after_warmup
 def train_model_endpoint(cancer_type):
     """Train model for specified cancer type"""
+    from ml_engine.train import train_model, update_trained_model, supports_incremental
+    
     try:
         # Check if using default dataset or uploaded file
         use_default = request.form.get('useDefault', 'true').lower() == 'true'
         
+        # Retrain even when an identical run can be reused from the training store
+        force = request.form.get('force', 'false').lower() == 'true'
+        
+        # 'incremental' updates the trained model with the new rows instead of retraining
+        mode = request.form.get('mode', 'full').lower()
+        if mode not in ('full', 'incremental'):
+            return jsonify({
+                'error': f'Unknown training mode: {mode}'
+            }), 400
+        
+        # Tune hyperparameters with a successive halving search before the final fit
+        search = request.form.get('search', 'false').lower() == 'true'
+        if search and mode == 'incremental':
+            return jsonify({
+                'error': 'Hyperparameter search is only available for full training'
+            }), 400
+        
+        if mode == 'incremental':
+            if cancer_type.lower() not in CANCER_TYPES or not supports_incremental(cancer_type):
+                return jsonify({
+                    'error': f'Incremental training is not supported for {cancer_type} cancer'
+                }), 400
+            
+            if not is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
+                return jsonify({
+                    'error': f'Model not trained for {cancer_type} cancer. Please train the model first.'
+                }), 404
+        
         if use_default:
             data_path = get_default_data_path(cancer_type)
         else:
@@ -127,25 +366,74 @@ def train_model_endpoint(cancer_type):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"{cancer_type}_{timestamp}_{filename}"
             data_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            pin_upload(data_path)
             file.save(data_path)
+            upload_storage.note_written(data_path)
+        
+        # Train in the background and return a job ID when requested
+        if request.form.get('async', 'false').lower() == 'true':
+            if cancer_type.lower() not in CANCER_TYPES:
+                return jsonify({
+                    'error': f'Unknown cancer type: {cancer_type}'
+                }), 400
+            
+            # The job reads the upload after this request ends, so it holds its own pin
+            upload_storage.pin(data_path)
+            try:
+                job_id = submit_training_job(
+                    cancer_type, data_path, app.config['MODEL_FOLDER'], mode=mode, force=force, search=search,
+                    on_done=lambda job_id: upload_storage.unpin(data_path)
+                )
+            except TrainingInProgressError as e:
+                upload_storage.unpin(data_path)
+                return jsonify({
+                    'error': f'Training already in progress for {cancer_type} cancer',
+                    'job_id': e.job_id
+                }), 409
+            except Exception:
+                upload_storage.unpin(data_path)
+                raise
+            return jsonify({
+                'success': True,
+                'message': f'Training started for {cancer_type} cancer',
+                'job_id': job_id,
+                'status_url': f'/api/train-jobs/{job_id}'
+            }), 202
         
         # Get model paths
         paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
         
-        # Train model
-        metrics = train_model(
-            cancer_type,
-            data_path,
-            paths['model'],
-            paths['scaler']
-        )
-        
-        # Save metadata
-        save_model_metadata(cancer_type, metrics, app.config['MODEL_FOLDER'])
+        # One training run per cancer type, whether a background job or a request
+        with inline_training(cancer_type, app.config['MODEL_FOLDER']) as claimed:
+            if not claimed:
+                return jsonify({
+                    'error': f'Training already in progress for {cancer_type} cancer',
+                    'job_id': get_active_job(cancer_type, app.config['MODEL_FOLDER'])
+                }), 409
+            
+            # Train model, or update it with the new rows
+            if mode == 'incremental':
+                metrics = update_trained_model(cancer_type, data_path, paths['model'], paths['scaler'])
+            else:
+                metrics = train_model(
+                    cancer_type,
+                    data_path,
+                    paths['model'],
+                    paths['scaler'],
+                    force=force,
+                    search=search
+                )
+            
+            # Save metadata
+            save_model_metadata(cancer_type, metrics, app.config['MODEL_FOLDER'])
         
+        action = 'updated' if mode == 'incremental' else 'trained'
+        message = f'Model {action} successfully for {cancer_type} cancer'
+        if metrics.get('cached'):
+            message = f'Reused the model trained on identical data for {cancer_type} cancer'
         return jsonify({
             'success': True,
-            'message': f'Model trained successfully for {cancer_type} cancer',
+            'message': message,
             'metrics': metrics
         }), 200
         
@@ -159,12 +447,30 @@ def train_model_endpoint(cancer_type):
         }), 500
 
 
+@app.route('/api/train-jobs/<job_id>', methods=['GET'])
+def train_job_status_endpoint(job_id):
+    """Get state, queued and running time and metrics of a background training job"""
+    status = get_job_status(job_id, app.config['MODEL_FOLDER'])
+    if status is None:
+        return jsonify({
+            'error': f'Training job not found: {job_id}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': status
+    }), 200
+
+
 @app.route('/api/predict/<cancer_type>', methods=['POST'])
+@after_warmup
 def predict_endpoint(cancer_type):
     """Make single prediction"""
+    from ml_engine.predict import predict_single
+    
     try:
         # Check if model exists
-        if not check_model_exists(cancer_type, app.config['MODEL_FOLDER']):
+        if not is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
             return jsonify({
                 'error': f'Model not trained for {cancer_type} cancer. Please train the model first.'
             }), 404
@@ -180,17 +486,19 @@ def predict_endpoint(cancer_type):
         # Get model paths
         paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
         
-        # Make prediction
-        result = predict_single(
+        # Make prediction, batched with concurrent requests when enabled
+        predict = coalescer.predict if coalescer else predict_single
+        result = predict(
             cancer_type,
             form_data,
             paths['model'],
             paths['scaler']
         )
         
-        # Load metadata for additional info
-        from ml_engine.model_manager import load_model_metadata
-        metadata = load_model_metadata(cancer_type, app.config['MODEL_FOLDER'])
+        # Metadata for additional info, from the in-memory registry
+        stage = time.perf_counter()
+        metadata = get_cached_metadata(cancer_type, app.config['MODEL_FOLDER'])
+        observe_stage('predict_endpoint', cancer_type, 'load_metadata', time.perf_counter() - stage)
         
         result['model_info'] = {
             'trained_at': metadata.get('trained_at'),
@@ -202,8 +510,10 @@ def predict_endpoint(cancer_type):
             'success': True,
             'prediction': result
         }), 200
-        
+
     except FileNotFoundError as e:
+        # Artifacts were removed behind the registry's back
+        refresh_model_status(cancer_type, app.config['MODEL_FOLDER'])
         return jsonify({
             'error': str(e)
         }), 404
@@ -213,12 +523,104 @@ def predict_endpoint(cancer_type):
         }), 500
 
 
+@app.route('/api/predict-bulk/<cancer_type>', methods=['POST'])
+@after_warmup
+def predict_bulk_endpoint(cancer_type):
+    """Make predictions for a JSON array or NDJSON stream of records, returned inline"""
+    from ml_engine.predict import predict_records
+    
+    try:
+        # Check if model exists
+        if not is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
+            return jsonify({
+                'error': f'Model not trained for {cancer_type} cancer. Please train the model first.'
+            }), 404
+        
+        # NDJSON out with ?format=ndjson or when the Accept header prefers it
+        requested = request.args.get('format', '').lower()
+        if requested and requested not in ('json', 'ndjson'):
+            return jsonify({
+                'error': 'Requested output format is not available',
+                'formats': ['json', 'ndjson']
+            }), 406
+        if not requested and request.accept_mimetypes:
+            best = request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson'])
+            requested = 'ndjson' if best == 'application/x-ndjson' else 'json'
+        
+        try:
+            records = read_bulk_records()
+        except ValueError as e:
+            return jsonify({
+                'error': str(e)
+            }), 400
+        
+        if not records:
+            return jsonify({
+                'error': 'No input data provided'
+            }), 400
+        
+        if len(records) > app.config['BULK_MAX_RECORDS']:
+            return jsonify({
+                'error': f"At most {app.config['BULK_MAX_RECORDS']} records per request"
+            }), 413
+        
+        # Get model paths
+        paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
+        
+        # All records in one matrix and one model call, without temporary files
+        try:
+            results = predict_records(
+                cancer_type,
+                records,
+                paths['model'],
+                paths['scaler']
+            )
+        except ValueError as e:
+            return jsonify({
+                'error': str(e)
+            }), 400
+        
+        if requested == 'ndjson':
+            body = ''.join(json.dumps(result) + '\n' for result in results)
+            return Response(body, mimetype='application/x-ndjson')
+        
+        metadata = get_cached_metadata(cancer_type, app.config['MODEL_FOLDER'])
+        
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'model_info': {
+                'trained_at': metadata.get('trained_at'),
+                'accuracy': metadata.get('metrics', {}).get('accuracy'),
+                'model_type': results[0]['model_type']
+            },
+            'predictions': results
+        }), 200
+        
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        return jsonify({
+            'error': f'Bulk prediction failed: {str(e)}'
+        }), 500
+
+
 @app.route('/api/predict-batch/<cancer_type>', methods=['POST'])
+@after_warmup
 def predict_batch_endpoint(cancer_type):
     """Make batch predictions from CSV file"""
+    from ml_engine.predict import predict_batch
+    from ml_engine.result_formats import (
+        negotiate_format,
+        available_formats,
+        serialize_results,
+        get_format_mimetype,
+        get_format_extension
+    )
+    
     try:
         # Check if model exists
-        if not check_model_exists(cancer_type, app.config['MODEL_FOLDER']):
+        if not is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
             return jsonify({
                 'error': f'Model not trained for {cancer_type} cancer. Please train the model first.'
             }), 404
@@ -240,43 +642,142 @@ def predict_batch_endpoint(cancer_type):
                 'error': 'Only CSV files are allowed'
             }), 400
         
-        # Save uploaded file temporarily
+        # Pick the output format from ?format= or the Accept header
+        fmt = negotiate_format(request.accept_mimetypes, request.args.get('format'))
+        if fmt is None:
+            return jsonify({
+                'error': 'Requested output format is not available',
+                'formats': available_formats()
+            }), 406
+        
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        temp_filename = f"batch_{timestamp}_{filename}"
-        temp_path = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
-        file.save(temp_path)
         
+        # Get model paths
+        paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
+        
+        # Read the spooled upload directly, without a copy in the uploads folder
+        results_df = predict_batch(
+            cancer_type,
+            file.stream,
+            paths['model'],
+            paths['scaler']
+        )
+        
+        # Serialize results in memory
+        output_filename = f"predictions_{timestamp}_{os.path.splitext(filename)[0]}.{get_format_extension(fmt)}"
+        output = serialize_results(results_df, fmt)
+        
+        # Return results file
+        return send_file(
+            io.BytesIO(output),
+            mimetype=get_format_mimetype(fmt),
+            as_attachment=True,
+            download_name=output_filename
+        )
+        
+    except ValueError as e:
+        # Unreadable CSV, or one without most of the model's feature columns
+        return jsonify({
+            'error': f'Batch prediction failed: {str(e)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Batch prediction failed: {str(e)}'
+        }), 500
+
+
+@app.route('/api/predict-batch/<cancer_type>/stream', methods=['POST'])
+@after_warmup
+def predict_batch_stream_endpoint(cancer_type):
+    """Make batch predictions from a CSV file, streaming results chunk by chunk"""
+    from ml_engine.predict import predict_batch_stream
+    from ml_engine.result_formats import (
+        negotiate_format,
+        available_formats,
+        get_format_mimetype,
+        get_format_extension
+    )
+    
+    try:
+        # Check if model exists
+        if not is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
+            return jsonify({
+                'error': f'Model not trained for {cancer_type} cancer. Please train the model first.'
+            }), 404
+        
+        # Check for uploaded file
+        if 'file' not in request.files:
+            return jsonify({
+                'error': 'No CSV file provided'
+            }), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({
+                'error': 'No file selected'
+            }), 400
+        
+        if not allowed_file(file.filename):
+            return jsonify({
+                'error': 'Only CSV files are allowed'
+            }), 400
+        
+        # Pick a streamable output format from ?format= or the Accept header
+        fmt = negotiate_format(request.accept_mimetypes, request.args.get('format'), streaming=True)
+        if fmt is None:
+            return jsonify({
+                'error': 'Requested output format is not available for streaming',
+                'formats': available_formats(streaming=True)
+            }), 406
+        
+        # Get model paths
+        paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
+        
+        # Take ownership of the spooled upload so it outlives the request,
+        # which closes its files as soon as the view returns
+        upload_stream = file.stream
+        file.stream = io.BytesIO()
+        
+        # Read the upload in place, chunk by chunk
+        chunks = predict_batch_stream(
+            cancer_type,
+            upload_stream,
+            paths['model'],
+            paths['scaler'],
+            chunksize=app.config['BATCH_CHUNK_SIZE'],
+            fmt=fmt
+        )
+        
+        # Score the first chunk up front so input errors still get a JSON response
         try:
-            # Get model paths
-            paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
-            
-            # Make batch predictions
-            results_df = predict_batch(
-                cancer_type,
-                temp_path,
-                paths['model'],
-                paths['scaler']
-            )
-            
-            # Save results to CSV
-            output_filename = f"predictions_{timestamp}_{filename}"
-            output_path = os.path.join(app.config['UPLOAD_FOLDER'], output_filename)
-            results_df.to_csv(output_path, index=False)
-            
-            # Return CSV file
-            return send_file(
-                output_path,
-                mimetype='text/csv',
-                as_attachment=True,
-                download_name=output_filename
-            )
-            
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            first_chunk = next(chunks, b'')
+        except Exception:
+            upload_stream.close()
+            raise
+        
+        def generate():
+            try:
+                yield first_chunk
+                yield from chunks
+            finally:
+                upload_stream.close()
         
+        filename = secure_filename(file.filename)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_filename = f"predictions_{timestamp}_{os.path.splitext(filename)[0]}.{get_format_extension(fmt)}"
+        
+        return Response(
+            generate(),
+            mimetype=get_format_mimetype(fmt),
+            headers={'Content-Disposition': f'attachment; filename={output_filename}'}
+        )
+        
+    except ValueError as e:
+        # Unreadable CSV, or one without most of the model's feature columns
+        return jsonify({
+            'error': f'Batch prediction failed: {str(e)}'
+        }), 400
     except Exception as e:
         return jsonify({
             'error': f'Batch prediction failed: {str(e)}'
@@ -284,8 +785,11 @@ def predict_batch_endpoint(cancer_type):
 
 
 @app.route('/api/upload-dataset', methods=['POST'])
+@after_warmup
 def upload_dataset():
     """Upload new dataset for training"""
+    from ml_engine.upload_validation import validate_upload
+    
     try:
         if 'file' not in request.files:
             return jsonify({
@@ -309,31 +813,53 @@ def upload_dataset():
                 'error': 'Cancer type must be specified'
             }), 400
         
-        # Save uploaded file
+        if cancer_type not in CANCER_TYPES:
+            return jsonify({
+                'error': f'Unknown cancer type: {cancer_type}'
+            }), 400
+        
+        # Per-column summaries need a full parse; without them rows are counted from line breaks
+        summarize = request.form.get('summary', 'true').lower() == 'true'
+        
+        # A dataset for a trained model must have the model's features
+        feature_columns = None
+        if is_model_trained(cancer_type, app.config['MODEL_FOLDER']):
+            paths = get_model_paths(cancer_type, app.config['MODEL_FOLDER'])
+            feature_columns = get_cached_artifacts(cancer_type, paths['model'], paths['scaler'])['feature_names']
+        
+        # Save uploaded file, checking the header and counting rows while it is written
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"{cancer_type}_{timestamp}_{filename}"
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        # Try to read CSV to validate
+        pin_upload(file_path)
         try:
-            df = pd.read_csv(file_path)
-            row_count = len(df)
-            col_count = len(df.columns)
-        except Exception as e:
-            os.remove(file_path)
+            info = validate_upload(
+                file.stream, file_path, cancer_type, summarize=summarize, feature_columns=feature_columns
+            )
+        except ValueError as e:
             return jsonify({
                 'error': f'Invalid CSV file: {str(e)}'
             }), 400
+        upload_storage.note_written(file_path)
         
-        return jsonify({
+        # The saved file is evicted like every upload; earlier if the folder is over its quota
+        expires_at = upload_storage.expires_at(file_path)
+        
+        response = {
             'success': True,
             'message': 'Dataset uploaded successfully',
             'file_path': filename,
-            'rows': row_count,
-            'columns': col_count
-        }), 200
+            'expires_at': datetime.fromtimestamp(expires_at).isoformat() if expires_at else None,
+            'rows': info['rows'],
+            'columns': info['columns'],
+            'target_column': info['target_column'],
+            'size_bytes': info['size_bytes']
+        }
+        if 'column_summary' in info:
+            response['column_summary'] = info['column_summary']
+        
+        return jsonify(response), 200
         
     except Exception as e:
         return jsonify({
@@ -341,11 +867,28 @@ def upload_dataset():
         }), 500
 
 
+@app.route('/api/model-status', methods=['GET'])
+def all_model_status_endpoint():
+    """Get training status and metrics of every cancer type"""
+    try:
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        statuses = get_all_model_statuses(CANCER_TYPES, app.config['MODEL_FOLDER'], refresh=refresh)
+        return jsonify({
+            'success': True,
+            'statuses': statuses
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
 @app.route('/api/model-status/<cancer_type>', methods=['GET'])
 def model_status_endpoint(cancer_type):
     """Get model training status and metrics"""
     try:
-        status = get_model_status(cancer_type, app.config['MODEL_FOLDER'])
+        refresh = request.args.get('refresh', 'false').lower() == 'true'
+        status = get_model_status(cancer_type, app.config['MODEL_FOLDER'], refresh=refresh)
         return jsonify({
             'success': True,
             'status': status
@@ -356,6 +899,58 @@ def model_status_endpoint(cancer_type):
         }), 500
 
 
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats_endpoint():
+    """Get model artifact and prediction result cache counters"""
+    return jsonify({
+        'success': True,
+        'cache': get_cache_stats(),
+        'prediction_cache': get_result_cache_stats(),
+        'coalescer': coalescer.get_stats() if coalescer else None
+    }), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Per-stage latency histograms, counters and cache stats in Prometheus format"""
+    cache_stats = get_cache_stats()
+    gauges = {
+        'model_cache_hits_total': ('counter', 'Model artifact cache hits', cache_stats['hits']),
+        'model_cache_misses_total': ('counter', 'Model artifact cache misses', cache_stats['misses']),
+        'model_cache_reloads_total': ('counter', 'Model artifacts reloaded after a change on disk', cache_stats['reloads']),
+        'model_cache_loaded': (
+            'gauge',
+            'Whether a cancer type has its artifacts loaded',
+            {(('cancer_type', cancer_type),): cancer_type in cache_stats['cached_types'] for cancer_type in CANCER_TYPES}
+        )
+    }
+    upload_stats = upload_storage.get_stats()
+    gauges['upload_storage_bytes'] = ('gauge', 'Bytes of saved uploads at the last cleanup or write', upload_stats['usage_bytes'])
+    gauges['upload_storage_quota_bytes'] = ('gauge', 'Uploads folder quota', upload_stats['quota_bytes'])
+    gauges['upload_storage_evicted_files_total'] = ('counter', 'Uploads removed for age or quota', upload_stats['evicted_files'])
+    result_stats = get_result_cache_stats()
+    gauges['prediction_cache_hits_total'] = ('counter', 'Predictions answered from the result cache', result_stats['hits'])
+    gauges['prediction_cache_misses_total'] = ('counter', 'Predictions not found in the result cache', result_stats['misses'])
+    gauges['prediction_cache_evictions_total'] = ('counter', 'Cached results evicted over the size limit', result_stats['evictions'])
+    gauges['prediction_cache_entries'] = ('gauge', 'Results currently cached', result_stats['size'])
+    if coalescer:
+        coalescer_stats = coalescer.get_stats()
+        gauges['predict_coalescer_requests_total'] = ('counter', 'Predictions served by the coalescer', coalescer_stats['requests'])
+        gauges['predict_coalescer_batches_total'] = ('counter', 'Coalesced model calls', coalescer_stats['batches'])
+    
+    return Response(render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+
+
+# Training workers import the server's main module again; only the server
+# itself warms up and cleans the uploads folder
+if not is_training_worker():
+    # Warm up in the background so the server binds and answers health checks meanwhile
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    
+    # Enforce the uploads folder limits off the request path
+    upload_storage.start()
+
+
 if __name__ == '__main__':
     port = int(os.environ.get('FLASK_PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,307 @@
+"""
+Async (ASGI) serving mode for the Flask API
+
+Serves the same Flask routes as app.py from an ASGI server such as uvicorn:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+    python asgi.py
+
+Request bodies are received on the event loop and spooled through the
+uploads folder's storage, so slow uploads do not occupy a worker thread;
+received chunks are collected in memory and written to the spool in a
+small I/O pool, so a body spilling to disk never blocks the loop.
+A body is cut off at the size limit of the endpoint it is routed to before
+more of it is written. The Flask handler,
+including scaling and model evaluation, then runs in a bounded thread pool,
+and streamed responses are pulled from it chunk by chunk while sending is
+awaited on the loop. Training requests get their own small pool so long
+fits cannot take every worker from predictions.
+"""
+import os
+import sys
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+
+from app import app, STREAMING_ENDPOINTS
+
+
+# Threads running Flask handlers for everything but training
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', min(32, (os.cpu_count() or 1) + 4)))
+
+# Threads running /api/train requests
+ASGI_TRAIN_WORKERS = int(os.environ.get('ASGI_TRAIN_WORKERS', 2))
+
+# Request bodies larger than this are spooled to disk instead of memory
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+# Received body bytes collected before they are written to the spool off the loop;
+# smaller bodies are written on the loop, into the in-memory part of the spool
+SPOOL_FLUSH_BYTES = 256 * 1024
+
+# Threads writing request bodies to their spool files
+ASGI_IO_WORKERS = int(os.environ.get('ASGI_IO_WORKERS', 4))
+
+# Path prefixes served from the training pool
+TRAIN_PATH_PREFIXES = ('/api/train/',)
+
+# Marks the end of a response iterator pulled through the executor
+_DONE = object()
+
+# Returned by _receive_body once a body passes max_body_size
+_TOO_LARGE = object()
+
+
+class WSGIBridge:
+    """
+    ASGI application running a WSGI app in bounded thread pools
+
+    Args:
+        wsgi_app: WSGI application to serve
+        workers: Threads for ordinary requests
+        train_workers: Threads for requests under TRAIN_PATH_PREFIXES
+        max_body_size: Bodies larger than this are rejected with 413
+            before they are read
+        body_limit: Optional callable returning the size limit for a request
+            scope, used instead of max_body_size
+        spool: Optional callable returning the writable file a body is
+            spooled to; defaults to a temporary file in the system folder
+    """
+
+    def __init__(self, wsgi_app, workers=ASGI_WORKERS, train_workers=ASGI_TRAIN_WORKERS, max_body_size=None,
+                 body_limit=None, spool=None):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='asgi-worker')
+        self.train_executor = ThreadPoolExecutor(max_workers=train_workers, thread_name_prefix='asgi-train')
+        self.io_executor = ThreadPoolExecutor(max_workers=ASGI_IO_WORKERS, thread_name_prefix='asgi-io')
+        self.max_body_size = max_body_size
+        self.body_limit = body_limit
+        self.spool = spool or (lambda: tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY))
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        """Acknowledge startup and release the pools on shutdown"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                self.train_executor.shutdown(wait=False)
+                self.io_executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def _pick_executor(self, path):
+        """Training requests run in their own pool"""
+        if path.startswith(TRAIN_PATH_PREFIXES):
+            return self.train_executor
+        return self.executor
+
+    async def _http(self, scope, receive, send):
+        max_body_size = self.body_limit(scope) if self.body_limit is not None else self.max_body_size
+        content_length = _header(scope, b'content-length')
+        if max_body_size is not None and content_length and int(content_length) > max_body_size:
+            await _send_simple(send, 413, b'Request Entity Too Large')
+            return
+
+        body = self.spool()
+        try:
+            size = await self._receive_body(receive, body, max_body_size)
+            if size is None:
+                return
+            if size is _TOO_LARGE:
+                # Chunked or understated bodies are cut off as they arrive
+                await _send_simple(send, 413, b'Request Entity Too Large')
+                return
+            body.seek(0)
+
+            loop = asyncio.get_running_loop()
+            executor = self._pick_executor(scope['path'])
+            environ = build_environ(scope, body, size)
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response['status'] = int(status.split(' ', 1)[0])
+                response['headers'] = [
+                    (name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers
+                ]
+                return lambda data: response.setdefault('early', []).append(data)
+
+            def run_app():
+                # Flask calls start_response before returning the body iterable
+                result = self.wsgi_app(environ, start_response)
+                return result, iter(result)
+
+            result, chunks = await loop.run_in_executor(executor, run_app)
+            try:
+                await send({
+                    'type': 'http.response.start',
+                    'status': response['status'],
+                    'headers': response['headers']
+                })
+                for data in response.pop('early', []):
+                    await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+
+                # Each chunk is produced in the pool; sending it only awaits the client
+                while True:
+                    data = await loop.run_in_executor(executor, next, chunks, _DONE)
+                    if data is _DONE:
+                        break
+                    if data:
+                        await send({'type': 'http.response.body', 'body': data, 'more_body': True})
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(executor, result.close)
+        finally:
+            body.close()
+
+    async def _receive_body(self, receive, body, max_body_size):
+        """
+        Read the request body into the spool file
+
+        Returns:
+            Body size in bytes, None if the client went away, or _TOO_LARGE
+            as soon as more than max_body_size bytes have arrived, before
+            they are written
+        """
+        loop = asyncio.get_running_loop()
+        size = 0
+        pending = []
+        pending_size = 0
+        # At most one write per body in flight, overlapping the next receives
+        flush = None
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return None
+                chunk = message.get('body', b'')
+                if chunk:
+                    size += len(chunk)
+                    if max_body_size is not None and size > max_body_size:
+                        return _TOO_LARGE
+                    pending.append(chunk)
+                    pending_size += len(chunk)
+                if pending_size >= SPOOL_FLUSH_BYTES:
+                    if flush is not None:
+                        await flush
+                    flush = loop.run_in_executor(self.io_executor, _write_chunks, body, pending)
+                    pending, pending_size = [], 0
+                if not message.get('more_body', False):
+                    break
+        finally:
+            # The spool is closed by the caller, never while a write is running
+            if flush is not None:
+                await flush
+
+        if flush is None:
+            # A body under SPOOL_FLUSH_BYTES stays in the spool's memory
+            _write_chunks(body, pending)
+        elif pending:
+            await loop.run_in_executor(self.io_executor, _write_chunks, body, pending)
+        return size
+
+
+def _write_chunks(body, chunks):
+    """Write received body chunks to the spool file"""
+    for chunk in chunks:
+        body.write(chunk)
+
+
+def _header(scope, name):
+    """Get a request header value from an ASGI scope, or None"""
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def _send_simple(send, status, body):
+    """Send a complete plain-text response"""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain'), (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def build_environ(scope, body, size):
+    """Build the WSGI environ for an ASGI HTTP scope and its spooled body"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(size),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for key, value in scope['headers']:
+        name = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_LENGTH':
+            continue
+        if name != 'CONTENT_TYPE':
+            name = f'HTTP_{name}'
+        if name in environ:
+            environ[name] = f'{environ[name]},{value}'
+        else:
+            environ[name] = value
+
+    return environ
+
+
+def flask_body_limit(scope):
+    """Size limit Flask applies to the endpoint a request is routed to"""
+    try:
+        endpoint, _ = app.url_map.bind('localhost').match(scope['path'], method=scope['method'])
+    except HTTPException:
+        # Not found or redirected; Flask answers without reading the body
+        endpoint = None
+    if endpoint in STREAMING_ENDPOINTS:
+        return app.config['STREAM_MAX_CONTENT_LENGTH']
+    return app.config['MAX_CONTENT_LENGTH']
+
+
+application = WSGIBridge(
+    app,
+    max_body_size=max(app.config['MAX_CONTENT_LENGTH'], app.config['STREAM_MAX_CONTENT_LENGTH']),
+    body_limit=flask_body_limit,
+    spool=app.extensions['upload_storage'].spooled_buffer
+)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit('The async server needs uvicorn: pip install -r requirements-asgi.txt')
+
+    port = int(os.environ.get('FLASK_PORT', 5000))
+    uvicorn.run(application, host='0.0.0.0', port=port)
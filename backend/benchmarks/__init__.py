@@ -0,0 +1 @@
+"""Performance benchmarks and reports for the ML engine"""
@@ -0,0 +1,150 @@
+"""
+Size and load time of the model bundle against the pickled artifacts
+
+Trains each cancer type on synthetic data in a scratch folder and reports:
+    size            model + scaler + feature pickles vs the one bundle file
+    load            loading them again in this process (libraries imported)
+    cold load       a fresh interpreter importing what it needs and loading
+    header          reading only the bundle header
+    max |dp|        largest probability difference between the bundled and
+                    the pickled model on held-out rows
+
+Usage (from the backend directory):
+    python -m benchmarks.artifact_format
+    python -m benchmarks.artifact_format --rows 20000 --repeat 20
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.datasets import make_dataset  # noqa: E402
+
+
+# Code timed in a fresh interpreter; prints the seconds taken
+COLD_LOAD_COMMANDS = {
+    'pickle': (
+        "import time; start = time.perf_counter(); import joblib; "
+        "[joblib.load(p) for p in ({model!r}, {scaler!r}, {features!r})]; "
+        "print(time.perf_counter() - start)"
+    ),
+    'bundle': (
+        "import time; start = time.perf_counter(); "
+        "from ml_engine.model_bundle import load_bundle; load_bundle({bundle!r}); "
+        "print(time.perf_counter() - start)"
+    )
+}
+
+
+def best_time(fn, repeat):
+    """Fastest of several calls, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def cold_load_time(kind, paths, repeat):
+    """Fastest fresh-interpreter import and load, in seconds"""
+    code = COLD_LOAD_COMMANDS[kind].format(**paths)
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', code], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return min(times)
+
+
+def benchmark_type(cancer_type, args, work_dir):
+    """Train one model and compare its two artifact formats"""
+    import joblib
+    from ml_engine.train import train_model
+    from ml_engine.model_manager import get_model_paths
+    from ml_engine.model_bundle import load_bundle, read_bundle_header
+
+    data_path = os.path.join(work_dir, f'{cancer_type}.csv')
+    make_dataset(cancer_type, args.rows, seed=0).to_csv(data_path, index=False)
+    paths = get_model_paths(cancer_type, os.path.join(work_dir, 'models'))
+    train_model(cancer_type, data_path, paths['model'], paths['scaler'], force=True)
+
+    pickles = (paths['model'], paths['scaler'], paths['features'])
+    pickle_bytes = sum(os.path.getsize(path) for path in pickles)
+    bundle_bytes = os.path.getsize(paths['bundle'])
+
+    def load_pickles():
+        return [joblib.load(path) for path in pickles]
+
+    model, scaler, feature_names = load_pickles()
+    estimator, bundle_scaler, _, _ = load_bundle(paths['bundle'])
+
+    rows = make_dataset(cancer_type, 2000, seed=1)
+    preprocessor = joblib.load(paths['preprocessor'])
+    X = preprocessor.transform(rows)
+    expected = model.predict_proba(scaler.transform(X))
+    actual = estimator.predict_proba(bundle_scaler.transform(X))
+
+    cold_paths = {
+        'model': paths['model'], 'scaler': paths['scaler'],
+        'features': paths['features'], 'bundle': paths['bundle']
+    }
+    return {
+        'model': type(model).__name__,
+        'pickle_bytes': pickle_bytes,
+        'bundle_bytes': bundle_bytes,
+        'pickle_load': best_time(load_pickles, args.repeat),
+        'bundle_load': best_time(lambda: load_bundle(paths['bundle']), args.repeat),
+        'pickle_cold': cold_load_time('pickle', cold_paths, args.cold_repeat),
+        'bundle_cold': cold_load_time('bundle', cold_paths, args.cold_repeat),
+        'header': best_time(lambda: read_bundle_header(paths['bundle']), args.repeat),
+        'max_proba_diff': float(np.max(np.abs(expected - actual))),
+        'same_predictions': bool(np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--types', default='breast,lung,prostate')
+    parser.add_argument('--rows', type=int, default=5000, help='Training rows per model')
+    parser.add_argument('--repeat', type=int, default=10, help='In-process loads to time')
+    parser.add_argument('--cold-repeat', type=int, default=3, help='Fresh interpreters to time')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    work_dir = tempfile.mkdtemp(prefix='ml_artifacts_')
+    os.environ['DATASET_CACHE_DIR'] = os.path.join(work_dir, 'dataset_cache')
+
+    try:
+        print(
+            f"{'type':<10}{'model':<24}{'pickles':>10}{'bundle':>10}{'load':>16}"
+            f"{'cold load':>18}{'header':>10}{'max |dp|':>11}"
+        )
+        for cancer_type in args.types.split(','):
+            r = benchmark_type(cancer_type, args, work_dir)
+            print(
+                f"{cancer_type:<10}{r['model']:<24}"
+                f"{r['pickle_bytes'] / 1024:>8.0f}kB{r['bundle_bytes'] / 1024:>8.0f}kB"
+                f"{r['pickle_load'] * 1000:>8.2f}/{r['bundle_load'] * 1000:.2f}ms"
+                f"{r['pickle_cold'] * 1000:>10.0f}/{r['bundle_cold'] * 1000:.0f}ms"
+                f"{r['header'] * 1e6:>8.0f}us{r['max_proba_diff']:>11.1e}"
+                + ('' if r['same_predictions'] else '  predictions differ')
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+Concurrent-client throughput of the threaded Flask server and the ASGI mode
+
+Trains a lung model on synthetic data in a scratch folder, then starts each
+server in a subprocess and runs fast single-prediction clients against it,
+alone and next to clients that slow the server down:
+    predict_only     only prediction clients
+    slow_uploads     plus clients trickling batch-prediction uploads
+    with_training    plus a client retraining the model back to back
+
+Reported per server and scenario: prediction requests per second, p50/p99
+latency and errors.
+
+Usage (from the backend directory; the ASGI mode needs requirements-asgi.txt):
+    python -m benchmarks.concurrency
+    python -m benchmarks.concurrency --clients 16 --duration 10 --servers flask,asgi
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.datasets import make_dataset, make_form  # noqa: E402
+
+
+# Code run in the server subprocess, from the scratch folder
+SERVER_COMMANDS = {
+    'flask': (
+        "from app import app; "
+        "app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"
+    ),
+    'asgi': (
+        "import uvicorn; from asgi import application; "
+        "uvicorn.run(application, host='127.0.0.1', port={port}, log_level='warning')"
+    )
+}
+
+SCENARIOS = ['predict_only', 'slow_uploads', 'with_training']
+
+BOUNDARY = 'benchmarkboundary'
+
+
+def free_port():
+    """Get a free TCP port on localhost"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare_workdir(work_dir, train_rows):
+    """Write training data and a trained lung model into the scratch folder"""
+    from ml_engine.train import train_model
+    from ml_engine.model_manager import get_model_paths, save_model_metadata
+
+    data_path = os.path.join(work_dir, 'lung_train.csv')
+    make_dataset('lung', train_rows, seed=0).to_csv(data_path, index=False)
+
+    model_dir = os.path.join(work_dir, 'models')
+    paths = get_model_paths('lung', model_dir)
+    metrics = train_model('lung', data_path, paths['model'], paths['scaler'])
+    save_model_metadata('lung', metrics, model_dir)
+    return data_path
+
+
+def multipart_body(fields, file_bytes, filename):
+    """Encode form fields and one file as multipart/form-data"""
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: text/csv\r\n\r\n'.encode()
+    )
+    parts.append(file_bytes)
+    parts.append(f'\r\n--{BOUNDARY}--\r\n'.encode())
+    return b''.join(parts)
+
+
+def start_server(name, work_dir, port, env):
+    """Start a server subprocess and wait until it answers"""
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); " + SERVER_COMMANDS[name].format(port=port)
+    process = subprocess.Popen(
+        [sys.executable, '-c', code], cwd=work_dir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError(f"{name} server did not start")
+
+
+def predict_client(port, forms, stop, latencies, errors):
+    """Send single predictions back to back on one connection"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    headers = {'Content-Type': 'application/json'}
+    i = 0
+    while not stop.is_set():
+        body = json.dumps(forms[i % len(forms)])
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/api/predict/lung', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+    conn.close()
+
+
+def slow_upload_client(port, body, stop, pieces, pause):
+    """Upload a batch-prediction CSV a few bytes at a time, over and over"""
+    step = max(1, len(body) // pieces)
+    while not stop.is_set():
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            conn.putrequest('POST', '/api/predict-batch/lung')
+            conn.putheader('Content-Type', f'multipart/form-data; boundary={BOUNDARY}')
+            conn.putheader('Content-Length', str(len(body)))
+            conn.endheaders()
+            for offset in range(0, len(body), step):
+                conn.send(body[offset:offset + step])
+                if stop.wait(pause):
+                    break
+            else:
+                conn.getresponse().read()
+            conn.close()
+        except (OSError, http.client.HTTPException):
+            time.sleep(pause)
+
+
+def training_client(port, body, stop):
+    """Retrain the lung model back to back"""
+    while not stop.is_set():
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+            conn.request(
+                'POST', '/api/train/lung', body=body,
+                headers={'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'}
+            )
+            conn.getresponse().read()
+            conn.close()
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.5)
+
+
+def run_scenario(port, scenario, args, forms, upload_body, train_body):
+    """Run one scenario against a running server"""
+    stop = threading.Event()
+    latencies = []
+    errors = []
+    threads = [
+        threading.Thread(target=predict_client, args=(port, forms, stop, latencies, errors))
+        for _ in range(args.clients)
+    ]
+    if scenario == 'slow_uploads':
+        threads += [
+            threading.Thread(target=slow_upload_client, args=(port, upload_body, stop, 50, 0.05))
+            for _ in range(args.slow_clients)
+        ]
+    elif scenario == 'with_training':
+        threads.append(threading.Thread(target=training_client, args=(port, train_body, stop)))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = {'requests_per_sec': len(latencies) / args.duration, 'errors': len(errors)}
+    if latencies:
+        result['p50_ms'] = float(np.percentile(latencies, 50) * 1000)
+        result['p99_ms'] = float(np.percentile(latencies, 99) * 1000)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--servers', default='flask,asgi', help='Comma-separated servers to compare')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent prediction clients')
+    parser.add_argument('--slow-clients', type=int, default=16, help='Concurrent slow uploaders')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per scenario')
+    parser.add_argument('--train-rows', type=int, default=20000, help='Rows in the training dataset')
+    parser.add_argument('--batch-rows', type=int, default=2000, help='Rows in each slow upload')
+    parser.add_argument('--output', default=None, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    work_dir = tempfile.mkdtemp(prefix='ml_concurrency_')
+    env = dict(os.environ, DATASET_CACHE_DIR=os.path.join(work_dir, 'dataset_cache'))
+    os.environ['DATASET_CACHE_DIR'] = env['DATASET_CACHE_DIR']
+
+    results = {}
+    try:
+        data_path = prepare_workdir(work_dir, args.train_rows)
+        rng = np.random.default_rng(0)
+        forms = [make_form('lung', rng) for _ in range(200)]
+        batch_csv = make_dataset('lung', args.batch_rows, seed=1).to_csv(index=False).encode()
+        upload_body = multipart_body({}, batch_csv, 'batch.csv')
+        with open(data_path, 'rb') as f:
+            train_body = multipart_body({'useDefault': 'false', 'force': 'true'}, f.read(), 'train.csv')
+
+        for server in args.servers.split(','):
+            port = free_port()
+            process = start_server(server, work_dir, port, env)
+            try:
+                for scenario in args.scenarios.split(','):
+                    result = run_scenario(port, scenario, args, forms, upload_body, train_body)
+                    results.setdefault(server, {})[scenario] = result
+                    print(
+                        f"{server:>6} {scenario:>14}: {result['requests_per_sec']:8.1f} req/s  "
+                        f"p50 {result.get('p50_ms', float('nan')):7.2f}ms  "
+                        f"p99 {result.get('p99_ms', float('nan')):8.2f}ms  errors {result['errors']}"
+                    )
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
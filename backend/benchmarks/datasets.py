@@ -0,0 +1,111 @@
+"""
+Synthetic datasets matching the breast, lung and prostate training schemas
+
+Each generator returns a DataFrame with the columns the preprocessors and
+get_feature_mapping expect, a target column with both classes, and a
+signal in a few features so the models have something to learn.
+"""
+import numpy as np
+import pandas as pd
+
+
+BREAST_FEATURES = [
+    'radius_mean', 'texture_mean', 'perimeter_mean', 'area_mean', 'smoothness_mean',
+    'compactness_mean', 'concavity_mean', 'concave points_mean', 'symmetry_mean'
+]
+
+LUNG_BINARY_FEATURES = [
+    'SMOKING', 'YELLOW_FINGERS', 'ANXIETY', 'PEER_PRESSURE', 'CHRONIC DISEASE',
+    'FATIGUE ', 'ALLERGY ', 'WHEEZING', 'ALCOHOL CONSUMING', 'COUGHING',
+    'SHORTNESS OF BREATH', 'SWALLOWING DIFFICULTY', 'CHEST PAIN'
+]
+
+PROSTATE_FEATURES = [
+    'age', 'psa', 'psa_density', 'gleason', 'prostate_volume',
+    'dre', 'family_history', 'previous_biopsy'
+]
+
+
+def make_breast(n_rows, seed=0):
+    """Breast cancer rows with an id column and M/B diagnosis"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, len(BREAST_FEATURES)))
+    score = X[:, 0] + 0.5 * X[:, 3] + 0.5 * rng.normal(size=n_rows)
+
+    df = pd.DataFrame(X * 3.0 + 12.0, columns=BREAST_FEATURES)
+    df.insert(0, 'id', np.arange(n_rows))
+    df['diagnosis'] = np.where(score > 0, 'M', 'B')
+    return df
+
+
+def make_lung(n_rows, seed=0):
+    """Lung cancer rows in the survey layout with 1/2 coded symptoms"""
+    rng = np.random.default_rng(seed)
+    symptoms = rng.integers(1, 3, size=(n_rows, len(LUNG_BINARY_FEATURES)))
+    age = rng.integers(30, 85, size=n_rows)
+    score = symptoms[:, 0] + symptoms[:, 9] + (age - 60) / 20.0 + rng.normal(size=n_rows)
+
+    df = pd.DataFrame({'GENDER': rng.choice(['M', 'F'], size=n_rows), 'AGE': age})
+    for i, col in enumerate(LUNG_BINARY_FEATURES):
+        df[col] = symptoms[:, i]
+    df['LUNG_CANCER'] = np.where(score > 3.5, 'YES', 'NO')
+    return df
+
+
+def make_prostate(n_rows, seed=0):
+    """Prostate cancer rows with a 0/1 target"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'age': rng.integers(45, 85, size=n_rows),
+        'psa': rng.lognormal(1.5, 0.8, size=n_rows),
+        'psa_density': rng.lognormal(-2.0, 0.5, size=n_rows),
+        'gleason': rng.integers(6, 11, size=n_rows),
+        'prostate_volume': rng.normal(45.0, 12.0, size=n_rows),
+        'dre': rng.integers(0, 2, size=n_rows),
+        'family_history': rng.integers(0, 2, size=n_rows),
+        'previous_biopsy': rng.integers(0, 2, size=n_rows)
+    })
+    score = np.log(df['psa']) + 0.5 * (df['gleason'] - 8) + rng.normal(size=n_rows)
+    df['target'] = (score > 1.5).astype(int)
+    return df
+
+
+DATASET_GENERATORS = {
+    'breast': make_breast,
+    'lung': make_lung,
+    'prostate': make_prostate
+}
+
+# Form payloads for single predictions, as the frontend sends them
+FORM_GENERATORS = {
+    'breast': lambda rng: {
+        field: f"{rng.normal(12.0, 3.0):.4f}"
+        for field in ['radiusMean', 'textureMean', 'perimeterMean', 'areaMean', 'smoothnessMean',
+                      'compactnessMean', 'concavityMean', 'concavePointsMean', 'symmetryMean']
+    },
+    'lung': lambda rng: {
+        'GENDER': str(rng.choice(['M', 'F'])),
+        'AGE': str(int(rng.integers(30, 85))),
+        **{col.strip(): str(rng.choice(['yes', 'no'])) for col in LUNG_BINARY_FEATURES}
+    },
+    'prostate': lambda rng: {
+        'age': str(int(rng.integers(45, 85))),
+        'psa': f"{rng.lognormal(1.5, 0.8):.3f}",
+        'psaDensity': f"{rng.lognormal(-2.0, 0.5):.3f}",
+        'gleason': str(int(rng.integers(6, 11))),
+        'prostatevolume': f"{rng.normal(45.0, 12.0):.1f}",
+        'dre': str(rng.choice(['yes', 'no'])),
+        'familyHistory': str(rng.choice(['yes', 'no'])),
+        'previousBiopsy': str(rng.choice(['yes', 'no']))
+    }
+}
+
+
+def make_dataset(cancer_type, n_rows, seed=0):
+    """Generate a synthetic dataset for a cancer type"""
+    return DATASET_GENERATORS[cancer_type](n_rows, seed)
+
+
+def make_form(cancer_type, rng):
+    """Generate one single-prediction form payload"""
+    return FORM_GENERATORS[cancer_type](rng)
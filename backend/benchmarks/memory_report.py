@@ -0,0 +1,89 @@
+"""
+Per-worker memory report for loading model artifacts
+
+Starts several worker processes that each load the artifacts of one trained
+model, with and without memory-mapping, and reports the resident (RSS) and
+proportional (PSS) set size each worker gained. PSS divides shared pages
+between the processes mapping them, so it shows what sharing saves.
+
+Usage (from the backend directory, Linux only):
+    python -m benchmarks.memory_report --cancer-type breast --workers 4
+"""
+import os
+import sys
+import argparse
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def read_memory_kb():
+    """Get (rss, pss) of the current process in kB from /proc"""
+    values = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values['Rss'], values['Pss']
+
+
+def _worker(mmap_mode, cancer_type, base_path, loaded, measured, results):
+    """Load one model, then measure while every worker holds its copy"""
+    os.environ['MODEL_MMAP_MODE'] = mmap_mode or 'none'
+    from ml_engine.model_manager import get_model_paths
+    from ml_engine.predict import predict_single
+    # Import the estimator modules first so only the artifacts are measured
+    import sklearn.svm  # noqa: F401
+    import sklearn.ensemble  # noqa: F401
+
+    before = read_memory_kb()
+    paths = get_model_paths(cancer_type, base_path)
+    # A prediction touches the model arrays so mapped pages are faulted in
+    predict_single(cancer_type, {}, paths['model'], paths['scaler'])
+
+    loaded.wait()
+    after = read_memory_kb()
+    results.put((after[0] - before[0], after[1] - before[1]))
+    measured.wait()
+
+
+def measure(mmap_mode, cancer_type, base_path, workers):
+    """Run the workers for one mmap mode and return per-worker deltas"""
+    ctx = multiprocessing.get_context('spawn')
+    loaded = ctx.Barrier(workers)
+    measured = ctx.Barrier(workers)
+    results = ctx.Queue()
+
+    processes = [
+        ctx.Process(target=_worker, args=(mmap_mode, cancer_type, base_path, loaded, measured, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    deltas = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    return np.array(deltas, dtype=np.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cancer-type', default='breast')
+    parser.add_argument('--models', default='./models', help='Folder with trained artifacts')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.cancer_type} model, {args.workers} workers, memory gained per worker:")
+    print(f"{'mode':<12}{'RSS (MB)':>12}{'PSS (MB)':>12}{'total PSS (MB)':>18}")
+    for label, mode in [('unmapped', None), ('mmap c', 'c')]:
+        deltas = measure(mode, args.cancer_type, args.models, args.workers) / 1024.0
+        rss, pss = deltas.mean(axis=0)
+        print(f"{label:<12}{rss:>12.1f}{pss:>12.1f}{deltas[:, 1].sum():>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
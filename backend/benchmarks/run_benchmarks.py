@@ -0,0 +1,252 @@
+"""
+Benchmark suite for training, single prediction and batch throughput
+
+For each cancer type and dataset size this generates a synthetic dataset
+matching the training schema, then measures:
+    train_seconds         wall-clock time of train_model
+    predict_p50_ms/p99_ms latency of predict_single on generated form payloads
+    batch_rows_per_sec    throughput of predict_batch on the whole CSV
+    stream_rows_per_sec   throughput of the chunked batch path
+
+Results are written to a JSON file and compared against a stored baseline;
+the exit code is 1 when any metric regressed by more than the tolerance.
+
+Usage (from the backend directory):
+    python -m benchmarks.run_benchmarks --sizes 1k,10k
+    python -m benchmarks.run_benchmarks --sizes 1k,10k --save-baseline
+    python -m benchmarks.run_benchmarks --sizes 1k,100k,1M,10M --types lung,prostate
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import warnings
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep the dataset cache for this run out of the working directory
+_work_dir = tempfile.mkdtemp(prefix='ml_bench_')
+os.environ.setdefault('DATASET_CACHE_DIR', os.path.join(_work_dir, 'dataset_cache'))
+
+import sklearn  # noqa: E402
+from ml_engine.train import train_model  # noqa: E402
+from ml_engine.predict import predict_single, predict_batch, predict_batch_chunks  # noqa: E402
+from ml_engine.model_manager import get_model_paths  # noqa: E402
+from ml_engine.model_cache import clear_model_cache  # noqa: E402
+from benchmarks.datasets import make_dataset, make_form  # noqa: E402
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+CANCER_TYPES = ['breast', 'lung', 'prostate']
+
+# SVC training is quadratic in the row count, so large sizes train on a prefix
+TRAIN_ROW_LIMITS = {
+    'breast': 20000,
+    'lung': 1000000,
+    'prostate': 1000000
+}
+
+# Whether a higher value of each metric is better
+METRIC_DIRECTIONS = {
+    'train_seconds': 'lower',
+    'predict_p50_ms': 'lower',
+    'predict_p99_ms': 'lower',
+    'batch_rows_per_sec': 'higher',
+    'stream_rows_per_sec': 'higher'
+}
+
+# Rows generated per block when writing large CSVs
+WRITE_CHUNK_ROWS = 1000000
+
+
+def parse_size(text):
+    """Parse sizes like '1000', '10k' or '10M'"""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    if multiplier > 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def write_dataset_csv(cancer_type, n_rows, path, seed=0):
+    """Write a synthetic dataset to CSV in blocks so memory stays bounded"""
+    written = 0
+    block = 0
+    while written < n_rows:
+        rows = min(WRITE_CHUNK_ROWS, n_rows - written)
+        df = make_dataset(cancer_type, rows, seed=seed + block)
+        df.to_csv(path, index=False, header=(written == 0), mode='w' if written == 0 else 'a')
+        written += rows
+        block += 1
+    return path
+
+
+def benchmark_type(cancer_type, n_rows, args):
+    """Run every benchmark for one cancer type and dataset size"""
+    data_dir = os.path.join(_work_dir, f'{cancer_type}_{n_rows}')
+    os.makedirs(data_dir, exist_ok=True)
+    model_dir = os.path.join(data_dir, 'models')
+    paths = get_model_paths(cancer_type, model_dir)
+
+    data_path = write_dataset_csv(cancer_type, n_rows, os.path.join(data_dir, 'data.csv'))
+    train_rows = min(n_rows, args.max_train_rows or TRAIN_ROW_LIMITS[cancer_type])
+    train_path = data_path
+    if train_rows < n_rows:
+        train_path = write_dataset_csv(cancer_type, train_rows, os.path.join(data_dir, 'train.csv'))
+
+    result = {'rows': n_rows, 'train_rows': train_rows}
+
+    start = time.perf_counter()
+    train_model(cancer_type, train_path, paths['model'], paths['scaler'])
+    result['train_seconds'] = time.perf_counter() - start
+    clear_model_cache(cancer_type)
+
+    # Single predictions, after one warm-up call that loads the model
+    rng = np.random.default_rng(args.seed)
+    forms = [make_form(cancer_type, rng) for _ in range(args.predict_calls)]
+    predict_single(cancer_type, forms[0], paths['model'], paths['scaler'])
+    latencies = []
+    for form in forms:
+        start = time.perf_counter()
+        predict_single(cancer_type, form, paths['model'], paths['scaler'])
+        latencies.append(time.perf_counter() - start)
+    result['predict_p50_ms'] = float(np.percentile(latencies, 50) * 1000)
+    result['predict_p99_ms'] = float(np.percentile(latencies, 99) * 1000)
+
+    # The whole-file batch path holds everything in memory, so cap it
+    if n_rows <= args.max_batch_rows:
+        start = time.perf_counter()
+        predict_batch(cancer_type, data_path, paths['model'], paths['scaler'])
+        result['batch_rows_per_sec'] = n_rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in predict_batch_chunks(cancer_type, data_path, paths['model'], paths['scaler']):
+        pass
+    result['stream_rows_per_sec'] = n_rows / (time.perf_counter() - start)
+
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return result
+
+
+def git_commit():
+    """Commit hash of the checked-out code, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Find metrics that got worse than the baseline by more than tolerance
+
+    Returns:
+        List of human-readable regression descriptions
+    """
+    regressions = []
+    for cancer_type, sizes in results['results'].items():
+        for size, metrics in sizes.items():
+            base = baseline.get('results', {}).get(cancer_type, {}).get(size)
+            if not base:
+                continue
+            for metric, direction in METRIC_DIRECTIONS.items():
+                if metric not in metrics or not base.get(metric):
+                    continue
+                ratio = metrics[metric] / base[metric]
+                worse = ratio > 1 + tolerance if direction == 'lower' else ratio < 1 - tolerance
+                if worse:
+                    regressions.append(
+                        f"{cancer_type} {size} rows {metric}: {base[metric]:.4g} -> {metrics[metric]:.4g} "
+                        f"({(ratio - 1) * 100:+.1f}%)"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--types', default=','.join(CANCER_TYPES), help='Comma-separated cancer types')
+    parser.add_argument('--sizes', default='1k,10k', help='Comma-separated row counts, e.g. 1k,100k,10M')
+    parser.add_argument('--predict-calls', type=int, default=200, help='Single predictions timed per case')
+    parser.add_argument('--max-train-rows', type=int, default=None, help='Override per-type training row limits')
+    parser.add_argument('--max-batch-rows', type=int, default=1000000, help='Largest size timed with predict_batch')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results.json'))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    results = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'commit': git_commit()
+        },
+        'results': {}
+    }
+
+    try:
+        for cancer_type in args.types.split(','):
+            for n_rows in (parse_size(size) for size in args.sizes.split(',')):
+                print(f"{cancer_type:>8} {n_rows:>10} rows ...", end=' ', flush=True)
+                result = benchmark_type(cancer_type, n_rows, args)
+                results['results'].setdefault(cancer_type, {})[str(n_rows)] = result
+                print(
+                    f"train {result['train_seconds']:.2f}s  "
+                    f"p50 {result['predict_p50_ms']:.2f}ms  p99 {result['predict_p99_ms']:.2f}ms  "
+                    f"batch {result.get('batch_rows_per_sec', float('nan')):,.0f} rows/s  "
+                    f"stream {result['stream_rows_per_sec']:,.0f} rows/s"
+                )
+    finally:
+        shutil.rmtree(_work_dir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    base_meta = baseline.get('meta', {})
+    print(f"Baseline from commit {base_meta.get('commit') or 'unknown'} on {base_meta.get('cpu_count')} CPUs")
+    if base_meta.get('cpu_count') != results['meta']['cpu_count']:
+        print(f"  this machine has {results['meta']['cpu_count']} CPUs; timings are not directly comparable")
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Time from server launch to its first health, readiness and prediction responses
+
+Trains a lung model in a scratch folder, then launches the API server there
+repeatedly and polls it, recording for each launch:
+    health_seconds   first 200 from /api/health (liveness)
+    ready_seconds    first 200 from /api/ready, when the server has it
+    predict_seconds  first 200 from /api/predict/lung
+
+Usage (from the backend directory):
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --runs 5 --server asgi
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import http.client
+import warnings
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.concurrency import SERVER_COMMANDS, free_port, prepare_workdir  # noqa: E402
+from benchmarks.datasets import make_form  # noqa: E402
+
+
+# Seconds between polls and before giving up on a launch
+POLL_INTERVAL = 0.005
+LAUNCH_TIMEOUT = 120
+
+
+def _status(port, method, path, body=None):
+    """Status code of one request, or None if the server is not answering"""
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        headers = {'Content-Type': 'application/json'} if body else {}
+        conn.request(method, path, body=body, headers=headers)
+        status = conn.getresponse().status
+        conn.close()
+        return status
+    except OSError:
+        return None
+
+
+def measure_launch(server, work_dir, env, form):
+    """Launch a server once and time its first successful responses"""
+    port = free_port()
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r}); " + SERVER_COMMANDS[server].format(port=port)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', code], cwd=work_dir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    result = {}
+    try:
+        # Liveness first, then readiness, then a real prediction
+        checks = [
+            ('health_seconds', 'GET', '/api/health', None),
+            ('ready_seconds', 'GET', '/api/ready', None),
+            ('predict_seconds', 'POST', '/api/predict/lung', json.dumps(form))
+        ]
+        for name, method, path, body in checks:
+            while time.perf_counter() - start < LAUNCH_TIMEOUT:
+                if process.poll() is not None:
+                    raise RuntimeError(f"{server} server exited with code {process.returncode}")
+                status = _status(port, method, path, body)
+                if status == 200:
+                    result[name] = time.perf_counter() - start
+                    break
+                # Servers without a readiness endpoint are ready when they answer
+                if status == 404 and path == '/api/ready':
+                    break
+                time.sleep(POLL_INTERVAL)
+            else:
+                raise RuntimeError(f"No 200 from {path} within {LAUNCH_TIMEOUT}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', default='flask', choices=sorted(SERVER_COMMANDS))
+    parser.add_argument('--runs', type=int, default=5, help='Launches to time')
+    parser.add_argument('--output', default=None, help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    work_dir = tempfile.mkdtemp(prefix='ml_startup_')
+    env = dict(os.environ, DATASET_CACHE_DIR=os.path.join(work_dir, 'dataset_cache'))
+    os.environ['DATASET_CACHE_DIR'] = env['DATASET_CACHE_DIR']
+
+    try:
+        prepare_workdir(work_dir, 2000)
+        form = make_form('lung', np.random.default_rng(0))
+        runs = [measure_launch(args.server, work_dir, env, form) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    summary = {}
+    for name in ('health_seconds', 'ready_seconds', 'predict_seconds'):
+        values = [run[name] for run in runs if name in run]
+        if values:
+            summary[name] = {'median': float(np.median(values)), 'min': float(np.min(values))}
+            print(f"{name:>16}: median {summary[name]['median']:.3f}s  min {summary[name]['min']:.3f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'server': args.server, 'runs': runs, 'summary': summary}, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Benchmark of breast SVC inference: sklearn versus the single-pass engine
+
+The current code calls SVC.predict and SVC.predict_proba, evaluating the
+RBF kernel twice. The compiled engine evaluates it once and derives the
+class from the probabilities. Reports time per call for several batch
+sizes, the largest probability difference, and how often sklearn's predict
+disagrees with its own predict_proba.
+
+Usage (from the backend directory):
+    python -m benchmarks.svc_inference --models ./models
+"""
+import os
+import sys
+import time
+import argparse
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_engine.model_manager import get_model_paths  # noqa: E402
+from ml_engine.svc_engine import CompiledSVC  # noqa: E402
+
+
+def time_call(fn, repeat):
+    """Mean seconds per call after one warm-up call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', default='./models', help='Folder with trained artifacts')
+    parser.add_argument('--sizes', default='1,64,1024,10000', help='Comma-separated batch sizes')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    paths = get_model_paths('breast', args.models)
+    model = joblib.load(paths['model'])
+    engine = CompiledSVC(model)
+    rng = np.random.default_rng(0)
+
+    print(f"SVC with {len(model.support_vectors_)} support vectors, {model.n_features_in_} features")
+    print(f"{'rows':>8}{'sklearn (ms)':>16}{'engine (ms)':>14}{'speedup':>10}{'max |dp|':>12}{'disagree':>10}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        X = rng.normal(size=(size, model.n_features_in_))
+        repeat = max(1, args.repeat if size <= 1024 else args.repeat // 10)
+
+        sklearn_time = time_call(lambda: (model.predict(X), model.predict_proba(X)), repeat)
+        engine_time = time_call(lambda: engine.predict_with_proba(X), repeat)
+
+        proba = model.predict_proba(X)
+        max_diff = np.abs(proba - engine.predict_proba(X)).max()
+        disagree = int((model.predict(X) != model.classes_[proba.argmax(axis=1)]).sum())
+
+        print(f"{size:>8}{sklearn_time * 1e3:>16.3f}{engine_time * 1e3:>14.3f}"
+              f"{sklearn_time / engine_time:>9.1f}x{max_diff:>12.1e}{disagree:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Micro-batching for concurrent single predictions
+
+Requests for the same model that arrive within a short window are stacked
+into one matrix, scaled and scored with a single estimator call, and each
+caller gets back its own row of the result.
+"""
+import threading
+import numpy as np
+
+from .model_cache import get_cached_artifacts
+from .inference import get_inference_plan
+from .predict import get_feature_mapping, format_prediction, predict_single
+from .result_cache import result_key, get_cached_result, store_result
+from .instrumentation import StageTimer
+
+
+class _PendingBatch:
+    """Rows collected for one estimator call"""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.vectors = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class PredictionCoalescer:
+    """Groups concurrent predict_single calls into vectorized model calls"""
+
+    def __init__(self, window_ms=2.0, max_batch=64):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'max_batch_seen': 0
+        }
+
+    def predict(self, cancer_type, form_data, model_path, scaler_path):
+        """
+        Make a single prediction, sharing the model call with concurrent requests
+
+        Takes the same arguments and returns the same dictionary as predict_single.
+        """
+        entry = get_cached_artifacts(cancer_type, model_path, scaler_path)
+        plan = get_inference_plan(entry)
+        if plan is None:
+            return predict_single(cancer_type, form_data, model_path, scaler_path)
+
+        # Input errors are raised in the caller's own thread
+        feature_mapping = get_feature_mapping(cancer_type, form_data, entry['feature_names'])
+        vector = plan.build_vector(feature_mapping)
+
+        # Repeated inputs are answered from the result cache without joining a batch
+        cache_key = result_key(cancer_type, entry, vector)
+        cached = get_cached_result(cache_key)
+        if cached is not None:
+            return cached
+
+        key = (cancer_type.lower(), model_path, entry['stamp'])
+        with self._lock:
+            batch = self._pending.get(key)
+            is_leader = batch is None
+            if is_leader:
+                batch = _PendingBatch(plan)
+                self._pending[key] = batch
+            index = len(batch.vectors)
+            batch.vectors.append(vector)
+            if len(batch.vectors) >= self.max_batch:
+                # Later requests start a new batch
+                del self._pending[key]
+                batch.full.set()
+
+        if is_leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(key) is batch:
+                    del self._pending[key]
+            self._run_batch(cancer_type, batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        store_result(cache_key, batch.results[index])
+        return batch.results[index]
+
+    def _run_batch(self, cancer_type, batch):
+        """Score every collected row with one scaler and model call"""
+        try:
+            with StageTimer('predict_coalesced_batch', cancer_type) as timer:
+                plan = batch.plan
+                X_scaled = plan.scale_matrix(np.vstack(batch.vectors))
+                timer.lap('scale')
+                predictions, probabilities = plan.score(X_scaled)
+                timer.lap('evaluate')
+                batch.results = [
+                    format_prediction(cancer_type, plan.model, prediction, proba, plan.n_features)
+                    for prediction, proba in zip(predictions, probabilities)
+                ]
+                timer.lap('format')
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self._stats['requests'] += len(batch.vectors)
+                self._stats['batches'] += 1
+                self._stats['max_batch_seen'] = max(self._stats['max_batch_seen'], len(batch.vectors))
+            batch.done.set()
+
+    def get_stats(self):
+        """Get request and batch counters"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_batch_size'] = stats['requests'] / stats['batches'] if stats['batches'] else 0.0
+        stats['window_ms'] = self.window * 1000.0
+        stats['max_batch'] = self.max_batch
+        return stats
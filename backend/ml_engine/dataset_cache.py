@@ -0,0 +1,213 @@
+"""
+Binary columnar cache for training datasets
+
+Each CSV is parsed once and stored as a Feather file (or a pandas pickle
+when pyarrow is not installed) together with the schema it was parsed
+with, keyed on its content hash, the parse options and the pandas version
+that parsed it. Later loads of the same content read the binary copy
+instead of re-parsing the text. The cache is evicted least recently used
+first once it grows past its size limit.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+DATASET_CACHE_DIR = os.environ.get('DATASET_CACHE_DIR', './cache/datasets')
+DATASET_CACHE_MAX_BYTES = int(os.environ.get('DATASET_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+
+SCHEMA_FILENAME = 'schema.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Bump when the layout of an entry or the way a CSV is parsed changes
+CACHE_FORMAT_VERSION = 2
+
+# Options every cached CSV is parsed with
+READ_CSV_OPTIONS = {}
+
+# (path, mtime_ns, size) -> content hash, so unchanged files are not rehashed
+_hash_memo = {}
+_lock = threading.Lock()
+
+
+def hash_file(file_path):
+    """Get the SHA-256 hex digest of a file's contents"""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _hash_memo.get(memo_key)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    with _lock:
+        _hash_memo[memo_key] = digest
+    return digest
+
+
+def forget_file_hash(file_path):
+    """Drop the remembered content hashes of a file, e.g. once it is deleted"""
+    path = os.path.abspath(file_path)
+    with _lock:
+        for memo_key in [memo_key for memo_key in _hash_memo if memo_key[0] == path]:
+            del _hash_memo[memo_key]
+
+
+def _entry_key(digest):
+    """Cache key of a CSV, so frames parsed under other pandas dtype rules are not reused"""
+    payload = json.dumps({
+        'version': CACHE_FORMAT_VERSION,
+        'source': digest,
+        'pandas': pd.__version__,
+        'read_options': READ_CSV_OPTIONS
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _entry_size(entry_dir):
+    """Total size in bytes of the files in a cache entry"""
+    total = 0
+    for name in os.listdir(entry_dir):
+        try:
+            total += os.path.getsize(os.path.join(entry_dir, name))
+        except OSError:
+            pass
+    return total
+
+
+def _write_entry(entry_dir, df, digest):
+    """Write the binary copy and its schema, replacing the entry atomically"""
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}_{threading.get_ident()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    data_format = 'pickle'
+    if HAS_PYARROW:
+        try:
+            df.to_feather(os.path.join(tmp_dir, 'data.feather'))
+            data_format = 'feather'
+        except Exception:
+            # Mixed-type object columns cannot be stored in Arrow
+            pass
+    if data_format == 'pickle':
+        df.to_pickle(os.path.join(tmp_dir, 'data.pkl'))
+
+    schema = {
+        'source_hash': digest,
+        'pandas_version': pd.__version__,
+        'format': data_format,
+        'rows': len(df),
+        'columns': list(df.columns),
+        'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
+        'created_at': datetime.now().isoformat()
+    }
+    with open(os.path.join(tmp_dir, SCHEMA_FILENAME), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same content first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _read_entry(entry_dir):
+    """Read a cached DataFrame, or None if the entry is missing or unreadable"""
+    schema_path = os.path.join(entry_dir, SCHEMA_FILENAME)
+    try:
+        with open(schema_path, 'r') as f:
+            schema = json.load(f)
+        if schema['format'] == 'feather':
+            df = pd.read_feather(os.path.join(entry_dir, 'data.feather'))
+        else:
+            df = pd.read_pickle(os.path.join(entry_dir, 'data.pkl'))
+    except Exception:
+        return None
+
+    if list(df.columns) != schema['columns']:
+        return None
+
+    # Mark as recently used for eviction
+    os.utime(schema_path)
+    return df
+
+
+def evict_dataset_cache(cache_dir=None, max_bytes=None):
+    """
+    Remove least recently used entries until the cache fits its size limit
+
+    Returns:
+        Number of entries removed
+    """
+    cache_dir = cache_dir or DATASET_CACHE_DIR
+    max_bytes = DATASET_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        schema_path = os.path.join(entry_dir, SCHEMA_FILENAME)
+        if not os.path.exists(schema_path):
+            continue
+        entries.append((os.path.getmtime(schema_path), _entry_size(entry_dir), entry_dir))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, entry_dir in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def load_cached_csv(file_path, cache_dir=None):
+    """
+    Load a CSV through the binary cache
+
+    Args:
+        file_path: Path to the CSV file
+        cache_dir: Cache folder, defaults to DATASET_CACHE_DIR
+
+    Returns:
+        DataFrame with the same columns and dtypes as pd.read_csv
+    """
+    cache_dir = cache_dir or DATASET_CACHE_DIR
+    digest = hash_file(file_path)
+    entry_dir = os.path.join(cache_dir, _entry_key(digest))
+
+    df = _read_entry(entry_dir)
+    if df is not None:
+        return df
+
+    df = pd.read_csv(file_path, **READ_CSV_OPTIONS)
+    try:
+        # Drop a partial or unreadable entry before storing a fresh one
+        if os.path.isdir(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        os.makedirs(cache_dir, exist_ok=True)
+        _write_entry(entry_dir, df, digest)
+        evict_dataset_cache(cache_dir)
+    except OSError:
+        # A read-only or full cache folder only costs the speedup
+        pass
+
+    return df
@@ -0,0 +1,108 @@
+"""
+Flat-array evaluator for trained RandomForestClassifier models
+
+The trees of a fitted forest are compiled into flat NumPy arrays (feature,
+threshold, children, leaf probabilities) and every tree is walked one level
+at a time for all rows at once. This skips sklearn's per-call input checks,
+joblib dispatch and per-tree Python loop, and reproduces predict_proba
+exactly: inputs are compared in float32 as sklearn does, and tree
+probabilities are summed in the same order before dividing by the tree count.
+"""
+import numpy as np
+
+
+class CompiledForest:
+    """RandomForestClassifier compiled to flat node arrays"""
+
+    def __init__(self, forest):
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        counts = np.array([tree.node_count for tree in trees], dtype=np.intp)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        self.classes_ = forest.classes_
+        self.n_classes = int(forest.n_classes_)
+        self.n_trees = len(trees)
+        self.n_features_in_ = forest.n_features_in_
+        self.max_depth = max(tree.max_depth for tree in trees)
+        self.roots = offsets
+
+        features, thresholds, lefts, rights, missing_left, values = [], [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            left = tree.children_left.astype(np.intp)
+            right = tree.children_right.astype(np.intp)
+            is_leaf = left == -1
+            node_ids = np.arange(tree.node_count, dtype=np.intp)
+
+            # Leaves point at themselves so extra levels leave them in place
+            lefts.append(np.where(is_leaf, node_ids, left) + offset)
+            rights.append(np.where(is_leaf, node_ids, right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+            thresholds.append(tree.threshold.astype(np.float64))
+
+            nodes = tree.__getstate__()['nodes']
+            if 'missing_go_to_left' in nodes.dtype.names:
+                missing_left.append(nodes['missing_go_to_left'].astype(bool))
+            else:
+                missing_left.append(np.zeros(tree.node_count, dtype=bool))
+
+            values.append(tree.value[:, 0, :self.n_classes].astype(np.float64))
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.missing_left = np.concatenate(missing_left)
+        self.value = np.concatenate(values)
+
+    @staticmethod
+    def supports(model):
+        """Check whether a model can be compiled"""
+        return type(model).__name__ == 'RandomForestClassifier' and hasattr(model, 'estimators_')
+
+    def apply(self, X):
+        """Get the leaf node index reached in every tree, shape (n_samples, n_trees)"""
+        # Trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1]} features, but the forest expects {self.n_features_in_}"
+            )
+        if np.isinf(X).any():
+            raise ValueError("Input contains infinity or a value too large for dtype('float32').")
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_trees)).copy()
+        has_missing = np.isnan(X).any()
+
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                missing = np.isnan(values)
+                go_left[missing] = self.missing_left[nodes[missing]]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities averaged over trees, as RandomForestClassifier.predict_proba"""
+        leaves = self.apply(X)
+        leaf_proba = self.value[leaves]
+
+        proba = np.zeros((leaves.shape[0], self.n_classes), dtype=np.float64)
+        for t in range(self.n_trees):
+            proba += leaf_proba[:, t]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """Predicted classes, as RandomForestClassifier.predict"""
+        return self.predict_with_proba(X)[0]
+
+    def predict_with_proba(self, X):
+        """Predicted classes and probabilities from a single walk of the trees"""
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0), proba
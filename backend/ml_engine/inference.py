@@ -0,0 +1,156 @@
+"""
+Precompiled inference plans for fast single-row predictions
+
+A plan is built once per loaded model and turns a feature mapping into a
+float64 vector in training column order, applies the fitted StandardScaler
+parameters as one array operation and calls the estimator directly,
+skipping the per-request DataFrame construction.
+
+The estimator call can go through an alternative inference engine chosen
+per cancer type, such as the flat-array forest evaluator or the single-pass
+SVC evaluator.
+"""
+import threading
+import numpy as np
+
+from .forest_engine import CompiledForest
+from .svc_engine import CompiledSVC
+from .model_cache import clear_model_cache
+from .result_cache import clear_result_cache
+
+
+# Engines that can replace the sklearn estimator call, by name
+ENGINES = {
+    'flat_forest': CompiledForest,
+    'fast_svc': CompiledSVC
+}
+
+# Engine used when none was selected for a cancer type
+DEFAULT_ENGINES = {
+    'breast': 'fast_svc'
+}
+
+# Selected engine per cancer type; unlisted types use their default or 'sklearn'
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def set_inference_engine(cancer_type, engine):
+    """Select the inference engine ('sklearn' or a key of ENGINES) for a cancer type"""
+    if engine != 'sklearn' and engine not in ENGINES:
+        raise ValueError(f"Unknown inference engine: {engine}")
+    with _engines_lock:
+        _engines[cancer_type.lower()] = engine
+    # Plans are built per cache entry, so drop the old one and its results
+    clear_model_cache(cancer_type)
+    clear_result_cache(cancer_type)
+
+
+def get_inference_engine(cancer_type):
+    """Get the inference engine selected for a cancer type"""
+    with _engines_lock:
+        engine = _engines.get(cancer_type.lower())
+    return engine or DEFAULT_ENGINES.get(cancer_type.lower(), 'sklearn')
+
+
+def configure_inference_engines(spec):
+    """Select engines from a 'lung:flat_forest,prostate:flat_forest' string"""
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        cancer_type, _, engine = item.partition(':')
+        set_inference_engine(cancer_type.strip(), engine.strip())
+
+
+def build_estimator(model, engine):
+    """Get the object whose predict/predict_proba serve a model"""
+    engine_class = ENGINES.get(engine)
+    if engine_class is not None and engine_class.supports(model):
+        return engine_class(model)
+    return model
+
+
+def score_estimator(estimator, X_scaled):
+    """Get predicted classes and class probabilities for scaled rows"""
+    if hasattr(estimator, 'predict_with_proba'):
+        return estimator.predict_with_proba(X_scaled)
+    predictions = estimator.predict(X_scaled)
+    probabilities = estimator.predict_proba(X_scaled)
+    return predictions, probabilities
+
+
+def scale_features(scaler, X):
+    """Apply a fitted StandardScaler to a 2D float64 matrix without validation passes"""
+    if scaler.with_mean:
+        X = X - scaler.mean_
+    if scaler.with_std:
+        X = X / scaler.scale_
+    return X
+
+
+class InferencePlan:
+    """Column layout and folded scaler parameters for one trained model"""
+
+    def __init__(self, model, scaler, feature_names, engine='sklearn'):
+        self.model = model
+        self.engine = engine
+        self.estimator = build_estimator(model, engine)
+        self.feature_names = list(feature_names)
+        self.feature_index = {name: i for i, name in enumerate(self.feature_names)}
+        self.n_features = len(self.feature_names)
+
+        # Same arithmetic as StandardScaler.transform: (x - mean_) / scale_
+        self.mean = scaler.mean_ if scaler.with_mean else None
+        self.scale = scaler.scale_ if scaler.with_std else None
+
+        # Missing features default to 0, as in the DataFrame path
+        self._template = np.zeros(self.n_features, dtype=np.float64)
+
+    def build_vector(self, feature_mapping):
+        """Place mapped feature values into a vector in training column order"""
+        x = self._template.copy()
+        index = self.feature_index
+        for name, value in feature_mapping.items():
+            i = index.get(name)
+            if i is not None:
+                x[i] = value
+        return x
+
+    def scale_matrix(self, X):
+        """Apply the fitted scaler parameters to a 2D float64 matrix"""
+        if self.mean is not None:
+            X = X - self.mean
+        if self.scale is not None:
+            X = X / self.scale
+        return X
+
+    def score(self, X_scaled):
+        """Run the estimator on already scaled rows"""
+        return score_estimator(self.estimator, X_scaled)
+
+
+def is_plan_compatible(scaler, feature_names):
+    """Check whether a plan can stand in for the DataFrame path"""
+    if not feature_names:
+        return False
+    if getattr(scaler, 'n_features_in_', None) != len(feature_names):
+        return False
+    return hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_')
+
+
+def get_inference_plan(entry):
+    """
+    Get the inference plan for a model cache entry, building it on first use
+
+    Returns:
+        InferencePlan, or None if the artifacts need the DataFrame path
+    """
+    if 'plan' not in entry:
+        plan = None
+        if is_plan_compatible(entry['scaler'], entry['feature_names']):
+            plan = InferencePlan(
+                entry['model'],
+                entry['scaler'],
+                entry['feature_names'],
+                engine=get_inference_engine(entry['cancer_type'])
+            )
+        entry['plan'] = plan
+    return entry['plan']
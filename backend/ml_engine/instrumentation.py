@@ -0,0 +1,228 @@
+"""
+Per-stage latency histograms and counters for the ML paths
+
+predict_single, predict_batch and train_model record how long each stage
+takes (artifact loading, feature mapping, scaling, model evaluation, ...)
+into fixed-bucket histograms per cancer type, along with operation and
+error counts. Everything is rendered in the Prometheus text format for the
+/api/metrics endpoint.
+
+Recording a stage is a perf_counter call plus a bisect and a few additions
+under a lock, so it can stay on in production.
+"""
+import time
+import threading
+from bisect import bisect_left
+
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond predictions to long trainings
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0
+)
+
+# Cancer types used as label values; anything else is reported as 'other'
+KNOWN_CANCER_TYPES = {'breast', 'lung', 'prostate'}
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+# Label tuples per (operation, cancer type, stage), built once
+_stage_labels = {}
+
+
+class _Histogram:
+    """Bucket counts, sum and count of observed durations"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+def _cancer_label(cancer_type):
+    """Bound label cardinality, cancer types come from request URLs"""
+    label = str(cancer_type).lower()
+    return label if label in KNOWN_CANCER_TYPES else 'other'
+
+
+def observe(name, labels, seconds):
+    """Record one duration into the histogram for a metric name and label tuple"""
+    key = (name, labels)
+    index = bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        histogram.counts[index] += 1
+        histogram.sum += seconds
+        histogram.count += 1
+
+
+def increment(name, labels, amount=1):
+    """Add to the counter for a metric name and label tuple"""
+    key = (name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe_stage(operation, cancer_type, stage, seconds):
+    """Record the duration of one stage of an ML operation"""
+    key = (operation, _cancer_label(cancer_type), stage)
+    labels = _stage_labels.get(key)
+    if labels is None:
+        labels = _stage_labels[key] = (('operation', key[0]), ('cancer_type', key[1]), ('stage', key[2]))
+    observe('ml_stage_duration_seconds', labels, seconds)
+
+
+def record_operation(operation, cancer_type, stage_seconds=None, failed=False):
+    """
+    Record a finished ML operation
+
+    Args:
+        operation: Operation name, e.g. 'train_model'
+        cancer_type: Type of cancer
+        stage_seconds: Optional dictionary of stage name -> seconds
+        failed: Whether the operation raised
+    """
+    for stage, seconds in (stage_seconds or {}).items():
+        observe_stage(operation, cancer_type, stage, seconds)
+
+    labels = (('operation', operation), ('cancer_type', _cancer_label(cancer_type)))
+    increment('ml_operations_total', labels)
+    if failed:
+        increment('ml_operation_errors_total', labels)
+
+
+def observe_request(endpoint, method, status_code, seconds):
+    """Record one HTTP request"""
+    endpoint = endpoint or 'unknown'
+    increment('http_requests_total', (('endpoint', endpoint), ('method', method), ('status', str(status_code))))
+    observe('http_request_duration_seconds', (('endpoint', endpoint),), seconds)
+
+
+class StageTimer:
+    """
+    Times consecutive stages of one ML operation
+
+    Used as a context manager; each lap() records the time since the
+    previous lap as a stage, and leaving the block records the total and
+    counts the operation, as an error if an exception escaped.
+    """
+
+    __slots__ = ('operation', 'cancer_type', 'start', 'last')
+
+    def __init__(self, operation, cancer_type):
+        self.operation = operation
+        self.cancer_type = cancer_type
+        self.start = self.last = time.perf_counter()
+
+    def __enter__(self):
+        self.start = self.last = time.perf_counter()
+        return self
+
+    def lap(self, stage):
+        """Record the time since the previous lap as a stage"""
+        now = time.perf_counter()
+        observe_stage(self.operation, self.cancer_type, stage, now - self.last)
+        self.last = now
+
+    def skip(self):
+        """Exclude the time since the previous lap from the next stage"""
+        self.last = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        total = {'total': time.perf_counter() - self.start}
+        # A generator closed early is not a failure
+        failed = exc_type is not None and issubclass(exc_type, Exception)
+        record_operation(self.operation, self.cancer_type, total, failed=failed)
+        return False
+
+
+def reset_metrics():
+    """Drop all recorded histograms and counters"""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _format_labels(labels, extra=()):
+    """Render a label tuple as {name="value",...}"""
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    rendered = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        rendered.append(f'{name}="{value}"')
+    return '{' + ','.join(rendered) + '}'
+
+
+def _format_value(value):
+    """Render a sample value the way Prometheus expects"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# HELP text and type of every metric family rendered
+METRIC_HELP = {
+    'ml_stage_duration_seconds': ('histogram', 'Duration of each stage of ML operations'),
+    'ml_operations_total': ('counter', 'ML operations run'),
+    'ml_operation_errors_total': ('counter', 'ML operations that raised an error'),
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request handling time')
+}
+
+
+def render_prometheus(gauges=None):
+    """
+    Render all metrics in the Prometheus text exposition format
+
+    Args:
+        gauges: Optional dictionary of metric name -> (type, help, value or
+            {label tuple: value}) for point-in-time values such as cache stats
+
+    Returns:
+        Exposition text
+    """
+    with _lock:
+        histograms = {
+            key: (list(h.counts), h.sum, h.count) for key, h in _histograms.items()
+        }
+        counters = dict(_counters)
+
+    families = {}
+    for (name, labels), value in counters.items():
+        families.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+    for (name, labels), (counts, total, count) in sorted(histograms.items()):
+        lines = families.setdefault(name, [])
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_format_labels(labels, (("le", repr(bound)),))} {cumulative}')
+        lines.append(f'{name}_bucket{_format_labels(labels, (("le", "+Inf"),))} {count}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {repr(total)}')
+        lines.append(f'{name}_count{_format_labels(labels)} {count}')
+
+    output = []
+    for name in sorted(families):
+        metric_type, help_text = METRIC_HELP.get(name, ('untyped', name))
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {metric_type}')
+        output.extend(sorted(families[name]) if metric_type == 'counter' else families[name])
+
+    for name, (metric_type, help_text, value) in (gauges or {}).items():
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {metric_type}')
+        samples = value if isinstance(value, dict) else {(): value}
+        for labels, sample in samples.items():
+            output.append(f'{name}{_format_labels(labels)} {_format_value(sample)}')
+
+    return '\n'.join(output) + '\n'
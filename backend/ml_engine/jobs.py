@@ -0,0 +1,413 @@
+"""
+Background training jobs run in a process pool
+
+Training requests are submitted to a pool of worker processes and tracked
+by job ID, so the HTTP request returns immediately and training different
+cancer types runs on separate cores.
+
+Workers are started from a fork server (spawned where there is none) rather
+than forked from the server, which has live threads and held locks. Such
+workers import the server's main module again before anything else runs,
+so is_training_worker() lets it skip its background threads. A pool that
+broke because a worker died is dropped, and the next job starts a new one.
+
+Job records and claims live in a folder next to the models, so every server
+process sharing that folder sees the same jobs and trains a cancer type at
+most once at a time. A claim is a lock on a per-type file, held by the
+process training it and released by the OS if that process exits; a job
+whose record never finished and whose claim is free is reported as failed.
+Each record is a JSON file replaced atomically, and the worker process adds
+the time the job started running.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from .model_manager import get_model_paths, save_model_metadata
+from .instrumentation import record_operation
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+# Finished jobs kept for status polling
+MAX_FINISHED_JOBS = 100
+
+# Set in the environment of training workers by the pool initializer, and
+# inherited by the processes they start
+TRAINING_WORKER_ENV = 'ML_TRAINING_WORKER'
+
+# Folder under the model folder holding job records and claim files
+JOBS_DIRNAME = 'training_jobs'
+
+_JOB_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+# Byte of a claim file locked on Windows
+_WINDOWS_LOCK_OFFSET = 1 << 20
+
+_executor = None
+_lock = threading.Lock()
+
+
+class TrainingInProgressError(RuntimeError):
+    """A cancer type is already being trained; job_id is its job, if it is one"""
+
+    def __init__(self, cancer_type, job_id=None):
+        super().__init__(f"Training already in progress for {cancer_type} cancer")
+        self.cancer_type = cancer_type
+        self.job_id = job_id
+
+
+def is_training_worker():
+    """
+    Check whether this process is a training worker
+
+    Also true while a new worker process imports the parent's main module,
+    which multiprocessing does as __mp_main__ before the pool initializer runs.
+    """
+    if os.environ.get(TRAINING_WORKER_ENV) == '1':
+        return True
+    return sys.modules.get('__mp_main__') is not sys.modules.get('__main__')
+
+
+def _init_worker():
+    """Pool initializer: mark the worker and the processes it starts"""
+    os.environ[TRAINING_WORKER_ENV] = '1'
+
+
+def _get_executor(max_workers):
+    """Create the worker pool on first use, or again after it broke"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            context = multiprocessing.get_context(method)
+            if method == 'forkserver':
+                # Workers fork from a server that has the training stack imported already
+                context.set_forkserver_preload(['ml_engine.train'])
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context, initializer=_init_worker)
+        return _executor
+
+
+def _discard_executor(executor):
+    """Forget a broken pool so the next job creates a new one"""
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+
+
+def get_jobs_dir(base_path='./models'):
+    """Get the folder with the job records and claims of a model folder"""
+    return os.path.join(base_path, JOBS_DIRNAME)
+
+
+def _job_path(job_id, base_path):
+    """Get the path of a job record"""
+    return os.path.join(get_jobs_dir(base_path), f'{job_id}.json')
+
+
+def _write_job(record, base_path):
+    """Replace a job record atomically"""
+    path = _job_path(record['job_id'], base_path)
+    tmp = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+    with open(tmp, 'w') as f:
+        json.dump(record, f)
+    os.replace(tmp, path)
+
+
+def _read_job(job_id, base_path):
+    """Load a job record, or None if there is none"""
+    try:
+        with open(_job_path(job_id, base_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _try_lock(f):
+    """Lock an open claim file without waiting; False if another holder has it"""
+    try:
+        if os.name == 'nt':
+            # Windows locks are mandatory, so lock a byte past the job ID others read
+            f.seek(_WINDOWS_LOCK_OFFSET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(f):
+    """Undo _try_lock; closing the file also releases the lock elsewhere"""
+    if os.name == 'nt':
+        f.seek(_WINDOWS_LOCK_OFFSET)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _release(claim):
+    """Release a claim taken by _claim"""
+    _unlock(claim)
+    claim.close()
+
+
+def _claim(cancer_type, base_path, job_id=None):
+    """
+    Claim a cancer type for training, across every process sharing base_path
+
+    Returns:
+        The open, locked claim file to pass to _release, or None if the
+        type is already claimed
+    """
+    os.makedirs(get_jobs_dir(base_path), exist_ok=True)
+    claim = open(os.path.join(get_jobs_dir(base_path), f'{cancer_type}.claim'), 'a+')
+    if not _try_lock(claim):
+        claim.close()
+        return None
+    # Tell others which job holds the claim; an empty file is a training request
+    claim.seek(0)
+    claim.truncate()
+    claim.write(job_id or '')
+    claim.flush()
+    return claim
+
+
+def _claim_holder(cancer_type, base_path):
+    """
+    (whether the cancer type is claimed, the job ID holding it or None)
+
+    Probes by taking the lock for an instant, so a claim attempted at that
+    same instant reports the type as busy.
+    """
+    path = os.path.join(get_jobs_dir(base_path), f'{cancer_type}.claim')
+    try:
+        f = open(path, 'r')
+    except FileNotFoundError:
+        return False, None
+    with f:
+        if _try_lock(f):
+            _unlock(f)
+            return False, None
+        f.seek(0)
+        return True, f.read().strip() or None
+
+
+def _run_training(cancer_type, data_path, model_path, scaler_path, mode='full', force=False, search=False,
+                  job_id=None, base_path=None):
+    """Worker process entry point, imports the training stack lazily"""
+    if job_id is not None:
+        # Time spent queued ends here
+        record = _read_job(job_id, base_path)
+        if record is not None:
+            record['state'] = 'running'
+            record['started'] = time.time()
+            _write_job(record, base_path)
+
+    from .train import train_model, update_trained_model
+    if mode == 'incremental':
+        return update_trained_model(cancer_type, data_path, model_path, scaler_path)
+    return train_model(cancer_type, data_path, model_path, scaler_path, force=force, search=search)
+
+
+def _prune_finished_jobs(base_path):
+    """Drop the oldest finished job records beyond MAX_FINISHED_JOBS"""
+    finished = []
+    for name in os.listdir(get_jobs_dir(base_path)):
+        if name.endswith('.json'):
+            record = _read_job(name[:-len('.json')], base_path)
+            if record is not None and record['finished'] is not None:
+                finished.append((record['finished'], name))
+    finished.sort()
+    for _, name in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        try:
+            os.remove(os.path.join(get_jobs_dir(base_path), name))
+        except FileNotFoundError:
+            pass
+
+
+def _on_job_done(job, claim, on_done, executor, future):
+    """Record the outcome of a finished training job and release its claim"""
+    try:
+        metrics = future.result()
+        save_model_metadata(job['cancer_type'], metrics, job['base_path'])
+        state, error = 'completed', None
+    except BrokenProcessPool as e:
+        # A worker died; every queued job of this pool fails the same way
+        _discard_executor(executor)
+        metrics, state, error = None, 'failed', str(e)
+    except Exception as e:
+        metrics, state, error = None, 'failed', str(e)
+
+    # Stage timings were recorded in the worker process, so record them here
+    operation = 'update_model' if job['mode'] == 'incremental' else 'train_model'
+    stage_seconds = metrics['timings'] if metrics else None
+    if metrics and metrics.get('cached'):
+        # Timings of a reused run belong to the original training
+        operation, stage_seconds = 'train_model_cached', None
+    record_operation(operation, job['cancer_type'], stage_seconds, failed=state == 'failed')
+
+    try:
+        # Keep the start time the worker added
+        record = _read_job(job['job_id'], job['base_path']) or dict(job)
+        record.update(metrics=metrics, error=error, state=state, finished=time.time())
+        _write_job(record, job['base_path'])
+        _prune_finished_jobs(job['base_path'])
+    finally:
+        # The record is final before another job may claim the type
+        _release(claim)
+
+    if on_done is not None:
+        on_done(job['job_id'])
+
+
+def get_active_job(cancer_type, base_path='./models'):
+    """Get the queued or running job for a cancer type, if any"""
+    return _claim_holder(cancer_type.lower(), base_path)[1]
+
+
+def is_training(cancer_type, base_path='./models'):
+    """Check whether a cancer type is being trained by a job or in a request, in any server process"""
+    return _claim_holder(cancer_type.lower(), base_path)[0]
+
+
+@contextmanager
+def inline_training(cancer_type, base_path='./models'):
+    """
+    Claim a cancer type for training in the calling thread
+
+    Yields:
+        True if claimed, False if a job or another request is already
+        training it; the claim is released when the block ends
+    """
+    claim = _claim(cancer_type.lower(), base_path)
+    try:
+        yield claim is not None
+    finally:
+        if claim is not None:
+            _release(claim)
+
+
+def submit_training_job(cancer_type, data_path, base_path='./models', max_workers=None, mode='full', force=False,
+                        search=False, on_done=None):
+    """
+    Queue a training run in the worker pool
+
+    Args:
+        cancer_type: Type of cancer (breast, lung, prostate)
+        data_path: Path to the training CSV
+        base_path: Folder the model artifacts and metadata are written to
+        max_workers: Pool size, only used when the pool is first created
+        mode: 'full' to retrain from scratch, 'incremental' to update the trained model
+        force: Retrain even if an identical run is in the training store
+        search: Tune hyperparameters before the final fit
+        on_done: Optional callable run with the job ID once the job has finished
+
+    Returns:
+        Job ID string
+
+    Raises:
+        TrainingInProgressError: If a job or a request is already training the cancer type
+    """
+    cancer_type = cancer_type.lower()
+    paths = get_model_paths(cancer_type, base_path)
+    job_id = uuid.uuid4().hex
+
+    # Claim the cancer type before submitting, so concurrent requests see this job
+    claim = _claim(cancer_type, base_path, job_id)
+    if claim is None:
+        raise TrainingInProgressError(cancer_type, get_active_job(cancer_type, base_path))
+
+    job = {
+        'job_id': job_id,
+        'cancer_type': cancer_type,
+        'mode': mode,
+        'state': 'queued',
+        'submitted_at': datetime.now().isoformat(),
+        'submitted': time.time(),
+        'started': None,
+        'finished': None,
+        'base_path': base_path,
+        'metrics': None,
+        'error': None
+    }
+
+    args = (_run_training, cancer_type, data_path, paths['model'], paths['scaler'], mode, force, search,
+            job_id, base_path)
+    try:
+        _write_job(job, base_path)
+        executor = _get_executor(max_workers or min(3, os.cpu_count() or 1))
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            # The pool broke since the last job; this one has not run, so use a new pool
+            _discard_executor(executor)
+            executor = _get_executor(max_workers or min(3, os.cpu_count() or 1))
+            try:
+                future = executor.submit(*args)
+            except BrokenProcessPool as e:
+                # Record the job as failed through the usual path
+                future = Future()
+                future.set_exception(e)
+    except BaseException:
+        try:
+            os.remove(_job_path(job_id, base_path))
+        except FileNotFoundError:
+            pass
+        _release(claim)
+        raise
+    future.add_done_callback(lambda future: _on_job_done(job, claim, on_done, executor, future))
+
+    return job_id
+
+
+def get_job_status(job_id, base_path='./models'):
+    """
+    Get state, timings and final metrics of a training job
+
+    elapsed_seconds runs from submission; queued_seconds and running_seconds
+    split it at the time the worker started the job.
+
+    Returns:
+        Status dictionary, or None for an unknown job ID
+    """
+    if not _JOB_ID_PATTERN.fullmatch(job_id):
+        return None
+    record = _read_job(job_id, base_path)
+    if record is None:
+        return None
+
+    state, error, finished = record['state'], record['error'], record['finished']
+    if finished is None and _claim_holder(record['cancer_type'], base_path)[1] != job_id:
+        # The record may have been finished since it was read
+        record = _read_job(job_id, base_path) or record
+        state, error, finished = record['state'], record['error'], record['finished']
+        if finished is None:
+            state, error = 'failed', 'The server process running the job exited'
+
+    end = finished or time.time()
+    started = record['started']
+    queued_end = started if started is not None else end
+    return {
+        'job_id': record['job_id'],
+        'cancer_type': record['cancer_type'],
+        'mode': record['mode'],
+        'state': state,
+        'submitted_at': record['submitted_at'],
+        'elapsed_seconds': round(end - record['submitted'], 3),
+        'queued_seconds': round(queued_end - record['submitted'], 3),
+        'running_seconds': round(end - started, 3) if started is not None else 0.0,
+        'metrics': record['metrics'],
+        'error': error
+    }
@@ -0,0 +1,314 @@
+"""
+Single-file, versioned bundle of a trained model for fast loading
+
+A bundle holds everything needed to serve predictions for one cancer type:
+the feature list, the StandardScaler parameters and the model reduced to
+flat arrays, as used by the compiled forest and SVC evaluators. Loading it
+does not unpickle anything or import sklearn.
+
+Layout:
+    prefix   magic, format version, header length and header CRC32
+    header   JSON with the model description, the feature names and a
+             table of arrays (dtype, shape, offset, CRC32)
+    arrays   raw little-endian arrays, each aligned to 64 bytes
+
+Arrays are memory-mapped on load, so a reader only touches the pages of the
+arrays it uses, and any subset of arrays can be read on its own.
+
+Forest arrays are narrowed losslessly or nearly so: node indices and
+features to int32, and split thresholds to float32 rounded down, which keeps
+every decision identical because trees compare float32 inputs. Leaf class
+probabilities are stored as float32, within 6e-8 of the float64 values. SVC
+support vectors and coefficients stay float64, as narrowing them would change
+the kernel values.
+"""
+import os
+import json
+import zlib
+import struct
+import threading
+
+import numpy as np
+
+from .forest_engine import CompiledForest
+from .svc_engine import CompiledSVC
+
+
+BUNDLE_MAGIC = b'CPBUNDLE'
+BUNDLE_VERSION = 1
+
+# magic, version, header length, header CRC32, reserved
+PREFIX = struct.Struct('<8sIIII')
+
+# Array data offsets are multiples of this, for aligned memory maps
+ALIGNMENT = 64
+
+
+class BundleScaler:
+    """Fitted StandardScaler parameters read from a bundle"""
+
+    def __init__(self, mean, scale, with_mean=True, with_std=True):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.with_mean = with_mean
+        self.with_std = with_std
+        self.n_features_in_ = len(scale if scale is not None else mean)
+
+    def transform(self, X):
+        """Same arithmetic as StandardScaler.transform: (x - mean_) / scale_"""
+        X = np.array(X, dtype=np.float64)
+        if self.with_mean:
+            X -= self.mean_
+        if self.with_std:
+            X /= self.scale_
+        return X
+
+
+def supports_bundle(model):
+    """Check whether a model can be stored in a bundle"""
+    return CompiledForest.supports(model) or CompiledSVC.supports(model)
+
+
+def _round_down_float32(values):
+    """Largest float32 not above each value; x32 <= t holds exactly when x32 <= result"""
+    narrowed = values.astype(np.float32)
+    return np.where(narrowed > values, np.nextafter(narrowed, np.float32(-np.inf)), narrowed)
+
+
+def _model_arrays(model):
+    """Describe a model as header fields and arrays"""
+    if CompiledForest.supports(model):
+        compiled = CompiledForest(model)
+        params = {
+            'n_classes': compiled.n_classes,
+            'n_trees': compiled.n_trees,
+            'max_depth': int(compiled.max_depth)
+        }
+        arrays = {
+            'roots': compiled.roots.astype(np.int32),
+            'feature': compiled.feature.astype(np.int32),
+            'threshold': _round_down_float32(compiled.threshold),
+            'left': compiled.left.astype(np.int32),
+            'right': compiled.right.astype(np.int32),
+            'missing_left': compiled.missing_left.astype(np.uint8),
+            'value': compiled.value.astype(np.float32)
+        }
+        return 'forest', params, arrays
+
+    if CompiledSVC.supports(model):
+        compiled = CompiledSVC(model)
+        params = {
+            'gamma': compiled.gamma,
+            'intercept': compiled.intercept,
+            'prob_a': compiled.prob_a,
+            'prob_b': compiled.prob_b
+        }
+        arrays = {
+            'support_vectors': compiled.support_vectors,
+            'dual_coef': compiled.dual_coef
+        }
+        return 'svc', params, arrays
+
+    raise ValueError(f"Cannot bundle a {type(model).__name__} model")
+
+
+def _align(offset):
+    """Round an offset up to the next multiple of ALIGNMENT"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_bundle(path, model, scaler, feature_names, cancer_type=None):
+    """
+    Write a model, its scaler and feature names to one bundle file
+
+    Args:
+        path: Bundle file path, replaced atomically
+        model: Fitted RandomForestClassifier or binary RBF SVC
+        scaler: Fitted StandardScaler
+        feature_names: Feature columns in training order
+        cancer_type: Optional cancer type recorded in the header
+
+    Returns:
+        Size of the written file in bytes
+    """
+    kind, params, arrays = _model_arrays(model)
+    arrays['scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+
+    table = {}
+    data = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+        table[name] = {
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+            'nbytes': array.nbytes,
+            'crc32': zlib.crc32(array.data)
+        }
+        data.append((offset, array))
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        'format_version': BUNDLE_VERSION,
+        'cancer_type': cancer_type,
+        'kind': kind,
+        'model_class': type(model).__name__,
+        'classes': np.asarray(model.classes_).tolist(),
+        'n_features': len(feature_names),
+        'feature_names': list(feature_names),
+        'scaler': {
+            'with_mean': bool(scaler.with_mean),
+            'with_std': bool(scaler.with_std)
+        },
+        'params': params,
+        'arrays': table
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREFIX.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(header_bytes), zlib.crc32(header_bytes), 0))
+        f.write(header_bytes)
+        for array_offset, array in data:
+            f.seek(data_start + array_offset)
+            f.write(array.data)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_bundle_header(path):
+    """
+    Read and check the header of a bundle without touching its arrays
+
+    Returns:
+        Header dictionary, with 'data_start' set to where the arrays begin
+
+    Raises:
+        ValueError: If the file is not a bundle, has another format version
+            or its header is corrupt
+    """
+    with open(path, 'rb') as f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            raise ValueError(f"Not a model bundle: {path}")
+        magic, version, header_length, header_crc, _ = PREFIX.unpack(prefix)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"Not a model bundle: {path}")
+        if version != BUNDLE_VERSION:
+            raise ValueError(f"Unsupported model bundle version {version} (expected {BUNDLE_VERSION})")
+        header_bytes = f.read(header_length)
+
+    if len(header_bytes) != header_length or zlib.crc32(header_bytes) != header_crc:
+        raise ValueError(f"Model bundle header is corrupt: {path}")
+
+    header = json.loads(header_bytes.decode('utf-8'))
+    header['data_start'] = _align(PREFIX.size + header_length)
+    return header
+
+
+def read_bundle_arrays(path, names=None, header=None, verify=True):
+    """
+    Memory-map some or all arrays of a bundle
+
+    Args:
+        path: Bundle file path
+        names: Array names to read; all arrays if None
+        header: Header from read_bundle_header, read again if not given
+        verify: Check each returned array against its CRC32, which reads it
+
+    Returns:
+        Dictionary of array name -> read-only array
+    """
+    header = header or read_bundle_header(path)
+    table = header['arrays']
+    names = list(table) if names is None else names
+
+    missing = [name for name in names if name not in table]
+    if missing:
+        raise ValueError(f"Model bundle has no arrays named: {', '.join(missing)}")
+
+    arrays = {}
+    for name in names:
+        spec = table[name]
+        shape = tuple(spec['shape'])
+        if spec['nbytes'] == 0:
+            array = np.empty(shape, dtype=np.dtype(spec['dtype']))
+        else:
+            array = np.memmap(
+                path, dtype=np.dtype(spec['dtype']), mode='r',
+                offset=header['data_start'] + spec['offset'], shape=shape
+            )
+        if verify and zlib.crc32(array.data) != spec['crc32']:
+            raise ValueError(f"Model bundle array '{name}' is corrupt: {path}")
+        arrays[name] = array
+    return arrays
+
+
+def _forest_from_arrays(header, arrays):
+    """Rebuild the compiled forest evaluator from bundle arrays"""
+    forest = CompiledForest.__new__(CompiledForest)
+    params = header['params']
+    forest.classes_ = np.asarray(header['classes'])
+    forest.n_classes = params['n_classes']
+    forest.n_trees = params['n_trees']
+    forest.n_features_in_ = header['n_features']
+    forest.max_depth = params['max_depth']
+    forest.roots = arrays['roots']
+    forest.feature = arrays['feature']
+    forest.threshold = arrays['threshold']
+    forest.left = arrays['left']
+    forest.right = arrays['right']
+    forest.missing_left = arrays['missing_left'].view(bool)
+    forest.value = arrays['value']
+    return forest
+
+
+def _svc_from_arrays(header, arrays):
+    """Rebuild the compiled SVC evaluator from bundle arrays"""
+    svc = CompiledSVC.__new__(CompiledSVC)
+    params = header['params']
+    svc.classes_ = np.asarray(header['classes'])
+    svc.n_features_in_ = header['n_features']
+    svc.gamma = params['gamma']
+    svc.support_vectors = arrays['support_vectors']
+    svc.support_norms = np.einsum('ij,ij->i', svc.support_vectors, svc.support_vectors)
+    svc.dual_coef = arrays['dual_coef']
+    svc.intercept = params['intercept']
+    svc.prob_a = params['prob_a']
+    svc.prob_b = params['prob_b']
+    return svc
+
+
+def load_bundle(path, verify=True):
+    """
+    Load a bundle as an estimator, scaler and feature names
+
+    The estimator is the compiled evaluator for the bundled model, with the
+    original model class name in its model_type attribute.
+
+    Returns:
+        (estimator, BundleScaler, feature names, header)
+    """
+    header = read_bundle_header(path)
+    arrays = read_bundle_arrays(path, header=header, verify=verify)
+
+    builders = {
+        'forest': _forest_from_arrays,
+        'svc': _svc_from_arrays
+    }
+    if header['kind'] not in builders:
+        raise ValueError(f"Unknown model kind in bundle: {header['kind']}")
+    estimator = builders[header['kind']](header, arrays)
+    estimator.model_type = header['model_class']
+
+    scaler = BundleScaler(
+        arrays['scaler_mean'],
+        arrays['scaler_scale'],
+        with_mean=header['scaler']['with_mean'],
+        with_std=header['scaler']['with_std']
+    )
+    return estimator, scaler, header['feature_names'], header
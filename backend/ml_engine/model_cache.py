@@ -0,0 +1,195 @@
+"""
+In-process cache for trained model artifacts
+
+Keeps the loaded model, scaler, feature list and fitted preprocessor for
+each cancer type in memory so predictions do not unpickle them from disk
+on every request.
+Entries are stamped with the artifact files' modification time and size,
+so a retrain that rewrites the files is picked up on the next lookup.
+
+Arrays inside the pickles are memory-mapped copy-on-write by default, so
+worker processes serving the same model share one page-cache copy of
+large arrays such as SVC support vectors instead of each holding their own.
+
+With MODEL_ARTIFACT_FORMAT=bundle, models are served from the single-file
+bundle written next to the pickles when there is one (see model_bundle),
+which loads without unpickling the estimator.
+"""
+import os
+import threading
+
+
+def _default_mmap_mode():
+    """Memory-map mode for joblib.load, from MODEL_MMAP_MODE"""
+    # Windows cannot replace a file that is still mapped, so retrains would fail
+    default = 'c' if os.name == 'posix' else ''
+    mode = os.environ.get('MODEL_MMAP_MODE', default).strip().lower()
+    return mode if mode in ('r', 'c') else None
+
+
+# 'c' maps arrays copy-on-write; libsvm rejects fully read-only buffers
+MODEL_MMAP_MODE = _default_mmap_mode()
+
+# 'pickle' (default) or 'bundle'
+MODEL_ARTIFACT_FORMAT = os.environ.get('MODEL_ARTIFACT_FORMAT', 'pickle').strip().lower()
+
+_cache = {}
+_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'reloads': 0
+}
+
+
+def get_feature_names_path(model_path):
+    """Get path of the feature names file saved next to a model"""
+    return model_path.replace('.pkl', '_features.pkl')
+
+
+def get_preprocessor_path(model_path):
+    """Get path of the fitted preprocessor saved next to a model"""
+    return model_path.replace('.pkl', '_preprocessor.pkl')
+
+
+def get_bundle_path(model_path):
+    """Get path of the single-file model bundle saved next to a model"""
+    return model_path.replace('.pkl', '.bundle')
+
+
+def _file_stamp(path):
+    """Return (mtime_ns, size) for a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _artifact_stamp(model_path, scaler_path):
+    """Version stamp for the set of artifact files of one model"""
+    return (
+        _file_stamp(model_path),
+        _file_stamp(scaler_path),
+        _file_stamp(get_feature_names_path(model_path)),
+        _file_stamp(get_preprocessor_path(model_path)),
+        _file_stamp(get_bundle_path(model_path))
+    )
+
+
+def _load_artifacts(model_path, scaler_path):
+    """Load model, scaler, feature names and preprocessor from disk"""
+    # joblib and the unpickled estimators pull in sklearn, so load it on first use
+    import joblib
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Model file not found: {model_path}")
+    if not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
+
+    bundle_path = get_bundle_path(model_path)
+    if MODEL_ARTIFACT_FORMAT == 'bundle' and os.path.exists(bundle_path):
+        from .model_bundle import load_bundle
+        model, scaler, feature_names, _ = load_bundle(bundle_path)
+    else:
+        model = joblib.load(model_path, mmap_mode=MODEL_MMAP_MODE)
+        scaler = joblib.load(scaler_path, mmap_mode=MODEL_MMAP_MODE)
+
+        # Load feature names if available
+        feature_names_path = get_feature_names_path(model_path)
+        feature_names = None
+        if os.path.exists(feature_names_path):
+            feature_names = joblib.load(feature_names_path)
+
+    # Models trained before preprocessors were saved have none
+    preprocessor_path = get_preprocessor_path(model_path)
+    preprocessor = None
+    if os.path.exists(preprocessor_path):
+        preprocessor = joblib.load(preprocessor_path)
+
+    return model, scaler, feature_names, preprocessor
+
+
+def get_cached_artifacts(cancer_type, model_path, scaler_path):
+    """
+    Get loaded artifacts for a cancer type, loading them on a miss
+
+    Args:
+        cancer_type: Type of cancer (breast, lung, prostate)
+        model_path: Path to saved model
+        scaler_path: Path to saved scaler
+
+    Returns:
+        Cache entry dictionary with model, scaler, feature_names,
+        preprocessor and stamp
+    """
+    key = cancer_type.lower()
+    stamp = _artifact_stamp(model_path, scaler_path)
+
+    with _lock:
+        entry = _cache.get(key)
+        if (entry is not None and entry['stamp'] == stamp
+                and entry['model_path'] == model_path
+                and entry['scaler_path'] == scaler_path):
+            _stats['hits'] += 1
+            return entry
+        _stats['misses'] += 1
+        if entry is not None:
+            _stats['reloads'] += 1
+
+    model, scaler, feature_names, preprocessor = _load_artifacts(model_path, scaler_path)
+    entry = {
+        'cancer_type': key,
+        'model': model,
+        'scaler': scaler,
+        'feature_names': feature_names,
+        'preprocessor': preprocessor,
+        'model_path': model_path,
+        'scaler_path': scaler_path,
+        'stamp': stamp
+    }
+
+    with _lock:
+        _cache[key] = entry
+
+    return entry
+
+
+def preload_models(cancer_types, base_path='./models'):
+    """
+    Load artifacts for every trained cancer type into the cache
+
+    Returns:
+        List of cancer types that were loaded
+    """
+    from .model_manager import get_model_paths, check_model_exists
+
+    loaded = []
+    for cancer_type in cancer_types:
+        if not check_model_exists(cancer_type, base_path):
+            continue
+        paths = get_model_paths(cancer_type, base_path)
+        get_cached_artifacts(cancer_type, paths['model'], paths['scaler'])
+        loaded.append(cancer_type.lower())
+
+    return loaded
+
+
+def clear_model_cache(cancer_type=None):
+    """Drop cached artifacts for one cancer type, or all of them"""
+    with _lock:
+        if cancer_type is None:
+            _cache.clear()
+        else:
+            _cache.pop(cancer_type.lower(), None)
+
+
+def get_cache_stats():
+    """Get hit/miss counters and the cancer types currently cached"""
+    with _lock:
+        stats = dict(_stats)
+        stats['cached_types'] = sorted(_cache.keys())
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
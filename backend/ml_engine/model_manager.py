@@ -1,12 +1,29 @@
 """
 Model management utilities - loading, saving, checking status
+
+Status and metadata of each model are kept in an in-memory registry that
+is filled on first use and refreshed whenever training saves new metadata,
+so status polling and predictions do not stat or parse files per request.
 """
 import os
-import joblib
+import time
+import threading
 from datetime import datetime
 import json
 
 
+# Seconds before a registry entry is checked against the files again, so a
+# model trained by another worker process is seen; 0 keeps entries until
+# training in this process replaces them
+MODEL_STATUS_MAX_AGE = float(os.environ.get('MODEL_STATUS_MAX_AGE', 5))
+
+# Cancer types kept in the registry; other names come from request URLs and are read from disk
+REGISTERED_TYPES = {'breast', 'lung', 'prostate'}
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
 def get_model_paths(cancer_type, base_path='./models'):
     """Get paths for model, scaler, and metadata files"""
     cancer_type_lower = cancer_type.lower()
@@ -14,12 +31,16 @@ def get_model_paths(cancer_type, base_path='./models'):
     scaler_path = os.path.join(base_path, f'{cancer_type_lower}_cancer_scaler.pkl')
     metadata_path = os.path.join(base_path, f'{cancer_type_lower}_cancer_metadata.json')
     feature_names_path = os.path.join(base_path, f'{cancer_type_lower}_cancer_features.pkl')
+    preprocessor_path = os.path.join(base_path, f'{cancer_type_lower}_cancer_preprocessor.pkl')
+    bundle_path = os.path.join(base_path, f'{cancer_type_lower}_cancer.bundle')
     
     return {
         'model': model_path,
         'scaler': scaler_path,
         'metadata': metadata_path,
-        'features': feature_names_path
+        'features': feature_names_path,
+        'preprocessor': preprocessor_path,
+        'bundle': bundle_path
     }
 
 
@@ -38,6 +59,9 @@ def save_model_metadata(cancer_type, metrics, base_path='./models'):
     with open(paths['metadata'], 'w') as f:
         json.dump(metadata, f, indent=2)
     
+    # Training wrote new artifacts, so re-read their status
+    refresh_model_status(cancer_type, base_path)
+    
     return metadata
 
 
@@ -68,16 +92,102 @@ def check_model_exists(cancer_type, base_path='./models'):
     return os.path.exists(paths['model']) and os.path.exists(paths['scaler'])
 
 
-def get_model_status(cancer_type, base_path='./models'):
-    """Get comprehensive model status"""
+def _status_stamp(cancer_type, base_path):
+    """Modification times of the files a model status is read from, None for missing ones"""
+    paths = get_model_paths(cancer_type, base_path)
+    stamp = []
+    for name in ('metadata', 'model', 'scaler'):
+        try:
+            stamp.append(os.stat(paths[name]).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+def _read_model_status(cancer_type, base_path):
+    """Read model status and metadata from disk"""
+    stamp = _status_stamp(cancer_type, base_path)
     is_trained = check_model_exists(cancer_type, base_path)
     metadata = load_model_metadata(cancer_type, base_path)
     
-    return {
+    status = {
         'cancer_type': cancer_type.lower(),
         'is_trained': is_trained,
         'metrics': metadata.get('metrics'),
         'trained_at': metadata.get('trained_at'),
         'model_path': get_model_paths(cancer_type, base_path)['model'] if is_trained else None
     }
+    return {'status': status, 'metadata': metadata, 'stamp': stamp, 'loaded_at': time.monotonic()}
+
+
+def _registry_key(cancer_type, base_path):
+    """Registry key for a model, normalised without touching the filesystem"""
+    return (cancer_type.lower(), os.path.normpath(base_path))
+
+
+def refresh_model_status(cancer_type, base_path='./models'):
+    """Re-read one model's status and metadata into the registry"""
+    entry = _read_model_status(cancer_type, base_path)
+    if cancer_type.lower() in REGISTERED_TYPES:
+        with _registry_lock:
+            _registry[_registry_key(cancer_type, base_path)] = entry
+    return entry
+
+
+def refresh_model_statuses(cancer_types, base_path='./models'):
+    """Re-read the status of several models, e.g. at startup"""
+    for cancer_type in cancer_types:
+        refresh_model_status(cancer_type, base_path)
+
+
+def _get_registry_entry(cancer_type, base_path, refresh=False):
+    """
+    Get a registry entry, reading it from disk if missing, changed or forced
+
+    Entries older than MODEL_STATUS_MAX_AGE are only re-read when their
+    files were written, created or removed since.
+    """
+    with _registry_lock:
+        entry = _registry.get(_registry_key(cancer_type, base_path))
+    
+    if entry is None or refresh:
+        return refresh_model_status(cancer_type, base_path)
+    
+    if MODEL_STATUS_MAX_AGE > 0 and time.monotonic() - entry['loaded_at'] > MODEL_STATUS_MAX_AGE:
+        if _status_stamp(cancer_type, base_path) != entry['stamp']:
+            return refresh_model_status(cancer_type, base_path)
+        entry['loaded_at'] = time.monotonic()
+    return entry
+
+
+def get_model_status(cancer_type, base_path='./models', refresh=False):
+    """Get comprehensive model status, from the registry unless refresh is set"""
+    return dict(_get_registry_entry(cancer_type, base_path, refresh)['status'])
+
+
+def get_all_model_statuses(cancer_types, base_path='./models', refresh=False):
+    """Get the status of every listed cancer type, keyed by type"""
+    return {
+        cancer_type.lower(): get_model_status(cancer_type, base_path, refresh)
+        for cancer_type in cancer_types
+    }
+
+
+def get_cached_metadata(cancer_type, base_path='./models'):
+    """Get model metadata from the registry"""
+    return _get_registry_entry(cancer_type, base_path)['metadata']
+
+
+def is_model_trained(cancer_type, base_path='./models'):
+    """Check from the registry whether a trained model exists"""
+    return _get_registry_entry(cancer_type, base_path)['status']['is_trained']
+
 
+def clear_model_status(cancer_type=None):
+    """Drop registry entries for one cancer type, or all of them"""
+    with _registry_lock:
+        if cancer_type is None:
+            _registry.clear()
+        else:
+            for key in [key for key in _registry if key[0] == cancer_type.lower()]:
+                del _registry[key]
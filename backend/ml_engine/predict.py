@@ -3,29 +3,19 @@ Prediction utilities for cancer prediction models
 """
 import pandas as pd
 import numpy as np
-import joblib
-import os
 
-from .preprocess import get_preprocessor
+from .preprocess import get_preprocessor, check_feature_columns
+from .model_cache import get_cached_artifacts
+from .inference import get_inference_plan, score_estimator, scale_features
+from .result_cache import result_key, get_cached_result, store_result
+from .result_formats import iter_serialized_results
+from .instrumentation import StageTimer
 
 
 def load_model_and_scaler(cancer_type, model_path, scaler_path):
-    """Load trained model and scaler"""
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file not found: {model_path}")
-    if not os.path.exists(scaler_path):
-        raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-    
-    model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    
-    # Load feature names if available
-    feature_names_path = model_path.replace('.pkl', '_features.pkl')
-    feature_names = None
-    if os.path.exists(feature_names_path):
-        feature_names = joblib.load(feature_names_path)
-    
-    return model, scaler, feature_names
+    """Load trained model and scaler, served from the in-process cache"""
+    entry = get_cached_artifacts(cancer_type, model_path, scaler_path)
+    return entry['model'], entry['scaler'], entry['feature_names']
 
 
 def predict_single(cancer_type, form_data, model_path, scaler_path):
@@ -41,12 +31,53 @@ def predict_single(cancer_type, form_data, model_path, scaler_path):
     Returns:
         Dictionary with prediction, confidence, and metadata
     """
-    # Load model and scaler
-    model, scaler, feature_names = load_model_and_scaler(cancer_type, model_path, scaler_path)
-    
-    # Convert form data to DataFrame
-    # Map form field names to feature names
-    feature_mapping = get_feature_mapping(cancer_type, form_data, feature_names)
+    with StageTimer('predict_single', cancer_type) as timer:
+        # Load model, scaler and the compiled inference plan
+        entry = get_cached_artifacts(cancer_type, model_path, scaler_path)
+        feature_names = entry['feature_names']
+        plan = get_inference_plan(entry)
+        timer.lap('load_artifacts')
+        
+        # Map form field names to feature names
+        feature_mapping = get_feature_mapping(cancer_type, form_data, feature_names)
+        timer.lap('feature_mapping')
+        
+        if plan is None:
+            return _predict_single_frame(cancer_type, feature_mapping, entry, timer)
+        
+        # Fill a vector in training column order; identical inputs reuse the result
+        vector = plan.build_vector(feature_mapping)
+        key = result_key(cancer_type, entry, vector)
+        cached = get_cached_result(key)
+        timer.lap('result_cache')
+        if cached is not None:
+            return cached
+        
+        X_scaled = plan.scale_matrix(vector.reshape(1, -1))
+        timer.lap('scale')
+        
+        # Predict
+        predictions, probabilities = plan.score(X_scaled)
+        timer.lap('evaluate')
+        
+        result = format_prediction(
+            cancer_type,
+            plan.model,
+            predictions[0],
+            probabilities[0],
+            plan.n_features
+        )
+        store_result(key, result)
+        timer.lap('format')
+        
+        return result
+
+
+def _predict_single_frame(cancer_type, feature_mapping, entry, timer):
+    """Single prediction through a DataFrame, for artifacts without a plan"""
+    model = entry['model']
+    scaler = entry['scaler']
+    feature_names = entry['feature_names']
     
     # Create DataFrame with single row
     df = pd.DataFrame([feature_mapping])
@@ -61,10 +92,65 @@ def predict_single(cancer_type, form_data, model_path, scaler_path):
     
     # Scale features
     X_scaled = scaler.transform(df)
+    timer.lap('scale')
     
     # Predict
     prediction = model.predict(X_scaled)[0]
     probabilities = model.predict_proba(X_scaled)[0]
+    timer.lap('evaluate')
+    
+    result = format_prediction(cancer_type, model, prediction, probabilities, len(df.columns))
+    timer.lap('format')
+    return result
+
+
+def predict_records(cancer_type, records, model_path, scaler_path):
+    """
+    Make predictions for many form-style records with one model call
+    
+    Args:
+        cancer_type: Type of cancer (breast, lung, prostate)
+        records: List of form data dictionaries, as taken by predict_single
+        model_path: Path to saved model
+        scaler_path: Path to saved scaler
+    
+    Returns:
+        List of prediction dictionaries in the order of the records
+    """
+    with StageTimer('predict_records', cancer_type) as timer:
+        entry = get_cached_artifacts(cancer_type, model_path, scaler_path)
+        feature_names = entry['feature_names']
+        if not feature_names:
+            raise ValueError("Bulk prediction needs the model's saved feature names; retrain the model")
+        plan = get_inference_plan(entry)
+        timer.lap('load_artifacts')
+        
+        if not records:
+            return []
+        
+        # All records into one float64 matrix in training column order
+        X = build_feature_matrix(cancer_type, records, feature_names)
+        timer.lap('feature_mapping')
+        
+        if plan is not None:
+            model, estimator = plan.model, plan.estimator
+            X_scaled = plan.scale_matrix(X)
+        else:
+            model = estimator = entry['model']
+            X_scaled = entry['scaler'].transform(pd.DataFrame(X, columns=feature_names))
+        timer.lap('scale')
+        
+        predictions, probabilities = score_estimator(estimator, X_scaled)
+        timer.lap('evaluate')
+        
+        results = format_predictions(cancer_type, model, predictions, probabilities, len(feature_names))
+        timer.lap('format')
+        
+        return results
+
+
+def format_prediction(cancer_type, model, prediction, probabilities, features_used):
+    """Build the prediction response dictionary for one row"""
     confidence = float(max(probabilities)) * 100
     
     # Map prediction to human-readable format
@@ -75,134 +161,356 @@ def predict_single(cancer_type, form_data, model_path, scaler_path):
         'prediction_code': int(prediction),
         'confidence': round(confidence, 2),
         'probabilities': {str(i): float(p) for i, p in enumerate(probabilities)},
-        'model_type': type(model).__name__,
-        'features_used': len(df.columns)
+        # Models loaded from a bundle report the class they were trained as
+        'model_type': getattr(model, 'model_type', type(model).__name__),
+        'features_used': features_used
     }
 
 
-def get_feature_mapping(cancer_type, form_data, feature_names):
-    """Map form data fields to model features"""
-    mapping = {}
-    
-    if cancer_type.lower() == 'breast':
-        # Map breast cancer form fields to CSV columns
-        field_mapping = {
-            'radiusMean': 'radius_mean',
-            'textureMean': 'texture_mean',
-            'perimeterMean': 'perimeter_mean',
-            'areaMean': 'area_mean',
-            'smoothnessMean': 'smoothness_mean',
-            'compactnessMean': 'compactness_mean',
-            'concavityMean': 'concavity_mean',
-            'concavePointsMean': 'concave points_mean',
-            'symmetryMean': 'symmetry_mean'
+def format_predictions(cancer_type, model, predictions, probabilities, features_used):
+    """Build the response dictionaries of format_prediction for many rows at once"""
+    probabilities = np.asarray(probabilities)
+    labels = get_prediction_labels(cancer_type, predictions).tolist()
+    codes = np.asarray(predictions).astype(np.int64).tolist()
+    confidences = (probabilities.max(axis=1) * 100).tolist()
+    classes = [str(i) for i in range(probabilities.shape[1])]
+    model_type = getattr(model, 'model_type', type(model).__name__)
+    
+    return [
+        {
+            'prediction': label,
+            'prediction_code': code,
+            'confidence': round(confidence, 2),
+            'probabilities': dict(zip(classes, row)),
+            'model_type': model_type,
+            'features_used': features_used
         }
-        
-        for form_field, csv_field in field_mapping.items():
-            if form_field in form_data:
-                mapping[csv_field] = float(form_data[form_field])
+        for label, code, confidence, row in zip(labels, codes, confidences, probabilities.tolist())
+    ]
+
+
+# Form field -> CSV column, for types whose forms use their own field names
+FORM_FIELDS = {
+    'breast': {
+        'radiusMean': 'radius_mean',
+        'textureMean': 'texture_mean',
+        'perimeterMean': 'perimeter_mean',
+        'areaMean': 'area_mean',
+        'smoothnessMean': 'smoothness_mean',
+        'compactnessMean': 'compactness_mean',
+        'concavityMean': 'concavity_mean',
+        'concavePointsMean': 'concave points_mean',
+        'symmetryMean': 'symmetry_mean'
+    },
+    'prostate': {
+        'age': 'age',
+        'psa': 'psa',
+        'psaDensity': 'psa_density',
+        'gleason': 'gleason',
+        'prostatevolume': 'prostate_volume',
+        'dre': 'dre',
+        'familyHistory': 'family_history',
+        'previousBiopsy': 'previous_biopsy'
+    }
+}
+
+# Text answers read as 1 / 0
+LUNG_TRUE_VALUES = ['yes', 'y', '1', 'true']
+LUNG_FALSE_VALUES = ['no', 'n', '0', 'false']
+PROSTATE_TRUE_VALUES = ['yes', 'y', '1']
+PROSTATE_FALSE_VALUES = ['no', 'n', '0']
+
+
+def coerce_form_value(cancer_type, value):
+    """
+    Convert one form value to the number the model sees, as single predictions do
+    
+    Breast values go through float(). Lung and prostate yes/no text reads as
+    1 / 0 and their empty values as 0; lung text that is not a number is 0.
     
-    elif cancer_type.lower() == 'lung':
-        # Map lung cancer form fields
-        # Note: This needs to match actual CSV structure
-        for key, value in form_data.items():
+    Raises:
+        ValueError, TypeError: If float() cannot read the value
+    """
+    cancer_type = cancer_type.lower()
+    
+    if cancer_type == 'lung':
+        if isinstance(value, str):
             # Convert yes/no to 1/0
-            if isinstance(value, str):
-                if value.lower() in ['yes', 'y', '1', 'true']:
-                    mapping[key.lower()] = 1
-                elif value.lower() in ['no', 'n', '0', 'false']:
-                    mapping[key.lower()] = 0
-                else:
-                    try:
-                        mapping[key.lower()] = float(value)
-                    except:
-                        mapping[key.lower()] = 0
-            else:
-                mapping[key.lower()] = float(value) if value else 0
-    
-    elif cancer_type.lower() == 'prostate':
-        # Map prostate cancer form fields
-        field_mapping = {
-            'age': 'age',
-            'psa': 'psa',
-            'psaDensity': 'psa_density',
-            'gleason': 'gleason',
-            'prostatevolume': 'prostate_volume',
-            'dre': 'dre',
-            'familyHistory': 'family_history',
-            'previousBiopsy': 'previous_biopsy'
-        }
+            if value.lower() in LUNG_TRUE_VALUES:
+                return 1
+            if value.lower() in LUNG_FALSE_VALUES:
+                return 0
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+        return float(value) if value else 0
+    
+    if cancer_type == 'prostate':
+        if isinstance(value, str) and value.lower() in PROSTATE_TRUE_VALUES:
+            return 1
+        if isinstance(value, str) and value.lower() in PROSTATE_FALSE_VALUES:
+            return 0
+        return float(value) if value else 0
+    
+    return float(value)
+
+
+def _form_columns(cancer_type, fields):
+    """(form field, feature column) pairs in the order the fields are converted"""
+    if cancer_type.lower() == 'lung':
+        # Lung forms send the column names; they are used lowercased
+        return [(field, field.lower()) for field in fields]
+    
+    field_mapping = FORM_FIELDS.get(cancer_type.lower(), {})
+    return [(form_field, csv_field) for form_field, csv_field in field_mapping.items() if form_field in fields]
+
+
+def get_feature_mapping(cancer_type, form_data, feature_names):
+    """Map form data fields to model features"""
+    return {
+        column: coerce_form_value(cancer_type, form_data[field])
+        for field, column in _form_columns(cancer_type, form_data)
+    }
+
+
+def build_feature_matrix(cancer_type, records, feature_names):
+    """
+    Map many form-style records to one float64 matrix in training column order
+    
+    Gives each record the vector get_feature_mapping would; features a record
+    does not set are 0. Plain numbers are copied a column at a time and every
+    other value goes through coerce_form_value.
+    
+    Args:
+        cancer_type: Type of cancer (breast, lung, prostate)
+        records: List of form data dictionaries
+        feature_names: Feature columns in training order
+    
+    Returns:
+        Array of shape (len(records), len(feature_names))
+    
+    Raises:
+        ValueError: If the records set fewer than half of the features, or
+            naming the first record that is not an object or has a value
+            that cannot be read as a number
+    """
+    fields = {}
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"Record {i} is not an object of form fields")
+        for field in record:
+            if isinstance(field, str):
+                fields[field] = None
+    
+    columns = _form_columns(cancer_type, fields)
+    check_feature_columns(feature_names, {column for _, column in columns})
+    
+    feature_index = {name: i for i, name in enumerate(feature_names)}
+    n = len(records)
+    X = np.zeros((n, len(feature_names)), dtype=np.float64)
+    invalid = {}
+    converted = {}
+    
+    for field, column in columns:
+        present = np.fromiter((field in record for record in records), dtype=bool, count=n)
+        values = np.empty(n, dtype=object)
+        values[:] = [record.get(field) for record in records]
+        kinds = np.fromiter((type(value) for value in values), dtype=object, count=n)
+        plain = present & ((kinds == float) | (kinds == int))
         
-        for form_field, csv_field in field_mapping.items():
-            if form_field in form_data:
-                val = form_data[form_field]
-                if isinstance(val, str) and val.lower() in ['yes', 'y', '1']:
-                    mapping[csv_field] = 1
-                elif isinstance(val, str) and val.lower() in ['no', 'n', '0']:
-                    mapping[csv_field] = 0
-                else:
-                    mapping[csv_field] = float(val) if val else 0
+        numbers = np.zeros(n, dtype=np.float64)
+        numbers[plain] = values[plain].astype(np.float64)
+        for row in np.flatnonzero(present & ~plain):
+            try:
+                numbers[row] = coerce_form_value(cancer_type, values[row])
+            except (TypeError, ValueError):
+                # Conversion of this field stops at its first bad value
+                invalid[field] = int(row)
+                break
+        converted[field] = (present, numbers)
+    
+    if invalid:
+        # Report what predicting the records one by one would stop at first
+        row = min(invalid.values())
+        record = records[row]
+        field = next(field for field, _ in _form_columns(cancer_type, record) if invalid.get(field) == row)
+        raise ValueError(f"Record {row}: {field} must be a number, got {record[field]!r}")
     
-    return mapping
+    fields_by_column = {}
+    for field, column in columns:
+        if column in feature_index:
+            fields_by_column.setdefault(column, []).append(field)
+    
+    for column, column_fields in fields_by_column.items():
+        j = feature_index[column]
+        if len(column_fields) == 1:
+            present, numbers = converted[column_fields[0]]
+            X[present, j] = numbers[present]
+            continue
+        # Lung fields differing only in case: the last one in the record wins
+        for row, record in enumerate(records):
+            for field in record:
+                if field in column_fields:
+                    X[row, j] = converted[field][1][row]
+    
+    return X
+
+
+# Human-readable labels for prediction codes
+PREDICTION_LABELS = {
+    'breast': {0: 'Benign', 1: 'Malignant'},
+    'lung': {0: 'No', 1: 'Yes'},  # Adjust based on actual labels
+    'prostate': {0: 'Low Risk', 1: 'High Risk'}  # Adjust based on actual labels
+}
 
 
 def get_prediction_label(cancer_type, prediction_code):
     """Convert prediction code to human-readable label"""
-    labels = {
-        'breast': {0: 'Benign', 1: 'Malignant'},
-        'lung': {0: 'No', 1: 'Yes'},  # Adjust based on actual labels
-        'prostate': {0: 'Low Risk', 1: 'High Risk'}  # Adjust based on actual labels
-    }
-    
     cancer_type_lower = cancer_type.lower()
-    if cancer_type_lower in labels:
-        return labels[cancer_type_lower].get(int(prediction_code), 'Unknown')
+    if cancer_type_lower in PREDICTION_LABELS:
+        return PREDICTION_LABELS[cancer_type_lower].get(int(prediction_code), 'Unknown')
     
     return 'Unknown'
 
 
+def get_prediction_labels(cancer_type, prediction_codes):
+    """Convert an array of prediction codes to labels with one array lookup"""
+    codes = np.asarray(prediction_codes).astype(np.int64)
+    labels = PREDICTION_LABELS.get(cancer_type.lower(), {})
+    
+    # Codes without a label map to 'Unknown'
+    size = max(labels, default=-1) + 1
+    lookup = np.array([labels.get(code, 'Unknown') for code in range(size)] + ['Unknown'], dtype=object)
+    index = np.where((codes >= 0) & (codes < size), codes, size)
+    
+    return lookup[index]
+
+
 def predict_batch(cancer_type, csv_path, model_path, scaler_path):
     """
     Make batch predictions from CSV file
     
     Args:
         cancer_type: Type of cancer
-        csv_path: Path to input CSV file
+        csv_path: Path or file-like object with the input CSV
         model_path: Path to saved model
         scaler_path: Path to saved scaler
     
     Returns:
         DataFrame with predictions appended
     """
-    # Load model and scaler
-    model, scaler, feature_names = load_model_and_scaler(cancer_type, model_path, scaler_path)
+    with StageTimer('predict_batch', cancer_type) as timer:
+        # Load model and scaler
+        estimator, scaler, feature_names, preprocessor = _load_batch_artifacts(cancer_type, model_path, scaler_path)
+        timer.lap('load_artifacts')
+        
+        # Load input CSV
+        df = pd.read_csv(csv_path)
+        timer.lap('read_csv')
+        
+        return score_batch_frame(cancer_type, df, estimator, scaler, feature_names, timer, preprocessor)
+
+
+def predict_batch_chunks(cancer_type, csv_file, model_path, scaler_path, chunksize=10000):
+    """
+    Make batch predictions chunk by chunk
     
-    # Load input CSV
-    df = pd.read_csv(csv_path)
+    Args:
+        cancer_type: Type of cancer
+        csv_file: Path or file-like object with the input CSV
+        model_path: Path to saved model
+        scaler_path: Path to saved scaler
+        chunksize: Number of rows read and scored at a time
     
-    # Preprocess (extract features, same as training)
-    preprocessor = get_preprocessor(cancer_type)
-    X, _, _ = preprocessor(df)
+    Yields:
+        DataFrame of each input chunk with predictions appended
+    """
+    with StageTimer('predict_batch_chunks', cancer_type) as timer:
+        estimator, scaler, feature_names, preprocessor = _load_batch_artifacts(cancer_type, model_path, scaler_path)
+        timer.lap('load_artifacts')
+        
+        for chunk in pd.read_csv(csv_file, chunksize=chunksize):
+            timer.lap('read_csv')
+            yield score_batch_frame(cancer_type, chunk, estimator, scaler, feature_names, timer, preprocessor)
+            # Time spent by the consumer is not part of any stage
+            timer.skip()
+
+
+def predict_batch_stream(cancer_type, csv_file, model_path, scaler_path, chunksize=10000, fmt='csv'):
+    """
+    Make batch predictions chunk by chunk, yielding serialized results
     
-    # Ensure feature order matches training
-    if feature_names:
-        for col in feature_names:
-            if col not in X.columns:
-                X[col] = 0
-        X = X[feature_names]
+    Args:
+        fmt: Output format name from RESULT_FORMATS that supports streaming
+        Other arguments as for predict_batch_chunks
     
-    # Scale
-    X_scaled = scaler.transform(X)
+    Yields:
+        Bytes of the serialized output, one piece per scored chunk
+    """
+    chunks = predict_batch_chunks(cancer_type, csv_file, model_path, scaler_path, chunksize)
+    yield from iter_serialized_results(chunks, fmt)
+
+
+def _load_batch_artifacts(cancer_type, model_path, scaler_path):
+    """Get the estimator selected for the cancer type, scaler, feature names and preprocessor"""
+    entry = get_cached_artifacts(cancer_type, model_path, scaler_path)
+    plan = get_inference_plan(entry)
+    estimator = plan.estimator if plan is not None else entry['model']
+    return estimator, entry['scaler'], entry['feature_names'], entry['preprocessor']
+
+
+def score_batch_frame(cancer_type, df, estimator, scaler, feature_names, timer=None, preprocessor=None):
+    """
+    Preprocess and score a DataFrame of input rows
+    
+    Args:
+        timer: Optional StageTimer that records each stage
+        preprocessor: Fitted preprocessor saved with the model; models
+            without one refit the training preprocessing on the rows
+    
+    Returns:
+        The input DataFrame with prediction columns appended
+    """
+    lap = timer.lap if timer is not None else _no_lap
+    
+    if preprocessor is not None:
+        # One pass into a float64 matrix in training column order
+        X = preprocessor.transform(df)
+        lap('preprocess')
+        
+        X_scaled = scale_features(scaler, X)
+        lap('scale')
+    else:
+        # Preprocess (extract features, same as training)
+        X, _, _ = get_preprocessor(cancer_type)(df)
+        lap('preprocess')
+        
+        # Ensure feature order matches training
+        if feature_names:
+            check_feature_columns(feature_names, set(X.columns))
+            for col in feature_names:
+                if col not in X.columns:
+                    X[col] = 0
+            X = X[feature_names]
+        
+        # Scale
+        X_scaled = scaler.transform(X)
+        lap('scale')
     
     # Predict
-    predictions = model.predict(X_scaled)
-    probabilities = model.predict_proba(X_scaled)
+    predictions, probabilities = score_estimator(estimator, X_scaled)
     confidences = np.max(probabilities, axis=1) * 100
+    lap('evaluate')
     
     # Add predictions to DataFrame
-    df['prediction'] = [get_prediction_label(cancer_type, p) for p in predictions]
+    df['prediction'] = get_prediction_labels(cancer_type, predictions)
     df['prediction_code'] = predictions
-    df['confidence'] = [round(c, 2) for c in confidences]
+    df['confidence'] = np.round(confidences, 2)
+    lap('format')
     
     return df
 
+
+def _no_lap(stage):
+    """Stand-in for StageTimer.lap when scoring is not timed"""
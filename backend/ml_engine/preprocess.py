@@ -5,10 +5,14 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 
+from .dataset_cache import load_cached_csv
 
-def load_csv_data(file_path):
-    """Load CSV data into pandas DataFrame"""
+
+def load_csv_data(file_path, use_cache=True):
+    """Load CSV data into pandas DataFrame, through the binary dataset cache"""
     try:
+        if use_cache:
+            return load_cached_csv(file_path)
         df = pd.read_csv(file_path)
         return df
     except Exception as e:
@@ -138,3 +142,156 @@ def get_preprocessor(cancer_type):
     
     return preprocessors[cancer_type.lower()]
 
+
+# Per cancer type layout of the training data, mirroring the functions above;
+# feature_columns are the columns the prediction forms send values for
+PREPROCESS_SPECS = {
+    'breast': {
+        'target_columns': ['diagnosis', 'Diagnosis', 'target', 'Target', 'class', 'Class'],
+        'feature_columns': [
+            'radius_mean', 'texture_mean', 'perimeter_mean', 'area_mean', 'smoothness_mean',
+            'compactness_mean', 'concavity_mean', 'concave points_mean', 'symmetry_mean'
+        ],
+        'always_encode_target': True,
+        'encode_categoricals': False
+    },
+    'lung': {
+        'target_columns': ['LUNG_CANCER', 'Lung_cancer', 'lung_cancer', 'target', 'Target', 'diagnosis'],
+        'feature_columns': [
+            'GENDER', 'AGE', 'SMOKING', 'YELLOW_FINGERS', 'ANXIETY', 'PEER_PRESSURE', 'CHRONIC DISEASE',
+            'FATIGUE', 'ALLERGY', 'WHEEZING', 'ALCOHOL CONSUMING', 'COUGHING', 'SHORTNESS OF BREATH',
+            'SWALLOWING DIFFICULTY', 'CHEST PAIN'
+        ],
+        'always_encode_target': False,
+        'encode_categoricals': True
+    },
+    'prostate': {
+        'target_columns': ['target', 'Target', 'diagnosis', 'Diagnosis', 'result', 'Result'],
+        'feature_columns': [
+            'age', 'psa', 'psa_density', 'gleason', 'prostate_volume', 'dre', 'family_history', 'previous_biopsy'
+        ],
+        'always_encode_target': False,
+        'encode_categoricals': False
+    }
+}
+
+# Identifier columns dropped before training
+DROP_COLUMNS = ['id', 'ID']
+
+
+def check_feature_columns(feature_names, columns):
+    """
+    Reject inputs that lack most of a model's feature columns
+
+    A few missing columns are still filled with their defaults, but an input
+    without more than half of them would be scored mostly on filled values.
+
+    Raises:
+        ValueError: Listing the missing feature columns
+    """
+    missing = [str(name) for name in feature_names if name not in columns]
+    if missing and 2 * len(missing) > len(feature_names):
+        raise ValueError(
+            f"Input is missing {len(missing)} of {len(feature_names)} feature columns: {', '.join(missing)}"
+        )
+
+
+class FittedPreprocessor:
+    """
+    Preprocessing fitted once on the training data and reused at inference
+
+    Holds the feature columns, the category codes of encoded columns (the
+    same codes LabelEncoder assigns) and the training means used to fill
+    missing values, so inference applies them without refitting anything.
+    Category values not seen in training are treated as missing.
+    """
+
+    def __init__(self, cancer_type):
+        if cancer_type.lower() not in PREPROCESS_SPECS:
+            raise ValueError(f"Unknown cancer type: {cancer_type}")
+        self.cancer_type = cancer_type.lower()
+        self.target_column = None
+        self.target_classes = None
+        self.feature_names = []
+        self.categories = {}
+        self.fill_values = None
+
+    def fit(self, df):
+        """Learn target, feature columns, category codes and means from training data"""
+        spec = PREPROCESS_SPECS[self.cancer_type]
+
+        self.target_column = next((col for col in spec['target_columns'] if col in df.columns), None)
+        if self.target_column is None:
+            raise ValueError(f"Target column not found in {self.cancer_type} cancer dataset")
+
+        target = df[self.target_column]
+        if spec['always_encode_target'] or target.dtype == 'object':
+            self.target_classes = np.unique(target.to_numpy())
+
+        self.feature_names = [
+            col for col in df.columns if col != self.target_column and col not in DROP_COLUMNS
+        ]
+        if spec['encode_categoricals']:
+            self.categories = {
+                col: np.unique(df[col].to_numpy())
+                for col in self.feature_names if df[col].dtype == 'object'
+            }
+
+        # Means of the encoded training features, as X.fillna(X.mean())
+        X = self._to_matrix(df, fill=False)
+        self.fill_values = pd.DataFrame(X).mean().to_numpy(dtype=np.float64)
+        return self
+
+    def _to_matrix(self, df, fill=True):
+        """Build the float64 feature matrix in training column order"""
+        # Column-major like a DataFrame block, so every column is written contiguously
+        X = np.empty((len(df), len(self.feature_names)), dtype=np.float64, order='F')
+
+        for i, col in enumerate(self.feature_names):
+            if col not in df.columns:
+                # Missing feature columns default to 0, as in the batch path
+                X[:, i] = 0
+            elif col in self.categories:
+                # Category codes in LabelEncoder order; unseen values become missing
+                codes = pd.Categorical(df[col], categories=self.categories[col]).codes
+                X[:, i] = np.where(codes >= 0, codes, np.nan)
+            else:
+                X[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+        if fill:
+            missing = np.isnan(X)
+            if missing.any():
+                X[missing] = np.take(self.fill_values, np.nonzero(missing)[1])
+        return X
+
+    def transform(self, df):
+        """
+        Get the filled feature matrix for a DataFrame, in training column order
+
+        Raises:
+            ValueError: If the DataFrame lacks most of the feature columns
+        """
+        check_feature_columns(self.feature_names, set(df.columns))
+        return self._to_matrix(df)
+
+    def transform_frame(self, df):
+        """Get the filled features as a DataFrame with the training column names"""
+        return pd.DataFrame(self.transform(df), columns=self.feature_names, index=df.index)
+
+    def transform_target(self, df):
+        """Get target values encoded as during training"""
+        if self.target_column not in df.columns:
+            raise ValueError(f"Target column not found in {self.cancer_type} cancer dataset")
+        target = df[self.target_column]
+        if self.target_classes is None:
+            return target
+        codes = pd.Categorical(target, categories=self.target_classes).codes
+        if (codes < 0).any():
+            raise ValueError(f"Unknown target values in column {self.target_column}")
+        return pd.Series(codes.astype(np.int64), index=df.index, name=self.target_column)
+
+
+def fit_preprocessor(cancer_type, df):
+    """Fit the preprocessing for a cancer type on its training data"""
+    return FittedPreprocessor(cancer_type).fit(df)
+
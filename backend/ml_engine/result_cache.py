@@ -0,0 +1,111 @@
+"""
+In-process cache of single-prediction results
+
+Repeated submissions of the same inputs (page refreshes, comparing records)
+are answered without scaling and scoring again. Results are keyed by cancer
+type, model path, the model's artifact stamp and a hash of the feature
+vector built from get_feature_mapping, so a retrain that rewrites the
+artifacts never serves an old result. train_model and engine changes also
+drop the results of the affected cancer type to free their memory.
+
+The cache is a bounded LRU: at most PREDICTION_CACHE_SIZE results, each
+expiring PREDICTION_CACHE_TTL seconds after it was stored. A size of 0
+disables it.
+"""
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+
+_results = OrderedDict()
+_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'expirations': 0,
+    'invalidations': 0
+}
+
+
+def result_key(cancer_type, entry, vector):
+    """
+    Cache key for a prediction from a model cache entry and a feature vector
+
+    The vector is the float64 row in training column order; -0.0 is
+    normalized to 0.0 so equal inputs hash the same.
+    """
+    digest = hashlib.blake2b((vector + 0.0).tobytes(), digest_size=16).digest()
+    return (cancer_type.lower(), entry['model_path'], entry['stamp'], digest)
+
+
+def _copy_result(result):
+    """Copy a result so callers can add fields without touching the cache"""
+    return {**result, 'probabilities': dict(result['probabilities'])}
+
+
+def get_cached_result(key):
+    """Get a copy of a cached result, or None on a miss or expired entry"""
+    if PREDICTION_CACHE_SIZE <= 0:
+        return None
+
+    now = time.monotonic()
+    with _lock:
+        item = _results.get(key)
+        if item is None:
+            _stats['misses'] += 1
+            return None
+        stored_at, result = item
+        if now - stored_at > PREDICTION_CACHE_TTL:
+            del _results[key]
+            _stats['expirations'] += 1
+            _stats['misses'] += 1
+            return None
+        _results.move_to_end(key)
+        _stats['hits'] += 1
+
+    return _copy_result(result)
+
+
+def store_result(key, result):
+    """Store a result, evicting the least recently used ones over the size limit"""
+    if PREDICTION_CACHE_SIZE <= 0:
+        return
+
+    item = (time.monotonic(), _copy_result(result))
+    with _lock:
+        _results[key] = item
+        _results.move_to_end(key)
+        while len(_results) > PREDICTION_CACHE_SIZE:
+            _results.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def clear_result_cache(cancer_type=None):
+    """Drop cached results for one cancer type, or all of them"""
+    with _lock:
+        if cancer_type is None:
+            keys = list(_results)
+        else:
+            keys = [key for key in _results if key[0] == cancer_type.lower()]
+        for key in keys:
+            del _results[key]
+        _stats['invalidations'] += len(keys)
+
+
+def get_result_cache_stats():
+    """Get hit/miss/eviction counters, the current size and the limits"""
+    with _lock:
+        stats = dict(_stats)
+        stats['size'] = len(_results)
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    stats['max_size'] = PREDICTION_CACHE_SIZE
+    stats['ttl_seconds'] = PREDICTION_CACHE_TTL
+    return stats
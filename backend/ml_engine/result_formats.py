@@ -0,0 +1,151 @@
+"""
+Output formats for batch prediction results
+
+Results can be returned as CSV, NDJSON, Arrow IPC stream or Parquet so
+downstream pipelines can read them without re-parsing text. Arrow and
+Parquet need pyarrow and are only offered when it is installed.
+"""
+import io
+import json
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    HAS_PYARROW = False
+
+
+# Format name -> (mimetype, file extension, can be streamed chunk by chunk)
+RESULT_FORMATS = {
+    'csv': ('text/csv', 'csv', True),
+    'ndjson': ('application/x-ndjson', 'ndjson', True),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow', True),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', False)
+}
+
+# Formats that need pyarrow
+ARROW_FORMATS = {'arrow', 'parquet'}
+
+
+def available_formats(streaming=False):
+    """Get the names of formats usable in this environment"""
+    return [
+        name for name, (_, _, streamable) in RESULT_FORMATS.items()
+        if (HAS_PYARROW or name not in ARROW_FORMATS) and (streamable or not streaming)
+    ]
+
+
+def negotiate_format(accept_mimetypes, requested=None, streaming=False):
+    """
+    Pick the output format for a request
+
+    Args:
+        accept_mimetypes: The request's parsed Accept header
+        requested: Explicit format name (e.g. from a ?format= parameter)
+        streaming: Only consider formats that can be written chunk by chunk
+
+    Returns:
+        Format name, or None if nothing acceptable is available
+    """
+    formats = available_formats(streaming)
+    if requested:
+        requested = requested.lower()
+        return requested if requested in formats else None
+
+    # Without an Accept header, or with a wildcard one, CSV stays the default
+    if not accept_mimetypes:
+        return formats[0]
+    mimetypes = [RESULT_FORMATS[name][0] for name in formats]
+    best = accept_mimetypes.best_match(mimetypes)
+    if best is None:
+        return None
+    return formats[mimetypes.index(best)]
+
+
+def get_format_mimetype(fmt):
+    """Get the response mimetype for a format"""
+    return RESULT_FORMATS[fmt][0]
+
+
+def get_format_extension(fmt):
+    """Get the file extension for a format"""
+    return RESULT_FORMATS[fmt][1]
+
+
+def serialize_results(df, fmt):
+    """Serialize a results DataFrame to bytes in the given format"""
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    if fmt == 'ndjson':
+        return _to_ndjson(df)
+    if fmt == 'parquet':
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    if fmt == 'arrow':
+        return b''.join(iter_serialized_results([df], 'arrow'))
+    raise ValueError(f"Unknown result format: {fmt}")
+
+
+def iter_serialized_results(chunks, fmt):
+    """
+    Serialize result DataFrames one chunk at a time
+
+    Args:
+        chunks: Iterable of results DataFrames with the same columns
+        fmt: Format name that supports streaming
+
+    Yields:
+        Bytes for each chunk, with any header or schema in the first piece
+    """
+    if fmt == 'csv':
+        header = True
+        for chunk in chunks:
+            yield chunk.to_csv(index=False, header=header).encode('utf-8')
+            header = False
+    elif fmt == 'ndjson':
+        for chunk in chunks:
+            yield _to_ndjson(chunk)
+    elif fmt == 'arrow':
+        yield from _iter_arrow_stream(chunks)
+    else:
+        raise ValueError(f"Result format cannot be streamed: {fmt}")
+
+
+def _to_ndjson(df):
+    """
+    One JSON object per row, newline terminated
+
+    Floats are written as json.dumps writes them, the shortest text that
+    reads back to the same value as in CSV; pandas' to_json rounds them.
+    Missing values are null.
+    """
+    if df.empty:
+        return b''
+    records = df.astype(object).where(df.notna(), None).to_dict(orient='records')
+    return ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
+
+
+def _iter_arrow_stream(chunks):
+    """Arrow IPC stream, with every chunk cast to the first chunk's schema"""
+    sink = io.BytesIO()
+    writer = None
+    schema = None
+
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            schema = table.schema
+            writer = pa.ipc.new_stream(sink, schema)
+        else:
+            table = table.cast(schema)
+        writer.write_table(table)
+
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
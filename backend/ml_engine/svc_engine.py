@@ -0,0 +1,171 @@
+"""
+Single-pass evaluator for binary RBF SVC models with Platt scaling
+
+sklearn's SVC.predict and SVC.predict_proba each evaluate the kernel
+against every support vector, and predict uses the sign of the decision
+function, which can disagree with the Platt-scaled probabilities. This
+evaluator computes the RBF kernel once per batch of rows, applies the
+stored Platt sigmoid the same way libsvm does, and derives the class from
+those probabilities.
+
+For two classes libsvm still couples the pairwise probability through its
+iterative multiclass_probability solver, which stops at a tolerance of
+0.0025, so that solver is reproduced here as well to match predict_proba.
+"""
+import numpy as np
+
+
+# libsvm clips pairwise probabilities to [MIN_PROB, 1 - MIN_PROB]
+MIN_PROB = 1e-7
+
+# Stopping tolerance and iteration cap of libsvm's multiclass_probability for k=2
+COUPLING_EPS = 0.005 / 2
+COUPLING_MAX_ITER = 100
+
+# Rows evaluated per kernel block, bounds the (rows x support vectors) matrix
+BLOCK_SIZE = 1024
+
+
+def _platt_parameters(svc):
+    """
+    Platt sigmoid arrays (A, B) of a fitted SVC, empty if it has none
+
+    sklearn keeps them in _probA / _probB; the public probA_ / probB_ are
+    deprecated since 1.9 and only read when the private names are missing.
+    """
+    for name_a, name_b in (('_probA', '_probB'), ('probA_', 'probB_')):
+        prob_a = getattr(svc, name_a, None)
+        prob_b = getattr(svc, name_b, None)
+        if prob_a is not None and prob_b is not None:
+            return np.asarray(prob_a, dtype=np.float64), np.asarray(prob_b, dtype=np.float64)
+    return np.empty(0), np.empty(0)
+
+
+class CompiledSVC:
+    """Binary SVC(kernel='rbf', probability=True) reduced to its arrays"""
+
+    def __init__(self, svc):
+        if not self.supports(svc):
+            raise ValueError("Only fitted binary RBF SVC models with probability=True can be compiled")
+
+        self.classes_ = svc.classes_
+        self.n_features_in_ = svc.n_features_in_
+        self.gamma = float(svc._gamma)
+
+        self.support_vectors = np.ascontiguousarray(svc.support_vectors_, dtype=np.float64)
+        self.support_norms = np.einsum('ij,ij->i', self.support_vectors, self.support_vectors)
+
+        # libsvm's own sign convention; sklearn flips it for decision_function
+        self.dual_coef = np.asarray(svc._dual_coef_, dtype=np.float64)[0]
+        self.intercept = float(svc._intercept_[0])
+        prob_a, prob_b = _platt_parameters(svc)
+        self.prob_a = float(prob_a[0])
+        self.prob_b = float(prob_b[0])
+
+    @staticmethod
+    def supports(model):
+        """Check whether a model can be compiled"""
+        return (
+            type(model).__name__ == 'SVC'
+            and getattr(model, 'kernel', None) == 'rbf'
+            and hasattr(model, 'support_vectors_')
+            and len(getattr(model, 'classes_', ())) == 2
+            and len(_platt_parameters(model)[0]) == 1
+        )
+
+    def decision_values(self, X):
+        """libsvm decision values, positive for classes_[0]"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1]} features, but SVC is expecting {self.n_features_in_} features as input."
+            )
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+
+        values = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], BLOCK_SIZE):
+            block = X[start:start + BLOCK_SIZE]
+            # ||x - sv||^2 = ||x||^2 + ||sv||^2 - 2 x.sv
+            sq_dist = (
+                np.einsum('ij,ij->i', block, block)[:, np.newaxis]
+                + self.support_norms
+                - 2.0 * (block @ self.support_vectors.T)
+            )
+            np.maximum(sq_dist, 0.0, out=sq_dist)
+            kernel = np.exp(-self.gamma * sq_dist)
+            values[start:start + BLOCK_SIZE] = kernel @ self.dual_coef + self.intercept
+
+        return values
+
+    def predict_proba(self, X):
+        """Platt-scaled class probabilities, as SVC.predict_proba"""
+        f_ab = self.decision_values(X) * self.prob_a + self.prob_b
+
+        # Numerically stable sigmoid, written as in libsvm's sigmoid_predict
+        p_first = np.empty_like(f_ab)
+        positive = f_ab >= 0
+        exp_neg = np.exp(-f_ab[positive])
+        p_first[positive] = exp_neg / (1.0 + exp_neg)
+        p_first[~positive] = 1.0 / (1.0 + np.exp(f_ab[~positive]))
+        np.clip(p_first, MIN_PROB, 1.0 - MIN_PROB, out=p_first)
+
+        return _couple_pairwise(p_first)
+
+    def predict(self, X):
+        """Class with the highest probability"""
+        return self.predict_with_proba(X)[0]
+
+    def predict_with_proba(self, X):
+        """Predicted classes and probabilities from one kernel evaluation"""
+        proba = self.predict_proba(X)
+        return self.classes_.take(np.argmax(proba, axis=1), axis=0), proba
+
+
+def _couple_pairwise(r01):
+    """
+    libsvm's multiclass_probability for two classes, vectorized over rows
+
+    Args:
+        r01: Pairwise probability of the first class against the second
+
+    Returns:
+        Array of shape (n_samples, 2) with the coupled class probabilities
+    """
+    r10 = 1.0 - r01
+    q = np.empty((r01.shape[0], 2, 2), dtype=np.float64)
+    q[:, 0, 0] = r10 * r10
+    q[:, 1, 1] = r01 * r01
+    q[:, 0, 1] = -r10 * r01
+    q[:, 1, 0] = q[:, 0, 1]
+
+    p = np.full((r01.shape[0], 2), 0.5)
+    active = np.ones(r01.shape[0], dtype=bool)
+
+    for _ in range(COUPLING_MAX_ITER):
+        rows = np.flatnonzero(active)
+        if rows.size == 0:
+            break
+        pr, qr = p[rows], q[rows]
+
+        qp = np.einsum('nij,nj->ni', qr, pr)
+        pqp = pr[:, 0] * qp[:, 0] + pr[:, 1] * qp[:, 1]
+        max_error = np.maximum(np.abs(qp[:, 0] - pqp), np.abs(qp[:, 1] - pqp))
+
+        # Rows that have converged keep their current probabilities
+        converged = max_error < COUPLING_EPS
+        active[rows[converged]] = False
+        keep = ~converged
+        rows, pr, qr, qp, pqp = rows[keep], pr[keep], qr[keep], qp[keep], pqp[keep]
+
+        for t in range(2):
+            diff = (-qp[:, t] + pqp) / qr[:, t, t]
+            pr[:, t] += diff
+            pqp = (pqp + diff * (diff * qr[:, t, t] + 2 * qp[:, t])) / (1 + diff) / (1 + diff)
+            for j in range(2):
+                qp[:, j] = (qp[:, j] + diff * qr[:, t, j]) / (1 + diff)
+                pr[:, j] /= (1 + diff)
+
+        p[rows] = pr
+
+    return p
@@ -4,191 +4,583 @@ Model training utilities for cancer prediction
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.pipeline import Pipeline
 from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
+from scipy.stats import loguniform
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import joblib
 import os
+import math
+import time
+import shutil
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from .preprocess import load_csv_data, get_preprocessor
+from .preprocess import load_csv_data, get_preprocessor, fit_preprocessor
+from .instrumentation import record_operation
+from .model_bundle import supports_bundle, write_bundle
+from .result_cache import clear_result_cache
+from .training_cache import training_fingerprint, restore_training_artifacts, store_training_artifacts
 
 
-def train_breast_cancer_model(data_path, model_path, scaler_path):
-    """Train breast cancer prediction model using SVM"""
-    # Load and preprocess data
-    df = load_csv_data(data_path)
-    preprocessor = get_preprocessor('breast')
-    X, y, label_encoder = preprocessor(df)
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    # Train model (SVM for breast cancer)
-    model = SVC(probability=True, random_state=42, C=1.0, kernel='rbf')
-    model.fit(X_train_scaled, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test_scaled)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-    
-    # Save model and scaler
+# Search space shared by the random forest trainers
+FOREST_SEARCH_SPACE = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [5, 10, 20, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 'log2', None]
+}
+
+# Successive halving settings used by every search
+SEARCH_SETTINGS = {
+    'factor': 3,
+    'cv': 3,
+    'scoring': 'f1_weighted',
+    'random_state': 42
+}
+
+# Per cancer type training configuration
+TRAINING_SPECS = {
+    'breast': {
+        # SVM for breast cancer
+        'estimator': SVC,
+        'params': {
+            'probability': True,
+            'random_state': 42,
+            'C': 1.0,
+            'kernel': 'rbf'
+        },
+        'split': {
+            'test_size': 0.2,
+            'random_state': 42
+        },
+        # Optional hyperparameter search, sampled around the defaults
+        'search': {
+            'param_distributions': {
+                'C': loguniform(1e-2, 1e3),
+                'gamma': loguniform(1e-4, 1e0),
+                'kernel': ['rbf']
+            },
+            'n_candidates': 27
+        }
+    },
+    'lung': {
+        # Random Forest for lung cancer
+        'estimator': RandomForestClassifier,
+        'params': {
+            'n_estimators': 100,
+            'random_state': 42,
+            'max_depth': 10,
+            'min_samples_split': 5,
+            'n_jobs': -1
+        },
+        'split': {
+            'test_size': 0.2,
+            'random_state': 42
+        },
+        # Warm-start updates add trees up to this forest size
+        'incremental': {
+            'max_estimators': 500
+        },
+        'search': {
+            'param_distributions': FOREST_SEARCH_SPACE,
+            'n_candidates': 27
+        }
+    },
+    'prostate': {
+        # Random Forest for prostate cancer
+        'estimator': RandomForestClassifier,
+        'params': {
+            'n_estimators': 100,
+            'random_state': 42,
+            'max_depth': 10,
+            'min_samples_split': 5,
+            'n_jobs': -1
+        },
+        'split': {
+            'test_size': 0.2,
+            'random_state': 42
+        },
+        # Warm-start updates add trees up to this forest size
+        'incremental': {
+            'max_estimators': 500
+        },
+        'search': {
+            'param_distributions': FOREST_SEARCH_SPACE,
+            'n_candidates': 27
+        }
+    }
+}
+
+# Weighted metrics computed on the test split
+EVALUATION_METRICS = {
+    'accuracy': lambda y_true, y_pred: accuracy_score(y_true, y_pred),
+    'precision': lambda y_true, y_pred: precision_score(y_true, y_pred, average='weighted', zero_division=0),
+    'recall': lambda y_true, y_pred: recall_score(y_true, y_pred, average='weighted', zero_division=0),
+    'f1_score': lambda y_true, y_pred: f1_score(y_true, y_pred, average='weighted', zero_division=0)
+}
+
+
+def get_training_spec(cancer_type):
+    """Get training configuration for cancer type"""
+    if cancer_type.lower() not in TRAINING_SPECS:
+        raise ValueError(f"Unknown cancer type: {cancer_type}")
+    return TRAINING_SPECS[cancer_type.lower()]
+
+
+def _dump_atomic(obj, path):
+    """
+    Write an uncompressed joblib pickle and move it into place
+
+    Uncompressed pickles can be memory-mapped on load, and replacing the file
+    instead of truncating it keeps workers that have the old one mapped valid.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+    joblib.dump(obj, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+
+
+def _save_artifacts(model, scaler, feature_names, model_path, scaler_path, preprocessor=None):
+    """Write model, scaler, feature names and the fitted preprocessor to disk"""
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(model, model_path)
-    joblib.dump(scaler, scaler_path)
-    
+    _dump_atomic(model, model_path)
+    _dump_atomic(scaler, scaler_path)
+
     # Save feature names for later use
     feature_names_path = model_path.replace('.pkl', '_features.pkl')
-    joblib.dump(list(X.columns), feature_names_path)
-    
-    metrics = {
-        'accuracy': float(accuracy),
-        'precision': float(precision),
-        'recall': float(recall),
-        'f1_score': float(f1),
-        'training_samples': len(X_train),
-        'test_samples': len(X_test),
-        'features': len(X.columns),
-        'trained_at': datetime.now().isoformat()
+    _dump_atomic(feature_names, feature_names_path)
+
+    # Inference applies the same preprocessing without refitting it
+    if preprocessor is not None:
+        _dump_atomic(preprocessor, model_path.replace('.pkl', '_preprocessor.pkl'))
+
+    # Compact single-file copy for fast loading; drop a stale one otherwise
+    bundle_path = model_path.replace('.pkl', '.bundle')
+    if supports_bundle(model):
+        write_bundle(bundle_path, model, scaler, feature_names)
+    elif os.path.exists(bundle_path):
+        os.remove(bundle_path)
+
+
+def _plain_value(value):
+    """Turn numpy scalars into plain Python values for JSON metadata"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def get_search_config(cancer_type):
+    """Get the search space and successive halving settings for a cancer type"""
+    spec = get_training_spec(cancer_type)
+    if 'search' not in spec:
+        raise ValueError(f"Hyperparameter search is not configured for {cancer_type} cancer models")
+    return {**spec['search'], **SEARCH_SETTINGS}
+
+
+def search_hyperparameters(cancer_type, X_train, y_train):
+    """
+    Pick hyperparameters by successive halving over the configured search space
+
+    Randomly sampled candidates are cross-validated on a small share of the
+    training rows first, and only the best third of each round is refitted
+    on three times as many rows, so hopeless configurations are dropped
+    after a cheap fit. Candidates run in parallel on all cores. Scaler and
+    estimator form one pipeline whose fitted scaler per fold is cached on
+    disk, so each fold is scaled once per round instead of per candidate.
+
+    Returns:
+        (best estimator parameters, dictionary describing the search)
+    """
+    spec = get_training_spec(cancer_type)
+    config = get_search_config(cancer_type)
+    start = time.perf_counter()
+
+    # Parallelism comes from the search, so each candidate fit uses one core
+    params = dict(spec['params'])
+    if 'n_jobs' in params:
+        params['n_jobs'] = 1
+
+    cache_dir = tempfile.mkdtemp(prefix='train_search_')
+    try:
+        pipeline = Pipeline(
+            [('scaler', StandardScaler()), ('model', spec['estimator'](**params))],
+            memory=cache_dir
+        )
+        search = HalvingRandomSearchCV(
+            pipeline,
+            {f'model__{name}': values for name, values in config['param_distributions'].items()},
+            n_candidates=config['n_candidates'],
+            # Start small enough that the last round fits on every training row
+            min_resources='exhaust',
+            factor=config['factor'],
+            cv=config['cv'],
+            scoring=config['scoring'],
+            random_state=config['random_state'],
+            refit=False,
+            n_jobs=-1
+        )
+        search.fit(X_train, y_train)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    best_params = {
+        name.split('__', 1)[1]: _plain_value(value) for name, value in search.best_params_.items()
     }
-    
-    return metrics
+    summary = {
+        'best_params': best_params,
+        'best_score': float(search.best_score_),
+        'scoring': config['scoring'],
+        'cv': config['cv'],
+        'candidates_per_round': [int(n) for n in search.n_candidates_],
+        'rows_per_round': [int(n) for n in search.n_resources_],
+        'seconds': round(time.perf_counter() - start, 4)
+    }
+    return best_params, summary
 
 
-def train_lung_cancer_model(data_path, model_path, scaler_path):
-    """Train lung cancer prediction model using Random Forest"""
+def run_training_pipeline(cancer_type, data_path, model_path, scaler_path, search=False):
+    """
+    Train, evaluate and save a model as configured in TRAINING_SPECS
+
+    Args:
+        cancer_type: Type of cancer (breast, lung, prostate)
+        data_path: Path to training CSV
+        model_path: Path the model is saved to
+        scaler_path: Path the scaler is saved to
+        search: Tune hyperparameters with search_hyperparameters first
+
+    Returns:
+        Dictionary of evaluation metrics, with wall-clock seconds per stage
+        and, after a search, its best parameters and timing
+    """
+    spec = get_training_spec(cancer_type)
+    timings = {}
+    start = time.perf_counter()
+
     # Load and preprocess data
+    stage = time.perf_counter()
     df = load_csv_data(data_path)
-    preprocessor = get_preprocessor('lung')
-    X, y, label_encoder = preprocessor(df)
-    
+    timings['load'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    preprocessor = fit_preprocessor(cancer_type, df)
+    X = preprocessor.transform_frame(df)
+    y = preprocessor.transform_target(df)
+    timings['preprocess'] = time.perf_counter() - stage
+
     # Split data
+    stage = time.perf_counter()
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y if len(np.unique(y)) > 1 else None
+        X, y, stratify=y if len(np.unique(y)) > 1 else None, **spec['split']
     )
-    
+    timings['split'] = time.perf_counter() - stage
+
+    # Search on the training split only, so the test split stays unseen
+    params = spec['params']
+    search_summary = None
+    if search:
+        stage = time.perf_counter()
+        best_params, search_summary = search_hyperparameters(cancer_type, X_train, y_train)
+        params = {**params, **best_params}
+        timings['search'] = time.perf_counter() - stage
+
     # Scale features
+    stage = time.perf_counter()
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
-    
-    # Train model (Random Forest for lung cancer)
-    model = RandomForestClassifier(
-        n_estimators=100,
-        random_state=42,
-        max_depth=10,
-        min_samples_split=5
-    )
+    timings['scale'] = time.perf_counter() - stage
+
+    # Train model, building trees on all cores where the estimator supports it
+    stage = time.perf_counter()
+    model = spec['estimator'](**params)
     model.fit(X_train_scaled, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test_scaled)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-    
-    # Save model and scaler
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(model, model_path)
-    joblib.dump(scaler, scaler_path)
-    
-    # Save feature names
-    feature_names_path = model_path.replace('.pkl', '_features.pkl')
-    joblib.dump(list(X.columns), feature_names_path)
-    
+    timings['fit'] = time.perf_counter() - stage
+
+    # Single-row predictions are faster without a joblib worker pool
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=None)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # Write artifacts while the model is evaluated
+        stage = time.perf_counter()
+        save_future = pool.submit(
+            _save_artifacts, model, scaler, list(X.columns), model_path, scaler_path, preprocessor
+        )
+
+        # Evaluate
+        eval_stage = time.perf_counter()
+        y_pred = model.predict(X_test_scaled)
+        scores = {name: float(metric(y_test, y_pred)) for name, metric in EVALUATION_METRICS.items()}
+        timings['evaluate'] = time.perf_counter() - eval_stage
+
+        save_future.result()
+        timings['save'] = time.perf_counter() - stage
+
+    timings['total'] = time.perf_counter() - start
+
     metrics = {
-        'accuracy': float(accuracy),
-        'precision': float(precision),
-        'recall': float(recall),
-        'f1_score': float(f1),
+        **scores,
         'training_samples': len(X_train),
         'test_samples': len(X_test),
         'features': len(X.columns),
-        'trained_at': datetime.now().isoformat()
+        'trained_at': datetime.now().isoformat(),
+        'timings': {name: round(seconds, 4) for name, seconds in timings.items()}
     }
-    
+    if search_summary is not None:
+        metrics['search'] = search_summary
+
     return metrics
 
 
-def train_prostate_cancer_model(data_path, model_path, scaler_path):
-    """Train prostate cancer prediction model using Random Forest"""
-    # Load and preprocess data
+def supports_incremental(cancer_type):
+    """Check whether a cancer type's model can be updated with new rows"""
+    return 'incremental' in get_training_spec(cancer_type)
+
+
+def _shift_tree_thresholds(forest, old_mean, old_scale, new_mean, new_scale, X=None):
+    """
+    Re-express the split thresholds of fitted trees in a new scaler's space
+
+    Trees compare float32 inputs, so a split z_old <= t sends left every raw
+    value below the point where the old float32 inputs pass t. The shifted
+    threshold is put at that point in (x - new_mean) / new_scale, which
+    keeps each input on its side up to float32 rounding in the new space.
+    Each distinct value of a feature in X (the rows the scaler was updated
+    with) is then checked, and the threshold is moved with np.nextafter
+    until those values go where they went before. Splits are exact for
+    values seen in X, so for discrete features; other inputs within one
+    float32 step of a threshold may still change sides.
+    """
+    # Scaled float32 inputs of the distinct values of each feature in X, old and new space
+    seen = {}
+    if X is not None:
+        X = np.asarray(X, dtype=np.float64)
+        for f in range(X.shape[1]):
+            values = np.unique(X[:, f])
+            values = values[np.isfinite(values)]
+            seen[f] = (
+                ((values - old_mean[f]) / old_scale[f]).astype(np.float32).astype(np.float64),
+                ((values - new_mean[f]) / new_scale[f]).astype(np.float32).astype(np.float64)
+            )
+
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = state['nodes']
+        split = np.flatnonzero(nodes['left_child'] != -1)
+        feature = nodes['feature'][split]
+        old_threshold = nodes['threshold'][split]
+
+        # Largest float32 input going left, and the raw value halfway to the next float32
+        narrowed = old_threshold.astype(np.float32)
+        last_left = np.where(narrowed > old_threshold, np.nextafter(narrowed, np.float32(-np.inf)), narrowed)
+        first_right = np.nextafter(last_left, np.float32(np.inf))
+        boundary = (last_left.astype(np.float64) + first_right) / 2 * old_scale[feature] + old_mean[feature]
+        threshold = (boundary - new_mean[feature]) / new_scale[feature]
+
+        for f in np.unique(feature):
+            if f not in seen:
+                continue
+            old_inputs, new_inputs = seen[f]
+            if not len(old_inputs):
+                continue
+            at = np.flatnonzero(feature == f)
+            n_left = np.searchsorted(old_inputs, old_threshold[at], side='right')
+            # Values that went left stay left, then values that went right stay right
+            t = threshold[at]
+            has_left = n_left > 0
+            t[has_left] = np.maximum(t[has_left], new_inputs[n_left[has_left] - 1])
+            has_right = n_left < len(new_inputs)
+            right_input = new_inputs[n_left[has_right]]
+            t[has_right] = np.where(
+                t[has_right] >= right_input, np.nextafter(right_input.astype(np.float32), np.float32(-np.inf)), t[has_right]
+            )
+            threshold[at] = t
+
+        nodes['threshold'][split] = threshold
+        estimator.tree_.__setstate__(state)
+
+
+def update_model(cancer_type, data_path, model_path, scaler_path, n_new_trees=None):
+    """
+    Update a trained forest with new rows instead of retraining from scratch
+
+    The scaler's running mean and variance are updated with partial_fit, the
+    existing trees' thresholds are moved into the updated scaled space, and
+    new trees are fitted on the new rows only (warm start). Metrics are
+    computed on a held-out split of the new rows.
+
+    Args:
+        cancer_type: Type of cancer (lung, prostate)
+        data_path: Path to a CSV with the new rows
+        model_path: Path of the saved model, overwritten with the update
+        scaler_path: Path of the saved scaler, overwritten with the update
+        n_new_trees: Trees to add; defaults to the new rows' share of all
+            rows seen times the current number of trees
+
+    Returns:
+        Dictionary of evaluation metrics, with wall-clock seconds per stage
+    """
+    spec = get_training_spec(cancer_type)
+    if 'incremental' not in spec:
+        raise ValueError(f"Incremental updates are not supported for {cancer_type} cancer models")
+
+    timings = {}
+    start = time.perf_counter()
+
+    stage = time.perf_counter()
+    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+        raise FileNotFoundError(f"No trained {cancer_type} cancer model to update")
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    feature_names = joblib.load(model_path.replace('.pkl', '_features.pkl'))
+    preprocessor_path = model_path.replace('.pkl', '_preprocessor.pkl')
+    preprocessor = joblib.load(preprocessor_path) if os.path.exists(preprocessor_path) else None
     df = load_csv_data(data_path)
-    preprocessor = get_preprocessor('prostate')
-    X, y, label_encoder = preprocessor(df)
-    
-    # Split data
+    timings['load'] = time.perf_counter() - stage
+
+    # New rows are encoded and imputed with the statistics of the original training data
+    stage = time.perf_counter()
+    if preprocessor is not None:
+        X, y = preprocessor.transform_frame(df), preprocessor.transform_target(df)
+    else:
+        X, y, _ = get_preprocessor(cancer_type)(df)
+    missing = [col for col in feature_names if col not in X.columns]
+    if missing:
+        raise ValueError(f"New data is missing feature columns: {', '.join(missing)}")
+    X = X[feature_names]
+    # Warm-started forests take their classes from the new labels
+    if not np.array_equal(np.unique(y), model.classes_):
+        raise ValueError("New data must contain every class the model was trained on")
+    timings['preprocess'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y if len(np.unique(y)) > 1 else None
+        X, y, stratify=y, **spec['split']
     )
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
+    timings['split'] = time.perf_counter() - stage
+
+    # Update the running mean and variance, then keep the old trees' splits in place
+    stage = time.perf_counter()
+    rows_seen = int(np.max(scaler.n_samples_seen_))
+    old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+    scaler.partial_fit(X_train)
+    _shift_tree_thresholds(model, old_mean, old_scale, scaler.mean_, scaler.scale_, X)
+    X_train_scaled = scaler.transform(X_train)
     X_test_scaled = scaler.transform(X_test)
-    
-    # Train model (Random Forest for prostate cancer)
-    model = RandomForestClassifier(
-        n_estimators=100,
-        random_state=42,
-        max_depth=10,
-        min_samples_split=5
-    )
+    timings['scale'] = time.perf_counter() - stage
+
+    n_trees = len(model.estimators_)
+    if n_new_trees is None:
+        n_new_trees = math.ceil(n_trees * len(X_train) / rows_seen)
+    n_new_trees = max(1, int(n_new_trees))
+    max_estimators = spec['incremental']['max_estimators']
+    if n_trees + n_new_trees > max_estimators:
+        raise ValueError(
+            f"Update would grow the forest past {max_estimators} trees; retrain the model fully"
+        )
+
+    stage = time.perf_counter()
+    model.set_params(warm_start=True, n_estimators=n_trees + n_new_trees, n_jobs=spec['params'].get('n_jobs'))
     model.fit(X_train_scaled, y_train)
-    
-    # Evaluate
+    model.set_params(warm_start=False, n_jobs=None)
+    timings['fit'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
     y_pred = model.predict(X_test_scaled)
-    accuracy = accuracy_score(y_test, y_pred)
-    precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-    recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-    f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-    
-    # Save model and scaler
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(model, model_path)
-    joblib.dump(scaler, scaler_path)
-    
-    # Save feature names
-    feature_names_path = model_path.replace('.pkl', '_features.pkl')
-    joblib.dump(list(X.columns), feature_names_path)
-    
-    metrics = {
-        'accuracy': float(accuracy),
-        'precision': float(precision),
-        'recall': float(recall),
-        'f1_score': float(f1),
+    scores = {name: float(metric(y_test, y_pred)) for name, metric in EVALUATION_METRICS.items()}
+    timings['evaluate'] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    _save_artifacts(model, scaler, feature_names, model_path, scaler_path, preprocessor)
+    timings['save'] = time.perf_counter() - stage
+
+    timings['total'] = time.perf_counter() - start
+
+    return {
+        **scores,
+        'mode': 'incremental',
         'training_samples': len(X_train),
         'test_samples': len(X_test),
-        'features': len(X.columns),
-        'trained_at': datetime.now().isoformat()
+        'total_samples_seen': int(np.max(scaler.n_samples_seen_)),
+        'features': len(feature_names),
+        'trees_added': n_new_trees,
+        'n_estimators': len(model.estimators_),
+        'trained_at': datetime.now().isoformat(),
+        'timings': {name: round(seconds, 4) for name, seconds in timings.items()}
     }
-    
-    return metrics
 
 
-def train_model(cancer_type, data_path, model_path, scaler_path):
-    """Train model for specified cancer type"""
+def train_breast_cancer_model(data_path, model_path, scaler_path, search=False):
+    """Train breast cancer prediction model using SVM"""
+    return run_training_pipeline('breast', data_path, model_path, scaler_path, search)
+
+
+def train_lung_cancer_model(data_path, model_path, scaler_path, search=False):
+    """Train lung cancer prediction model using Random Forest"""
+    return run_training_pipeline('lung', data_path, model_path, scaler_path, search)
+
+
+def train_prostate_cancer_model(data_path, model_path, scaler_path, search=False):
+    """Train prostate cancer prediction model using Random Forest"""
+    return run_training_pipeline('prostate', data_path, model_path, scaler_path, search)
+
+
+def train_model(cancer_type, data_path, model_path, scaler_path, force=False, search=False):
+    """
+    Train model for specified cancer type
+
+    A previous run on identical data with the same configuration is reused
+    from the training store unless force is set; its metrics come back with
+    'cached': True. With search set, hyperparameters are tuned before the
+    final fit and the search is part of that configuration.
+    """
     trainers = {
         'breast': train_breast_cancer_model,
         'lung': train_lung_cancer_model,
         'prostate': train_prostate_cancer_model
     }
-    
+
     if cancer_type.lower() not in trainers:
         raise ValueError(f"Unknown cancer type: {cancer_type}")
-    
+
+    search_config = get_search_config(cancer_type) if search else None
+    fingerprint = training_fingerprint(cancer_type, data_path, get_training_spec(cancer_type), search_config)
+    if not force:
+        start = time.perf_counter()
+        metrics = restore_training_artifacts(fingerprint, model_path, scaler_path)
+        if metrics is not None:
+            clear_result_cache(cancer_type)
+            record_operation('train_model_cached', cancer_type, {'restore': time.perf_counter() - start})
+            return {**metrics, 'fingerprint': fingerprint, 'cached': True}
+
     trainer = trainers[cancer_type.lower()]
-    return trainer(data_path, model_path, scaler_path)
+    try:
+        metrics = trainer(data_path, model_path, scaler_path, search=search)
+    except Exception:
+        record_operation('train_model', cancer_type, failed=True)
+        raise
+
+    # Results of the replaced model are never served again, so free them
+    clear_result_cache(cancer_type)
+    record_operation('train_model', cancer_type, metrics['timings'])
+    store_training_artifacts(fingerprint, cancer_type, model_path, scaler_path, metrics)
+    return {**metrics, 'fingerprint': fingerprint, 'cached': False}
 
+
+def update_trained_model(cancer_type, data_path, model_path, scaler_path):
+    """Incrementally update the model for specified cancer type"""
+    try:
+        metrics = update_model(cancer_type, data_path, model_path, scaler_path)
+    except Exception:
+        record_operation('update_model', cancer_type, failed=True)
+        raise
+
+    clear_result_cache(cancer_type)
+    record_operation('update_model', cancer_type, metrics['timings'])
+    return metrics
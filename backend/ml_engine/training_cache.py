@@ -0,0 +1,211 @@
+"""
+Content-addressed store of trained artifact sets
+
+A training run is fingerprinted by the hash of its input CSV together with
+the trainer configuration (estimator, hyperparameters, split) and library
+versions. Finished runs are stored under <model folder>/store/<fingerprint>
+with their metrics; a later run with the same fingerprint installs the
+stored artifacts instead of training again. Only the most recently used
+entries per cancer type are kept.
+"""
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+import numpy as np
+import sklearn
+
+from .dataset_cache import hash_file
+from .model_cache import get_feature_names_path, get_preprocessor_path, get_bundle_path
+
+
+# Entries kept per cancer type; 0 disables the store
+TRAINING_CACHE_KEEP = int(os.environ.get('TRAINING_CACHE_KEEP', 3))
+
+# Bump when preprocessing or training code changes what a fingerprint produces
+FINGERPRINT_VERSION = 3
+
+STORE_DIRNAME = 'store'
+
+# Artifacts that only some models have (bundles are written for supported models)
+OPTIONAL_FILES = {'model.bundle'}
+METRICS_FILENAME = 'metrics.json'
+
+# Parameters that change how fast a model is fitted but not the model itself
+IGNORED_PARAMS = {'n_jobs', 'verbose'}
+
+_lock = threading.Lock()
+
+
+def get_store_dir(model_path):
+    """Get the store folder for the models saved next to model_path"""
+    return os.path.join(os.path.dirname(model_path) or '.', STORE_DIRNAME)
+
+
+def _describe(value):
+    """JSON stand-in for values json cannot encode, stable across processes"""
+    # Frozen scipy distributions in search spaces
+    if hasattr(value, 'dist') and hasattr(value, 'args'):
+        return f"{value.dist.name}{tuple(value.args)}{sorted(value.kwds.items())}"
+    return repr(value)
+
+
+def training_fingerprint(cancer_type, data_path, spec, search=None):
+    """
+    Fingerprint a training run by its data and configuration
+
+    Args:
+        cancer_type: Type of cancer
+        data_path: Path to the training CSV
+        spec: Training spec from TRAINING_SPECS
+        search: Search configuration if hyperparameters are tuned first
+
+    Returns:
+        SHA-256 hex digest
+    """
+    config = {
+        'version': FINGERPRINT_VERSION,
+        'cancer_type': cancer_type.lower(),
+        'data': hash_file(data_path),
+        'estimator': f"{spec['estimator'].__module__}.{spec['estimator'].__name__}",
+        'params': {k: v for k, v in spec['params'].items() if k not in IGNORED_PARAMS},
+        'split': spec['split'],
+        'sklearn': sklearn.__version__,
+        'numpy': np.__version__
+    }
+    if search is not None:
+        config['search'] = search
+    payload = json.dumps(config, sort_keys=True, default=_describe)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _artifact_files(model_path, scaler_path):
+    """Stored file name -> installed path for one artifact set"""
+    return {
+        'model.pkl': model_path,
+        'scaler.pkl': scaler_path,
+        'features.pkl': get_feature_names_path(model_path),
+        'preprocessor.pkl': get_preprocessor_path(model_path),
+        'model.bundle': get_bundle_path(model_path)
+    }
+
+
+def _link_or_copy(src, dst):
+    """Place src at dst atomically, sharing the file when the filesystem allows"""
+    # Already installed as a link to the stored file; replacing a file with
+    # another link to it leaves the temporary name behind
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return
+
+    tmp = f"{dst}.tmp{os.getpid()}_{threading.get_ident()}"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+
+
+def restore_training_artifacts(fingerprint, model_path, scaler_path):
+    """
+    Install a stored artifact set at the model and scaler paths
+
+    Returns:
+        The stored metrics, or None if there is no complete entry
+    """
+    if TRAINING_CACHE_KEEP <= 0:
+        return None
+
+    entry_dir = os.path.join(get_store_dir(model_path), fingerprint)
+    metrics_path = os.path.join(entry_dir, METRICS_FILENAME)
+    try:
+        with open(metrics_path, 'r') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    files = _artifact_files(model_path, scaler_path)
+    required = [name for name in files if name not in OPTIONAL_FILES]
+    if not all(os.path.exists(os.path.join(entry_dir, name)) for name in required):
+        return None
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    for name, path in files.items():
+        stored = os.path.join(entry_dir, name)
+        if os.path.exists(stored):
+            _link_or_copy(stored, path)
+        elif os.path.exists(path):
+            # Left over from another model and would not match this one
+            os.remove(path)
+
+    # Mark as recently used for garbage collection
+    os.utime(metrics_path)
+    return record['metrics']
+
+
+def store_training_artifacts(fingerprint, cancer_type, model_path, scaler_path, metrics):
+    """Add a freshly saved artifact set to the store and drop old entries"""
+    if TRAINING_CACHE_KEEP <= 0:
+        return
+
+    store_dir = get_store_dir(model_path)
+    entry_dir = os.path.join(store_dir, fingerprint)
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}_{threading.get_ident()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    try:
+        for name, path in _artifact_files(model_path, scaler_path).items():
+            if name in OPTIONAL_FILES and not os.path.exists(path):
+                continue
+            _link_or_copy(path, os.path.join(tmp_dir, name))
+        with open(os.path.join(tmp_dir, METRICS_FILENAME), 'w') as f:
+            json.dump({'cancer_type': cancer_type.lower(), 'metrics': metrics}, f, indent=2)
+
+        # A forced retrain replaces the entry it matched
+        with _lock:
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    collect_training_cache(store_dir)
+
+
+def collect_training_cache(store_dir, keep=None):
+    """
+    Remove all but the most recently used entries of each cancer type
+
+    Returns:
+        Number of entries removed
+    """
+    keep = TRAINING_CACHE_KEEP if keep is None else keep
+    if not os.path.isdir(store_dir):
+        return 0
+
+    by_type = {}
+    for name in os.listdir(store_dir):
+        entry_dir = os.path.join(store_dir, name)
+        metrics_path = os.path.join(entry_dir, METRICS_FILENAME)
+        try:
+            with open(metrics_path, 'r') as f:
+                cancer_type = json.load(f)['cancer_type']
+            last_used = os.path.getmtime(metrics_path)
+        except (OSError, ValueError, KeyError):
+            continue
+        by_type.setdefault(cancer_type, []).append((last_used, entry_dir))
+
+    removed = 0
+    for entries in by_type.values():
+        for _, entry_dir in sorted(entries, reverse=True)[keep:]:
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            removed += 1
+
+    return removed
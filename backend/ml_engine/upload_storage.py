@@ -0,0 +1,198 @@
+"""
+Bounded storage for the uploads folder
+
+Uploaded request bodies are spooled in memory up to a size limit and only
+then spill to an unnamed temporary file in the uploads folder, so small
+batch uploads never touch the disk and large ones vanish with the request.
+
+Files saved by name (training and dataset uploads) are kept until a
+background cleanup thread evicts them: first every file older than the
+maximum age, then the oldest files until the folder is within its quota.
+An optional callback drops whatever else is remembered about an evicted file.
+Files pinned while a request or training job reads them are never evicted.
+A write that takes the folder over its quota wakes the cleanup thread early
+instead of deleting anything in the request.
+"""
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+class UploadStorage:
+    """Quota and age limits for one uploads folder"""
+
+    def __init__(self, folder, quota_bytes=2 * 1024 ** 3, max_age_seconds=24 * 3600,
+                 spool_max_bytes=1024 * 1024, cleanup_interval=300.0, on_remove=None):
+        self.folder = folder
+        # Called with the path of each evicted file, to drop state kept about it
+        self.on_remove = on_remove
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.spool_max_bytes = spool_max_bytes
+        self.cleanup_interval = cleanup_interval
+        self._pins = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._usage_bytes = 0
+        self._stats = {
+            'cleanups': 0,
+            'evicted_files': 0,
+            'evicted_bytes': 0,
+            'expired_files': 0,
+            'errors': 0
+        }
+        os.makedirs(folder, exist_ok=True)
+
+    def spooled_buffer(self):
+        """Writable buffer kept in memory up to spool_max_bytes, then on disk in the folder"""
+        return tempfile.SpooledTemporaryFile(max_size=self.spool_max_bytes, mode='w+b', dir=self.folder)
+
+    @contextmanager
+    def in_use(self, path):
+        """Pin a file against eviction while the block runs"""
+        self.pin(path)
+        try:
+            yield path
+        finally:
+            self.unpin(path)
+
+    def pin(self, path):
+        """Protect a file from eviction until unpin is called as often"""
+        key = os.path.abspath(path)
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, path):
+        """Release one pin on a file"""
+        key = os.path.abspath(path)
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def note_written(self, path):
+        """Count a newly saved file and wake the cleanup thread when over quota"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self._usage_bytes += size
+            over_quota = self._usage_bytes > self.quota_bytes
+        if over_quota:
+            self._wake.set()
+
+    def _list_files(self):
+        """(path, mtime, size) of the regular files in the folder"""
+        files = []
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((entry.path, stat.st_mtime, stat.st_size))
+                except OSError:
+                    continue
+        return files
+
+    def _remove(self, path):
+        """Delete an unpinned file; False if pinned or already gone"""
+        # The lock is held until the file is gone, so a pin either comes
+        # first and keeps the file or comes after it was removed
+        with self._lock:
+            if os.path.abspath(path) in self._pins:
+                return False
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return False
+            except OSError:
+                self._stats['errors'] += 1
+                return False
+        if self.on_remove is not None:
+            try:
+                self.on_remove(path)
+            except Exception:
+                with self._lock:
+                    self._stats['errors'] += 1
+        return True
+
+    def expires_at(self, path):
+        """Time (seconds since the epoch) a file becomes old enough to evict, or None without an age limit"""
+        if self.max_age_seconds <= 0:
+            return None
+        return os.path.getmtime(path) + self.max_age_seconds
+
+    def cleanup(self, now=None):
+        """
+        Evict expired files, then the oldest ones until within the quota
+
+        Returns:
+            Dictionary with the files and bytes removed and the bytes left
+        """
+        now = time.time() if now is None else now
+        files = sorted(self._list_files(), key=lambda item: item[1])
+        total = sum(size for _, _, size in files)
+        removed_files = removed_bytes = expired = 0
+
+        for path, mtime, size in files:
+            expired_file = self.max_age_seconds > 0 and now - mtime > self.max_age_seconds
+            if not expired_file and total <= self.quota_bytes:
+                continue
+            if self._remove(path):
+                total -= size
+                removed_files += 1
+                removed_bytes += size
+                expired += expired_file
+
+        with self._lock:
+            self._usage_bytes = total
+            self._stats['cleanups'] += 1
+            self._stats['evicted_files'] += removed_files
+            self._stats['evicted_bytes'] += removed_bytes
+            self._stats['expired_files'] += expired
+
+        return {'removed_files': removed_files, 'removed_bytes': removed_bytes, 'usage_bytes': total}
+
+    def _run(self):
+        """Cleanup loop of the background thread"""
+        while not self._stop.is_set():
+            try:
+                self.cleanup()
+            except OSError:
+                with self._lock:
+                    self._stats['errors'] += 1
+            self._wake.wait(self.cleanup_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background cleanup thread, once"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='upload-cleanup', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background cleanup thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def get_stats(self):
+        """Get usage, limits and eviction counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['usage_bytes'] = self._usage_bytes
+            stats['pinned_files'] = len(self._pins)
+        stats['quota_bytes'] = self.quota_bytes
+        stats['max_age_seconds'] = self.max_age_seconds
+        stats['spool_max_bytes'] = self.spool_max_bytes
+        return stats
@@ -0,0 +1,365 @@
+"""
+Validation of uploaded training datasets in a single pass
+
+The upload, which the server has already received into a spooled buffer,
+is copied to the uploads folder block by block. The header is checked for
+a target column and the feature columns of the cancer type (those of the
+trained model when there is one) before any data is copied, so a file with
+the wrong columns is never written. When a summary
+is wanted, the same copy feeds an incremental CSV parser: pyarrow on slices
+of about a block when pyarrow is installed, chunked pandas reads otherwise.
+Each parsed slice only updates the row count and the type and null count of
+every column, so memory stays at one batch however large the file is.
+Rows and slices end at line breaks outside quoted values, so quoted values
+may contain line breaks as RFC 4180 allows.
+"""
+import os
+import csv
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.compute as pc
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    pa_csv = None
+    pc = None
+    HAS_PYARROW = False
+
+from .preprocess import PREPROCESS_SPECS
+
+
+# Bytes copied from the upload per read
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# A header line longer than this is not a CSV header
+MAX_HEADER_BYTES = 1024 * 1024
+
+# Rows per chunk when summarizing without pyarrow
+SUMMARY_CHUNK_ROWS = 100000
+
+# Per-batch column types tried in order on the text of a column, with pyarrow
+ARROW_CANDIDATE_TYPES = [('int64', 'int64'), ('float64', 'float64'), ('bool_', 'bool')]
+
+
+def check_header(cancer_type, columns, feature_columns=None):
+    """
+    Check a CSV header against what training for the cancer type needs
+
+    Args:
+        cancer_type: Type of cancer the dataset is for
+        columns: Column names of the header
+        feature_columns: Feature columns the header must have; defaults to
+            the cancer type's feature_columns in PREPROCESS_SPECS. Names are
+            compared without surrounding spaces.
+
+    Returns:
+        Name of the target column found in the header
+
+    Raises:
+        ValueError: If the header cannot be used to train the model
+    """
+    spec = PREPROCESS_SPECS.get(cancer_type.lower())
+    if spec is None:
+        raise ValueError(f"Unknown cancer type: {cancer_type}")
+
+    if not columns or all(not col.strip() for col in columns):
+        raise ValueError("CSV header is empty")
+
+    seen = set()
+    duplicates = sorted({col for col in columns if col in seen or seen.add(col)})
+    if duplicates:
+        raise ValueError(f"Duplicate column names: {', '.join(duplicates)}")
+
+    target_column = next((col for col in spec['target_columns'] if col in columns), None)
+    if target_column is None:
+        raise ValueError(
+            f"No target column for {cancer_type} cancer; expected one of: {', '.join(spec['target_columns'])}"
+        )
+
+    if feature_columns is None:
+        feature_columns = spec['feature_columns']
+    present = {str(col).strip() for col in columns}
+    missing = [str(col).strip() for col in feature_columns if str(col).strip() not in present]
+    if missing:
+        raise ValueError(f"Missing feature columns for {cancer_type} cancer: {', '.join(missing)}")
+    return target_column
+
+
+def _scan_line_breaks(block, in_quotes=False):
+    """
+    Find the line breaks of a block that end rows
+
+    A line break inside a quoted value does not end a row; an escaped quote
+    ("") toggles the quoting twice, so counting quotes is enough.
+
+    Args:
+        block: Bytes of the CSV
+        in_quotes: Whether the block starts inside a quoted value
+
+    Returns:
+        (number of row-ending line breaks, offset of the last one or -1,
+        whether the block ends inside a quoted value)
+    """
+    if b'"' not in block:
+        if in_quotes:
+            return 0, -1, True
+        return block.count(b'\n'), block.rfind(b'\n'), False
+
+    count, last, offset = 0, -1, 0
+    for i, part in enumerate(block.split(b'"')):
+        if i:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            breaks = part.count(b'\n')
+            if breaks:
+                count += breaks
+                last = offset + part.rfind(b'\n')
+        offset += len(part) + 1
+    return count, last, in_quotes
+
+
+def _parse_header(line):
+    """Split the raw header line into column names"""
+    text = line.decode('utf-8-sig').rstrip('\r\n')
+    return next(csv.reader([text]), [])
+
+
+class _CopyingReader:
+    """
+    File-like view of an upload that copies what is read from it to a file
+
+    Parsers pull the upload through read(), so the copy, the line count and
+    the parse happen in one pass. Only line breaks that end rows are counted.
+    """
+
+    def __init__(self, stream, out, head=b''):
+        self.stream = stream
+        self.out = out
+        self.head = head
+        self.newlines = 0
+        self.in_quotes = False
+        self.size = 0
+        self.last_byte = b''
+        self.closed = False
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if self.head:
+            if size is None or size < 0:
+                size = len(self.head)
+            block, self.head = self.head[:size], self.head[size:]
+        else:
+            block = self.stream.read(COPY_BLOCK_SIZE if size is None or size < 0 else size)
+
+        if block:
+            self.out.write(block)
+            newlines, _, self.in_quotes = _scan_line_breaks(block, self.in_quotes)
+            self.newlines += newlines
+            self.size += len(block)
+            self.last_byte = block[-1:]
+        return block
+
+    def drain(self):
+        """Copy whatever has not been read yet"""
+        for _ in iter(lambda: self.read(COPY_BLOCK_SIZE), b''):
+            pass
+
+
+def _read_header(stream, cancer_type, feature_columns=None):
+    """
+    Read up to the end of the header line and check it
+
+    Returns:
+        (columns, target column, bytes read so far, whether the file ends there)
+    """
+    head = b''
+    while True:
+        block = stream.read(COPY_BLOCK_SIZE)
+        head += block
+        end = head.find(b'\n')
+        if end >= 0:
+            columns = _parse_header(head[:end + 1])
+            return columns, check_header(cancer_type, columns, feature_columns), head, False
+        if not block:
+            # A file that is only a header without a line break
+            if not head.strip():
+                raise ValueError("CSV file is empty")
+            columns = _parse_header(head)
+            return columns, check_header(cancer_type, columns, feature_columns), head, True
+        if len(head) > MAX_HEADER_BYTES:
+            raise ValueError("CSV header line is too long")
+
+
+def _arrow_batch_type(column):
+    """Pandas dtype name the non-null text of one column slice parses as, None if all null"""
+    values = column.drop_null()
+    if len(values) == 0:
+        return None
+    for arrow_type, name in ARROW_CANDIDATE_TYPES:
+        try:
+            pc.cast(values, getattr(pa, arrow_type)())
+            return name
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return 'object'
+
+
+def _arrow_slices(reader):
+    """
+    Header line and the data cut into whole lines, about a block at a time
+
+    pyarrow's streaming reader reads its whole input ahead, so blocks are
+    cut here instead, at line breaks outside quoted values.
+    """
+    header = None
+    pending = b''
+    in_quotes = False
+    for block in iter(lambda: reader.read(COPY_BLOCK_SIZE), b''):
+        _, last, in_quotes = _scan_line_breaks(block, in_quotes)
+        pending += block
+        if last < 0:
+            continue
+        cut = len(pending) - len(block) + last
+        data, pending = pending[:cut + 1], pending[cut + 1:]
+        if header is None:
+            end = data.find(b'\n')
+            header, data = data[:end + 1], data[end + 1:]
+        yield header, data
+    if pending:
+        yield header, pending
+
+
+def _summarize_arrow(reader, columns):
+    """Parse slices of the upload with pyarrow as it is copied, keeping only counts and types"""
+    convert_options = pa_csv.ConvertOptions(
+        column_types={col: pa.string() for col in columns},
+        strings_can_be_null=True
+    )
+    rows = 0
+    dtypes = {col: None for col in columns}
+    nulls = {col: 0 for col in columns}
+    for header, data in _arrow_slices(reader):
+        if not data.strip():
+            continue
+        table = pa_csv.read_csv(
+            pa.py_buffer(header + data),
+            read_options=pa_csv.ReadOptions(use_threads=True),
+            # Quoted values may span lines; without quotes the faster parse is exact
+            parse_options=pa_csv.ParseOptions(newlines_in_values=b'"' in data),
+            convert_options=convert_options
+        )
+        rows += table.num_rows
+        for col, column in zip(table.column_names, table.columns):
+            nulls[col] += column.null_count
+            batch_type = _arrow_batch_type(column)
+            if batch_type is not None:
+                dtypes[col] = _merge_dtype(dtypes[col], np.dtype(batch_type))
+    return rows, dtypes, nulls
+
+
+def _merge_dtype(current, dtype):
+    """Dtype of a column read in chunks whose chunks have the given dtypes"""
+    if current is None or current == dtype:
+        return dtype
+    if pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(dtype):
+        return np.result_type(current, dtype)
+    return np.dtype(object)
+
+
+def _summarize_pandas(reader, columns):
+    """Parse in chunks with pandas, combining per-chunk types and null counts"""
+    rows = 0
+    dtypes = {col: None for col in columns}
+    nulls = {col: 0 for col in columns}
+    for chunk in pd.read_csv(reader, chunksize=SUMMARY_CHUNK_ROWS):
+        rows += len(chunk)
+        counts = chunk.isna().sum()
+        for col in chunk.columns:
+            if counts[col] < len(chunk):
+                dtypes[col] = _merge_dtype(dtypes[col], chunk[col].dtype)
+            nulls[col] += int(counts[col])
+    return rows, dtypes, nulls
+
+
+def _column_summary(columns, rows, dtypes, nulls):
+    """
+    Final type and null count of every column, named as pandas would read it
+
+    Integer columns with missing values read as float64 and boolean ones as
+    object; columns without any value read as float64, or as object when the
+    file has no rows at all.
+    """
+    summary = []
+    for col in columns:
+        dtype = dtypes[col]
+        if dtype is None:
+            name = 'object' if rows == 0 else 'float64'
+        elif nulls[col] and dtype.kind in 'iu':
+            name = 'float64'
+        elif nulls[col] and dtype.kind == 'b':
+            name = 'object'
+        else:
+            name = str(dtype)
+        summary.append({'name': col, 'type': name, 'nulls': nulls[col]})
+    return summary
+
+
+def validate_upload(stream, dest_path, cancer_type, summarize=True, feature_columns=None):
+    """
+    Save an uploaded training CSV and describe it
+
+    Args:
+        stream: File-like object with the uploaded CSV
+        dest_path: Path the upload is written to
+        cancer_type: Type of cancer the dataset is for
+        summarize: Parse the file while it is copied for an exact row count
+            and column summaries; otherwise rows are counted from line breaks
+        feature_columns: Feature columns the file must have, see check_header
+
+    Returns:
+        Dictionary with rows, columns, target_column, size_bytes and, when
+        summarized, column_summary
+
+    Raises:
+        ValueError: If the upload is not a usable CSV; nothing is left at dest_path
+    """
+    # Wrong columns are rejected before anything is written
+    columns, target_column, head, header_only = _read_header(stream, cancer_type, feature_columns)
+
+    rows = None
+    try:
+        with open(dest_path, 'wb') as out:
+            reader = _CopyingReader(stream, out, head)
+            if summarize and not header_only:
+                summarize_rows = _summarize_arrow if HAS_PYARROW else _summarize_pandas
+                rows, dtypes, nulls = summarize_rows(reader, columns)
+            # Anything the parser did not need is still copied
+            reader.drain()
+    except Exception:
+        os.remove(dest_path)
+        raise
+
+    if rows is None:
+        # Lines after the header, counting a last line without a line break
+        lines = reader.newlines + (1 if reader.last_byte and reader.last_byte != b'\n' else 0)
+        rows = max(lines - 1, 0)
+
+    result = {
+        'rows': rows,
+        'columns': len(columns),
+        'target_column': target_column,
+        'size_bytes': reader.size
+    }
+    if summarize:
+        if header_only:
+            dtypes, nulls = {col: None for col in columns}, {col: 0 for col in columns}
+        result['column_summary'] = _column_summary(columns, rows, dtypes, nulls)
+
+    return result
@@ -0,0 +1,38 @@
+import os
+import time
+
+import pytest
+
+from ml_engine import jobs
+
+
+def test_claim_is_shared_by_requests_and_jobs(tmp_path):
+    base_path = str(tmp_path)
+    with jobs.inline_training('lung', base_path) as claimed:
+        assert claimed
+        assert jobs.is_training('LUNG', base_path)
+        with jobs.inline_training('lung', base_path) as again:
+            assert not again
+        with pytest.raises(jobs.TrainingInProgressError) as error:
+            jobs.submit_training_job('lung', 'unused.csv', base_path)
+        assert error.value.job_id is None
+    assert not jobs.is_training('lung', base_path)
+    assert not [name for name in os.listdir(jobs.get_jobs_dir(base_path)) if name.endswith('.json')]
+
+
+def test_unfinished_job_without_a_claim_is_reported_failed(tmp_path):
+    base_path = str(tmp_path)
+    os.makedirs(jobs.get_jobs_dir(base_path))
+    job_id = 'a' * 32
+    submitted = time.time() - 5
+    jobs._write_job({
+        'job_id': job_id, 'cancer_type': 'lung', 'mode': 'full', 'state': 'running',
+        'submitted_at': '', 'submitted': submitted, 'started': submitted + 2, 'finished': None,
+        'base_path': base_path, 'metrics': None, 'error': None
+    }, base_path)
+
+    status = jobs.get_job_status(job_id, base_path)
+    assert status['state'] == 'failed'
+    assert status['queued_seconds'] == 2.0
+    assert status['running_seconds'] >= 3.0
+    assert jobs.get_job_status('../' + job_id, base_path) is None
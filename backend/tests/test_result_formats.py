@@ -0,0 +1,41 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_engine import result_formats
+from ml_engine.result_formats import serialize_results, iter_serialized_results
+
+
+RESULTS = pd.DataFrame({
+    'psa': [5.681062563123159, 0.1 + 0.2, np.nan],
+    'age': [61, 70, 55],
+    'dre': ['yes', None, 'no'],
+    'prediction': ['Positive', 'Negative', 'Positive'],
+    'confidence': [0.9876543210123457, 0.5, 1 / 3]
+})
+
+
+def decode(body, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(body), float_precision='round_trip')
+    if fmt == 'ndjson':
+        return pd.DataFrame([json.loads(line) for line in body.decode('utf-8').splitlines()])
+    if fmt == 'arrow':
+        return result_formats.pa.ipc.open_stream(body).read_pandas()
+    return pd.read_parquet(io.BytesIO(body))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson', 'arrow', 'parquet'])
+def test_every_column_round_trips_at_full_precision(fmt):
+    if fmt in result_formats.ARROW_FORMATS and not result_formats.HAS_PYARROW:
+        pytest.skip('pyarrow is not installed')
+    decoded = decode(serialize_results(RESULTS, fmt), fmt)
+    pd.testing.assert_frame_equal(decoded, RESULTS, check_exact=True, check_dtype=False)
+
+
+def test_streamed_ndjson_matches_the_whole_body():
+    chunks = [RESULTS.iloc[:2], RESULTS.iloc[2:]]
+    assert b''.join(iter_serialized_results(chunks, 'ndjson')) == serialize_results(RESULTS, 'ndjson')
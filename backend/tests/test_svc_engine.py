@@ -0,0 +1,28 @@
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from ml_engine.svc_engine import CompiledSVC
+
+
+@pytest.fixture(scope='module')
+def svc():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    y = (X[:, 0] + X[:, 1] ** 2 + rng.normal(scale=0.5, size=200) > 1).astype(int)
+    with warnings.catch_warnings():
+        # SVC(probability=True) itself is deprecated in sklearn 1.9; the trainer still uses it
+        warnings.simplefilter('ignore', FutureWarning)
+        model = SVC(kernel='rbf', probability=True, random_state=0).fit(X, y)
+    return model, X
+
+
+def test_platt_parameters_are_read_without_deprecation_warnings(svc):
+    model, X = svc
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert CompiledSVC.supports(model)
+        compiled = CompiledSVC(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
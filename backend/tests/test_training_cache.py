@@ -0,0 +1,24 @@
+import os
+
+from ml_engine.model_manager import get_model_paths
+from ml_engine.training_cache import store_training_artifacts, restore_training_artifacts
+
+
+def test_repeated_restore_leaves_no_temporary_files(tmp_path):
+    base_path = str(tmp_path / 'models')
+    os.makedirs(base_path)
+    paths = get_model_paths('breast', base_path)
+    for name in ('model', 'scaler', 'features', 'preprocessor'):
+        with open(paths[name], 'wb') as f:
+            f.write(name.encode('utf-8'))
+
+    fingerprint = 'f' * 64
+    metrics = {'accuracy': 1.0}
+    store_training_artifacts(fingerprint, 'breast', paths['model'], paths['scaler'], metrics)
+
+    for _ in range(3):
+        assert restore_training_artifacts(fingerprint, paths['model'], paths['scaler']) == metrics
+
+    assert not [name for name in os.listdir(base_path) if '.tmp' in name]
+    with open(paths['model'], 'rb') as f:
+        assert f.read() == b'model'
@@ -0,0 +1,27 @@
+import os
+import threading
+
+from ml_engine import upload_storage
+from ml_engine.upload_storage import UploadStorage
+
+
+def test_pin_during_eviction_waits_for_the_removal(tmp_path, monkeypatch):
+    storage = UploadStorage(str(tmp_path), quota_bytes=0, max_age_seconds=0)
+    path = str(tmp_path / 'upload.csv')
+    with open(path, 'wb') as f:
+        f.write(b'x' * 10)
+
+    pinned = threading.Event()
+    pinner = threading.Thread(target=lambda: (storage.pin(path), pinned.set()))
+    remove = os.remove
+
+    def remove_while_pinning(target):
+        # A request pins the file between the pin check and the unlink
+        pinner.start()
+        assert not pinned.wait(0.2)
+        remove(target)
+
+    monkeypatch.setattr(upload_storage.os, 'remove', remove_while_pinning)
+    assert storage.cleanup()['removed_files'] == 1
+    pinner.join()
+    assert pinned.is_set() and not os.path.exists(path)
@@ -0,0 +1,58 @@
+import io
+
+import pandas as pd
+import pytest
+
+from ml_engine import upload_validation
+from ml_engine.upload_validation import validate_upload
+
+
+PROSTATE_HEADER = b'age,psa,psa_density,gleason,prostate_volume,dre,family_history,previous_biopsy'
+
+QUOTED_CSV = (
+    PROSTATE_HEADER + b',note,target\n'
+    b'61,4.2,0.1,6,40,0,0,0,"first line\nsecond line",1\n'
+    b'70,9.8,0.3,7,35,1,1,0,"say ""hi""\nthen leave",0\n'
+    b'55,1.1,0.05,6,50,0,0,1,plain,1\n'
+    b'66,6.0,0.2,8,45,1,0,1,"a,b\n\nc",0\n'
+)
+
+
+@pytest.mark.parametrize('use_pyarrow', [True, False])
+@pytest.mark.parametrize('summarize', [True, False])
+def test_quoted_values_with_line_breaks_are_one_row(tmp_path, monkeypatch, use_pyarrow, summarize):
+    if use_pyarrow and not upload_validation.HAS_PYARROW:
+        pytest.skip('pyarrow is not installed')
+    monkeypatch.setattr(upload_validation, 'HAS_PYARROW', use_pyarrow)
+    # Blocks this small put quoted values across slice boundaries
+    monkeypatch.setattr(upload_validation, 'COPY_BLOCK_SIZE', 7)
+
+    dest_path = str(tmp_path / 'upload.csv')
+    result = validate_upload(io.BytesIO(QUOTED_CSV), dest_path, 'prostate', summarize=summarize)
+
+    assert result['rows'] == len(pd.read_csv(io.BytesIO(QUOTED_CSV))) == 4
+    assert result['target_column'] == 'target'
+    with open(dest_path, 'rb') as f:
+        assert f.read() == QUOTED_CSV
+    if summarize:
+        types = {column['name']: column['type'] for column in result['column_summary']}
+        assert types['note'] == 'object'
+        assert types['psa'] == 'float64'
+        assert types['target'] == 'int64'
+
+
+def test_missing_feature_columns_are_listed_and_nothing_is_written(tmp_path):
+    dest_path = str(tmp_path / 'upload.csv')
+    with pytest.raises(ValueError, match='Missing feature columns for prostate cancer: psa, gleason'):
+        validate_upload(io.BytesIO(b'age,psa_density,target\n61,0.1,1\n'), dest_path, 'prostate')
+    assert not (tmp_path / 'upload.csv').exists()
+
+
+def test_feature_columns_of_a_trained_model_replace_the_defaults(tmp_path):
+    dest_path = str(tmp_path / 'upload.csv')
+    result = validate_upload(
+        io.BytesIO(b'age,score,target\n61,3,1\n'), dest_path, 'prostate', feature_columns=['age', 'score']
+    )
+    assert result['rows'] == 1
+    with pytest.raises(ValueError, match='Missing feature columns for prostate cancer: score'):
+        validate_upload(io.BytesIO(b'age,target\n61,1\n'), dest_path, 'prostate', feature_columns=['age', 'score'])